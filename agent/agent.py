@@ -1,18 +1,123 @@
-import anthropic
+import asyncio
+import contextvars
 import logging
 import json
-
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+
+from agent import fast_path
+from agent.history import HistoryManager
+from agent.prefetch import NO_PREFETCH, Prefetch, plan as plan_prefetch
+from agent.response_cache import POLICY_TOOLS, ResponseCache
+from agent.scheduler import NORMAL, URGENT, URGENT_WORDS, RequestScheduler
+from agent.transcript import pack, unpack
+from tools.tools import registry, tools_schema
+from services.outbox import current_session_id
 from services.services import EnterpriseServices
-from tools.tools import tools_schema
+from observability import telemetry
 from config import Config
 
 logger = logging.getLogger("Claude Agent")
 
+# Prompt caching breakpoint (ephemeral = 5 minute TTL, refreshed on every hit)
+CACHE_CONTROL = {"type": "ephemeral"}
+CACHED_SYSTEM_PROMPT = [{"type": "text", "text": Config.SYSTEM_PROMPT, "cache_control": CACHE_CONTROL}]
+
+# Process-wide pool for tool calls (sync path). It is shared by every session, so it is
+# sized for the process; MAX_PARALLEL_TOOLS bounds each Claude response (see _run_tools)
+tool_executor = ThreadPoolExecutor(max_workers=Config.TOOL_POOL_SIZE, thread_name_prefix="tool")
+
+# Answers to repeated policy-only questions, shared by every session in the process
+faq_cache = ResponseCache(
+    ttl_seconds=Config.FAQ_CACHE_TTL,
+    max_entries=Config.FAQ_CACHE_MAX_ENTRIES,
+    min_similarity=Config.FAQ_CACHE_SIMILARITY,
+)
+EnterpriseServices.policy_cache.on_change(faq_cache.invalidate)
+
+# Every Claude call in the process goes through one scheduler (rate limits, retries, priority)
+scheduler = RequestScheduler(
+    max_concurrency=Config.MODEL_MAX_CONCURRENCY,
+    max_retries=Config.MODEL_MAX_RETRIES,
+    base_delay=Config.MODEL_RETRY_BASE_DELAY,
+    max_delay=Config.MODEL_RETRY_MAX_DELAY,
+)
+# Output tokens reserved per call against the output-token budget: max_tokens would
+# over-reserve, most replies are a tool call or a short answer
+OUTPUT_TOKENS_ESTIMATE = 256
+
+_clients = None
+_clients_lock = threading.Lock()
+
+
+def shared_clients():
+    """
+    The process's (sync, async) SDK clients, created on first use. Every session
+    shares them, and with them one HTTP connection pool, instead of owning a pair.
+    """
+    global _clients
+    with _clients_lock:
+        if _clients is None:
+            import anthropic  # the SDK is the slowest import in the app; defer it until an agent needs it
+            # With the scheduler on, it does the retrying (the SDK would retry behind its back)
+            retries = 0 if Config.MODEL_SCHEDULER else anthropic.DEFAULT_MAX_RETRIES
+            _clients = (
+                anthropic.Anthropic(api_key=Config.ANTHROPIC_API_KEY, base_url=Config.ANTHROPIC_BASE_URL,
+                                    max_retries=retries),
+                anthropic.AsyncAnthropic(api_key=Config.ANTHROPIC_API_KEY, base_url=Config.ANTHROPIC_BASE_URL,
+                                         max_retries=retries),
+            )
+        return _clients
+
+
 class SupportAgent:
-    def __init__(self) -> None:
-        self.client = anthropic.Anthropic(api_key=Config.ANTHROPIC_API_KEY)
+    # Thousands of idle sessions per worker: no per-instance __dict__
+    __slots__ = ("client", "async_client", "_messages", "_packed", "session_id", "history",
+                 "_turn_tools", "_turn_input", "_first_turn", "_prefetch", "_urgent")
+
+    def __init__(self, client=None, async_client=None, session_id=None) -> None:
+        # Clients can be injected (e.g. pointed at a local stand-in by the benchmarks)
+        if client is None or async_client is None:
+            shared, shared_async = shared_clients()
+            client, async_client = client or shared, async_client or shared_async
+        self.client = client
+        self.async_client = async_client
         self.messages = [] # conversation history
-    
+        # Scopes idempotency keys: a retried refund in this conversation is not issued twice
+        self.session_id = session_id or uuid.uuid4().hex
+        self.history = HistoryManager(token_budget=Config.HISTORY_TOKEN_BUDGET)
+        self._turn_tools = []  # (tool name, input) called during the current turn
+        self._turn_input, self._first_turn = None, False  # turn driven via begin_turn / apply_response
+        self._prefetch = NO_PREFETCH  # speculative tool calls for the current turn
+        self._urgent = False  # upset customer or escalation: this session's calls are scheduled first
+
+    @property
+    def messages(self):
+        """The conversation history as API message dicts (unpacked from the compact record if the session was idle)."""
+        if self._packed is not None:
+            self._messages, self._packed = unpack(self._packed), None
+        return self._messages
+
+    @messages.setter
+    def messages(self, messages):
+        self._messages, self._packed = messages, None
+
+    def _pack_history(self):
+        """Stores the history as compact records until the next turn (see agent/transcript.py)."""
+        if self._packed is None:
+            self._packed, self._messages = pack(self._messages), None
+
+    def session_state(self):
+        """
+        What outlives a turn, for a session store (see agent/workers.py): the history
+        and the URGENT flag. The turn fields are reset by every turn.
+        """
+        return {"messages": self.messages, "urgent": self._urgent}
+
+    def restore_session_state(self, state):
+        self.messages = state.get("messages", [])
+        self._urgent = state.get("urgent", False)
 
     def run(self, user_input):
         """
@@ -26,13 +131,287 @@ class SupportAgent:
         
         # --- 1. Setup (Outside the Loop) ---
         logger.info(f"User Input: {user_input}")
+        current_session_id.set(self.session_id)
+
+        labels = {"path": "model"}  # turn-duration metric attributes, read when the span closes
+        with telemetry.span("agent.turn", {"session.id": self.session_id}, metric="turn", metric_attributes=labels) as turn:
+            # Routine requests are decided in code, repeated FAQs come from the cache: no Claude call
+            answer, path = self._try_shortcuts(user_input)
+            if answer:
+                labels["path"] = path
+                turn.set_attribute("agent.path", path)
+                return answer
+
+            first_turn = self._start_turn(user_input)
+            self.messages.append({"role": "user", "content": user_input})
+
+            # --- 2. The "Re-Act" Loop ---
+            iteration = 0
+            while True:
+                iteration += 1
+                with telemetry.span("agent.iteration", {"agent.iteration": iteration}, metric="iteration") as step:
+
+                    # Call Claude with current history
+                    response = self._create(self._request_params())
+
+                    # Debug: See exactly what Claude is thinking/doing
+                    logger.debug("Full API Response:\n%s", json.dumps(response.__dict__, indent=2, default=str))
+                    self._log_usage(response, step)
+
+                    # --- EXIT CONDITION: Claude wants to speak ---
+                    if response.stop_reason == "end_turn":
+                        final_text = response.content[0].text
+                        self.messages.append({"role": "assistant", "content": final_text})
+                        turn.set_attribute("agent.iterations", iteration)
+                        self._end_turn(turn)
+                        self._remember_answer(user_input, final_text, first_turn)
+                        logger.info("CYCLE COMPLETE: Sent final response.")
+                        return final_text
+
+                    # --- CONTINUE CONDITION: Claude wants to use tools ---
+                    elif response.stop_reason == "tool_use":
+
+                        # IMPORTANT: Add Claude's "Intent" to history so it remembers what it asked for
+                        self.messages.append({"role": "assistant", "content": response.content})
+
+                        tool_use_blocks = [block for block in response.content if block.type == "tool_use"]
+
+                        # Execute the tools (independent ones in parallel, side-effecting ones serially)
+                        tool_result_content = self._run_tools(tool_use_blocks)
+
+                        # Add all tool outputs back to history as a User Message
+                        self.messages.append({"role": "user", "content": tool_result_content})
+
+                        # The loop now restarts automatically!
+                        # Claude will see the new history (Input + Tool Output) and decide the next step.
+
+    async def arun(self, user_input):
+        """
+        Async version of `run` for the Chainlit event loop.
+        Same Re-Act loop, but the Claude call goes through `AsyncAnthropic`
+        and the tools through the async service calls, so one slow
+        round-trip no longer blocks every other chat session.
+        """
+        logger.info(f"User Input: {user_input}")
+        current_session_id.set(self.session_id)
+
+        labels = {"path": "model"}
+        with telemetry.span("agent.turn", {"session.id": self.session_id}, metric="turn", metric_attributes=labels) as turn:
+            answer, path = await asyncio.to_thread(self._try_shortcuts, user_input)
+            if answer:
+                labels["path"] = path
+                turn.set_attribute("agent.path", path)
+                return answer
+
+            first_turn = self._start_turn(user_input)
+            self.messages.append({"role": "user", "content": user_input})
+
+            iteration = 0
+            while True:
+                iteration += 1
+                with telemetry.span("agent.iteration", {"agent.iteration": iteration}, metric="iteration") as step:
+                    response = await self._acreate(self._request_params())
+
+                    logger.debug("Full API Response:\n%s", json.dumps(response.__dict__, indent=2, default=str))
+                    self._log_usage(response, step)
+
+                    if response.stop_reason == "end_turn":
+                        final_text = response.content[0].text
+                        self.messages.append({"role": "assistant", "content": final_text})
+                        turn.set_attribute("agent.iterations", iteration)
+                        self._end_turn(turn)
+                        self._remember_answer(user_input, final_text, first_turn)
+                        logger.info("CYCLE COMPLETE: Sent final response.")
+                        return final_text
+
+                    elif response.stop_reason == "tool_use":
+                        self.messages.append({"role": "assistant", "content": response.content})
+
+                        tool_use_blocks = [block for block in response.content if block.type == "tool_use"]
+                        tool_result_content = await self._arun_tools(tool_use_blocks)
+
+                        self.messages.append({"role": "user", "content": tool_result_content})
+
+    async def astream(self, user_input):
+        """
+        Streaming version of `arun` for the Chainlit UI.
+        Yields events as they happen instead of returning once at the end:
+          {"type": "text", "text": ...}                          -> token from Claude
+          {"type": "tool_call", "id", "name", "input"}           -> tool about to run
+          {"type": "tool_result", "id", "name", "result"}        -> tool finished
+          {"type": "final", "text": ...}                         -> turn complete
+        """
+        logger.info(f"User Input: {user_input}")
+        current_session_id.set(self.session_id)
+
+        labels = {"path": "model"}
+        # The spans stay current across yields: the consumer drives this generator from one task
+        with telemetry.span("agent.turn", {"session.id": self.session_id, "agent.streaming": True},
+                            metric="turn", metric_attributes=labels) as turn:
+            answer, path = await asyncio.to_thread(self._try_shortcuts, user_input)
+            if answer:
+                labels["path"] = path
+                turn.set_attribute("agent.path", path)
+                yield {"type": "text", "text": answer}
+                yield {"type": "final", "text": answer}
+                return
+
+            first_turn = self._start_turn(user_input)
+            self.messages.append({"role": "user", "content": user_input})
+
+            streamed_any_text = False
+            iteration = 0
+            while True:
+                iteration += 1
+                with telemetry.span("agent.iteration", {"agent.iteration": iteration}, metric="iteration") as step:
+                    async with self._open_stream(self._request_params()) as stream:
+                        first_token = True
+                        async for text in stream.text_stream:
+                            # Separate the narration of consecutive loop iterations
+                            if first_token and streamed_any_text:
+                                yield {"type": "text", "text": "\n\n"}
+                            first_token = False
+                            streamed_any_text = True
+                            yield {"type": "text", "text": text}
+                        response = await stream.get_final_message()
+
+                    logger.debug("Full API Response:\n%s", json.dumps(response.__dict__, indent=2, default=str))
+                    self._log_usage(response, step)
+
+                    if response.stop_reason == "end_turn":
+                        final_text = "".join(block.text for block in response.content if block.type == "text")
+                        self.messages.append({"role": "assistant", "content": final_text})
+                        turn.set_attribute("agent.iterations", iteration)
+                        self._end_turn(turn)
+                        self._remember_answer(user_input, final_text, first_turn)
+                        logger.info("CYCLE COMPLETE: Streamed final response.")
+                        yield {"type": "final", "text": final_text}
+                        return
+
+                    elif response.stop_reason == "tool_use":
+                        self.messages.append({"role": "assistant", "content": response.content})
+
+                        tool_use_blocks = [block for block in response.content if block.type == "tool_use"]
+                        for block in tool_use_blocks:
+                            yield {"type": "tool_call", "id": block.id, "name": block.name, "input": block.input}
+
+                        tool_result_content = await self._arun_tools(tool_use_blocks)
+
+                        for block, tool_result in zip(tool_use_blocks, tool_result_content):
+                            yield {"type": "tool_result", "id": block.id, "name": block.name, "result": tool_result["content"]}
+
+                        self.messages.append({"role": "user", "content": tool_result_content})
+
+    # ---------------------------------------------------------
+    # Step-wise driving: the caller makes the model calls (batch mode, agent/batch.py)
+    # ---------------------------------------------------------
+    def begin_turn(self, user_input):
+        """
+        Starts a turn whose Claude calls are made by the caller.
+        Returns (answer, path) if the turn was answered without Claude (see `_try_shortcuts`),
+        otherwise (None, None): send `next_request()` and feed the reply to `apply_response()`.
+        """
+        logger.info(f"User Input: {user_input}")
+        current_session_id.set(self.session_id)
+
+        answer, path = self._try_shortcuts(user_input)
+        if answer:
+            return answer, path
+
+        self._first_turn = self._start_turn()  # no prefetch: results would sit idle until the batch ends
+        self._turn_input = user_input
         self.messages.append({"role": "user", "content": user_input})
+        return None, None
 
-        # --- 2. The "Re-Act" Loop ---
-        while True:
-            
-            # Call Claude with current history
-            response = self.client.messages.create(
+    def next_request(self):
+        """Arguments for the turn's next Claude call (same as the Re-Act loop sends)."""
+        return self._request_params()
+
+    def apply_response(self, response):
+        """
+        Applies one Claude response to the turn started by `begin_turn`.
+        Runs the requested tools and returns None, or returns the final text once the turn ends.
+        """
+        current_session_id.set(self.session_id)  # may be a different thread than begin_turn
+        self._log_usage(response)
+
+        if response.stop_reason == "tool_use":
+            self.messages.append({"role": "assistant", "content": response.content})
+            tool_use_blocks = [block for block in response.content if block.type == "tool_use"]
+            self.messages.append({"role": "user", "content": self._run_tools(tool_use_blocks)})
+            return None
+
+        final_text = "".join(block.text for block in response.content if block.type == "text")
+        self.messages.append({"role": "assistant", "content": final_text})
+        self._remember_answer(self._turn_input, final_text, self._first_turn)
+        self._end_turn(telemetry.NOOP_SPAN)
+        logger.info(f"CYCLE COMPLETE: Sent final response ({response.stop_reason}).")
+        return final_text
+
+    def _try_shortcuts(self, user_input):
+        """
+        Answers the turn without Claude when possible. Returns (answer, path) or (None, None):
+          - "fast": the deterministic fast path decided a routine return (see agent/fast_path.py);
+          - "cache": the same policy question was answered before (see agent/response_cache.py).
+        On a hit, the exchange is recorded in the history so Claude has the
+        context if the conversation continues.
+        """
+        answer, path = None, None
+        # First turn only: earlier messages may hold what the fast path checks for
+        # ("I opened the box", "I'm so angry"), and it sees just this one. Cached
+        # answers are generic, so a follow-up ("How do returns work for these?")
+        # that refers back to the conversation goes to Claude too.
+        if Config.FAST_PATH and not self.messages:
+            answer, path = fast_path.resolve(user_input), "fast"
+        if not answer and Config.FAQ_CACHE and not self.messages and faq_cache.eligible(user_input):
+            answer, path = faq_cache.get(user_input), "cache"
+        if not answer:
+            return None, None
+
+        self.messages.append({"role": "user", "content": user_input})
+        self.messages.append({"role": "assistant", "content": answer})
+        self._pack_history()
+        if path == "fast":
+            logger.info("CYCLE COMPLETE: Answered by fast path (no model call).")
+        else:
+            logger.info("CYCLE COMPLETE: Answered from FAQ cache (no model call).")
+        return answer, path
+
+    def _start_turn(self, user_input=None):
+        """
+        Resets the per-turn tool record and, given the `user_input`, starts its speculative
+        tool calls (see agent/prefetch.py). Returns True if this is the conversation's first turn.
+        """
+        self._turn_tools = []
+        if user_input and URGENT_WORDS.search(user_input):
+            self._urgent = True
+        self._prefetch.discard()
+        calls = plan_prefetch(user_input, Config.PREFETCH_MAX_ORDERS) if user_input and Config.PREFETCH else []
+        self._prefetch = Prefetch(tool_executor, calls) if calls else NO_PREFETCH
+        return not self.messages
+
+    def _end_turn(self, span):
+        """Records how many prefetched calls Claude used, drops the rest and packs the history."""
+        span.set_attribute("agent.prefetch_served", self._prefetch.served)
+        self._prefetch.discard()
+        self._prefetch = NO_PREFETCH
+        self._pack_history()
+
+    def _remember_answer(self, user_input, answer, first_turn):
+        """Caches the answer if it came from policy documents alone, with no earlier context."""
+        if not (Config.FAQ_CACHE and first_turn and self._turn_tools and faq_cache.eligible(user_input)):
+            return
+        if any(name not in POLICY_TOOLS for name, _ in self._turn_tools):
+            return
+        faq_cache.put(user_input, answer, {tool_input.get("policy_type") for _, tool_input in self._turn_tools} - {None})
+
+    def _request_params(self):
+        """Arguments for every Claude call in the Re-Act loop."""
+        # Keep the history under budget before it is (re)sent
+        self.history.compact(self.messages)
+
+        if not Config.PROMPT_CACHING:
+            return dict(
                 model=Config.MODEL_NAME,
                 max_tokens=Config.MAX_TOKENS,
                 temperature=Config.TEMPERATURE,
@@ -41,60 +420,181 @@ class SupportAgent:
                 tools=tools_schema
             )
 
-            # Debug: See exactly what Claude is thinking/doing
-            logger.debug("Full API Response:\n%s", json.dumps(response.__dict__, indent=2, default=str)) 
-
-            # --- EXIT CONDITION: Claude wants to speak ---
-            if response.stop_reason == "end_turn":
-                final_text = response.content[0].text
-                self.messages.append({"role": "assistant", "content": final_text})
-                logger.info("CYCLE COMPLETE: Sent final response.")
-                return final_text
-
-            # --- CONTINUE CONDITION: Claude wants to use tools ---
-            elif response.stop_reason == "tool_use":
-                
-                # IMPORTANT: Add Claude's "Intent" to history so it remembers what it asked for
-                self.messages.append({"role": "assistant", "content": response.content})
-
-                tool_use_blocks = [block for block in response.content if block.type == "tool_use"]
-                tool_result_content = []
-
-                for block in tool_use_blocks:
-                    tool_name = block.name
-                    tool_input = block.input
-                    tool_id = block.id
-
-                    logger.info(f"DECISION: Agent called '{tool_name}' with input {tool_input}")
-
-                    # Execute the specific tool
-                    result = None
-                    if tool_name == "look_up_order":
-                        result = EnterpriseServices.look_up_order(tool_input.get("order_id"))
-                    elif tool_name == "get_policy_info":
-                        result = EnterpriseServices.get_policy_info(tool_input.get("policy_type"))
-                    elif tool_name == "check_precedents":
-                        result = EnterpriseServices.check_precedents(tool_input.get("query_tags_str"))                    
-                    elif tool_name == "execute_order_return": 
-                        result = EnterpriseServices.execute_refund(tool_input.get("order_id"), tool_input.get("reason"))
-                    elif tool_name == "escalate_to_human":
-                        result = EnterpriseServices.escalate_to_human(tool_input.get("order_id"), tool_input.get("reason"))
-                    else:
-                        logger.error(f"Unknown tool called: {tool_name}")
-                        result = {"error": f"Tool '{tool_name}' not found."}
-
-                    # Add result to the list of outputs
-                    tool_result_content.append({
-                        "type": "tool_result",
-                        "tool_use_id": tool_id,
-                        "content": json.dumps(result)
-                    })
-
-                # Add all tool outputs back to history as a User Message
-                self.messages.append({"role": "user", "content": tool_result_content})
-                
-                # The loop now restarts automatically!
-                # Claude will see the new history (Input + Tool Output) and decide the next step.
+        # Prompt caching: tools + system prompt are identical on every call,
+        # so one breakpoint after the system prompt caches the whole static prefix.
+        # A second breakpoint on the newest message caches the history so far
+        # (including the policy text), which the next loop iteration re-reads.
+        return dict(
+            model=Config.MODEL_NAME,
+            max_tokens=Config.MAX_TOKENS,
+            temperature=Config.TEMPERATURE,
+            system=CACHED_SYSTEM_PROMPT,
+            messages=self._with_history_breakpoint(self.messages),
+            tools=tools_schema
+        )
+
+    # ---------------------------------------------------------
+    # Claude calls (through the process-wide scheduler)
+    # ---------------------------------------------------------
+    def _create(self, params):
+        if not Config.MODEL_SCHEDULER:
+            return self.client.messages.create(**params)
+        return scheduler.call(lambda: self.client.messages.with_raw_response.create(**params),
+                              self.session_id, self._priority(), self._cost())
+
+    async def _acreate(self, params):
+        if not Config.MODEL_SCHEDULER:
+            return await self.async_client.messages.create(**params)
+        return await scheduler.acall(lambda: self.async_client.messages.with_raw_response.create(**params),
+                                     self.session_id, self._priority(), self._cost())
+
+    def _open_stream(self, params):
+        if not Config.MODEL_SCHEDULER:
+            return self.async_client.messages.stream(**params)
+        return scheduler.astream(lambda: self.async_client.messages.stream(**params),
+                                 self.session_id, self._priority(), self._cost())
+
+    def _priority(self):
+        return URGENT if self._urgent else NORMAL
+
+    def _cost(self):
+        """Estimated rate-limit cost of the next call. The cached system prompt + tools don't count toward input tokens."""
+        return {"requests": 1, "input-tokens": self.history.total_tokens(self.messages),
+                "output-tokens": OUTPUT_TOKENS_ESTIMATE}
+
+    def _track_urgency(self, tool_use_blocks, results):
+        """An escalation, or an order the OMS flags as upset, makes the rest of the session URGENT."""
+        for block in tool_use_blocks:
+            result = results[block.id]
+            if block.name == "escalate_to_human" or (
+                    isinstance(result, dict) and result.get("customer_sentiment") in fast_path.NEGATIVE_SENTIMENTS):
+                self._urgent = True
+
+    @staticmethod
+    def _with_history_breakpoint(messages):
+        """
+        Returns a copy of the history with a cache_control marker on the last
+        content block. The stored history itself is never modified, so the
+        breakpoint moves forward each call instead of piling up (API max is 4).
+        """
+        if not messages:
+            return messages
+
+        last = messages[-1]
+        content = last["content"]
+        if isinstance(content, str):
+            blocks = [{"type": "text", "text": content}]
+        else:
+            blocks = [b if isinstance(b, dict) else b.model_dump(exclude_none=True) for b in content]
+
+        if not blocks:
+            return messages
+
+        blocks[-1] = {**blocks[-1], "cache_control": CACHE_CONTROL}
+        return messages[:-1] + [{"role": last["role"], "content": blocks}]
+
+    @staticmethod
+    def _log_usage(response, span=telemetry.NOOP_SPAN):
+        """Logs token usage, including how much of the prompt was served from cache, and records it on `span`."""
+        span.set_attribute("gen_ai.response.finish_reasons", [response.stop_reason or ""])
+        usage = getattr(response, "usage", None)
+        telemetry.record_usage(span, usage)
+        if usage is None:
+            return
+
+        cache_read = getattr(usage, "cache_read_input_tokens", 0) or 0
+        cache_write = getattr(usage, "cache_creation_input_tokens", 0) or 0
+        logger.info(
+            f"TOKENS: input={usage.input_tokens} cache_read={cache_read} "
+            f"cache_write={cache_write} output={usage.output_tokens}"
+        )
+
+    def _run_tools(self, tool_use_blocks):
+        """
+        Executes every tool_use block from one Claude response.
+        Parallel-safe tools are dispatched together on the shared thread pool, up to
+        MAX_PARALLEL_TOOLS at a time, so the turn costs as much as the slowest tool
+        instead of the sum; calls that were prefetched at the start of the turn are served from there.
+        Tools registered with parallel_safe=False (refunds, escalations) then run one at a time.
+        Results are returned in the original tool_use order.
+        """
+        for block in tool_use_blocks:
+            logger.info(f"DECISION: Agent called '{block.name}' with input {block.input}")
+            self._turn_tools.append((block.name, block.input))
+
+        parallel = [b for b in tool_use_blocks if self._is_parallel_safe(b.name)]
+        serial = [b for b in tool_use_blocks if not self._is_parallel_safe(b.name)]
+
+        results = {}
+        for start in range(0, len(parallel), Config.MAX_PARALLEL_TOOLS):
+            wave = parallel[start:start + Config.MAX_PARALLEL_TOOLS]
+            futures = {b.id: self._prefetch.take(b.name, b.input) or self._submit_tool(b) for b in wave}
+            for b in wave:
+                results[b.id] = self._wait_for_tool(b.name, futures[b.id])
+
+        if serial:
+            self._prefetch.discard()  # side effects ahead: what is left may be stale
+        for b in serial:
+            results[b.id] = self._wait_for_tool(b.name, self._submit_tool(b))
+
+        self._track_urgency(tool_use_blocks, results)
+        return [self._tool_result(b.id, results[b.id]) for b in tool_use_blocks]
+
+    async def _arun_tools(self, tool_use_blocks):
+        """Async counterpart of `_run_tools` (parallel tools run as asyncio tasks)."""
+        for block in tool_use_blocks:
+            logger.info(f"DECISION: Agent called '{block.name}' with input {block.input}")
+            self._turn_tools.append((block.name, block.input))
+
+        parallel = [b for b in tool_use_blocks if self._is_parallel_safe(b.name)]
+        serial = [b for b in tool_use_blocks if not self._is_parallel_safe(b.name)]
+
+        limit = asyncio.Semaphore(Config.MAX_PARALLEL_TOOLS)
+        outputs = await asyncio.gather(*(self._acall_tool(b, limit) for b in parallel))
+        results = {b.id: out for b, out in zip(parallel, outputs)}
+
+        if serial:
+            self._prefetch.discard()
+        for b in serial:
+            results[b.id] = await registry.acall(b.name, b.input)
+
+        self._track_urgency(tool_use_blocks, results)
+        return [self._tool_result(b.id, results[b.id]) for b in tool_use_blocks]
+
+    async def _acall_tool(self, block, limit):
+        future = self._prefetch.take(block.name, block.input)
+        if future is not None:
+            return await Prefetch.await_result(block.name, future)
+        async with limit:
+            return await registry.acall(block.name, block.input)
+
+    @staticmethod
+    def _submit_tool(block):
+        # Each tool runs in a copy of the caller's context (carries current_session_id)
+        return tool_executor.submit(contextvars.copy_context().run, registry.call, block.name, block.input)
+
+    @staticmethod
+    def _is_parallel_safe(tool_name):
+        tool = registry.get(tool_name)
+        # Unknown tools only produce an error result, so they never need to wait
+        return tool is None or tool.parallel_safe
+
+    @staticmethod
+    def _wait_for_tool(tool_name, future):
+        tool = registry.get(tool_name)
+        try:
+            return future.result(timeout=tool.timeout if tool else None)
+        except FuturesTimeoutError:
+            return registry.timeout_error(tool_name)
+
+    @staticmethod
+    def _tool_result(tool_id, result):
+        """Formats a tool output as an Anthropic tool_result block."""
+        return {
+            "type": "tool_result",
+            "tool_use_id": tool_id,
+            "content": json.dumps(result)
+        }
 
 
 
@@ -0,0 +1,194 @@
+"""
+Offline ticket resolution (scripts/resolve_tickets.py).
+
+Applies the same SOP as the chat agent to a backlog of tickets, optimised for
+throughput instead of latency. Every ticket gets its own `SupportAgent`. The
+Re-Act loop runs in rounds across all open tickets at once:
+  1. the next Claude call of every open ticket goes out in one Message Batch
+     (split into batches of `max_batch_requests`);
+  2. once the batch has ended, each reply is applied on a worker pool, which
+     runs that ticket's tools (OMS, policies, graph, refunds);
+  3. tickets that reached a final answer are reported immediately, the rest
+     go into the next round.
+Tickets answered by the fast path or the FAQ cache never reach the API.
+Repeats of the same FAQ-style question wait for the first one, so the
+backlog pays for each distinct question once.
+"""
+import contextvars
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from agent.agent import SupportAgent, faq_cache
+from agent.response_cache import cache_key, key_words
+from config import Config
+from observability import telemetry
+
+logger = logging.getLogger("Batch")
+
+# Batch results worth resubmitting in the next round (the conversation is unchanged)
+RETRYABLE_RESULTS = {"expired", "canceled"}
+RETRYABLE_ERRORS = {"api_error", "overloaded_error", "rate_limit_error"}
+
+
+class BatchRunner:
+    """Drives many tickets through the agent loop, one Message Batch per round."""
+
+    def __init__(self, client, tool_workers=32, poll_interval=30.0, max_batch_requests=10000, max_rounds=8):
+        self.client = client
+        self.tool_workers = tool_workers
+        self.poll_interval = poll_interval
+        self.max_batch_requests = max_batch_requests
+        self.max_rounds = max_rounds
+
+    def run(self, tickets, on_result):
+        """
+        Resolves `tickets` (list of {"id", "message"}). `on_result(record)` is called once per
+        ticket, as soon as it is done, with {"id", "status", "path", "answer" | "error", "model_calls"}.
+        Returns counts by status.
+        """
+        counts = {"resolved": 0, "failed": 0}
+
+        def finish(ticket, status, **fields):
+            counts[status] += 1
+            on_result({"id": ticket["id"], "status": status, **fields})
+
+        # custom_id must match ^[a-zA-Z0-9_-]{1,64}$, so tickets are addressed by position
+        numbered = [(f"t{i}", ticket) for i, ticket in enumerate(tickets)]
+        first, held = self._hold_repeats(numbered)
+
+        with ThreadPoolExecutor(max_workers=self.tool_workers, thread_name_prefix="batch-tools") as pool:
+            open_tickets = {}  # custom_id -> (ticket, agent, model calls so far)
+            self._start(pool, first, open_tickets, finish)
+            held = self._release(pool, held, open_tickets, finish)
+            logger.info(f"BATCH: {len(tickets) - len(open_tickets) - sum(map(len, held.values()))} of {len(tickets)} "
+                        f"tickets answered without Claude, {len(open_tickets)} to the Batches API")
+
+            # --- Rounds: one Message Batch per round for every open ticket ---
+            for round_number in range(1, self.max_rounds + 1):
+                if not open_tickets:
+                    break
+                with telemetry.span("batch.round", {"batch.round": round_number, "batch.requests": len(open_tickets)}):
+                    results = self._submit_and_wait(open_tickets, round_number)
+                    open_tickets = self._apply_results(pool, open_tickets, results, finish)
+                    held = self._release(pool, held, open_tickets, finish)
+
+        for ticket, _, calls in open_tickets.values():
+            finish(ticket, "failed", path="model", error=f"Unresolved after {self.max_rounds} model calls", model_calls=calls)
+        return counts
+
+    # ---------------------------------------------------------
+    # Starting tickets (fast path / FAQ cache, no API call)
+    # ---------------------------------------------------------
+    @staticmethod
+    def _hold_repeats(numbered):
+        """
+        Splits out repeats of the same FAQ-style question: only the first is started,
+        the others wait for it (usually to be answered from the FAQ cache it fills).
+        Returns (tickets to start now, {first custom_id: [held (custom_id, ticket)]}).
+        """
+        if not Config.FAQ_CACHE:
+            return numbered, {}
+        first, leaders, held = [], {}, {}
+        for custom_id, ticket in numbered:
+            key = cache_key(key_words(ticket["message"])) if faq_cache.eligible(ticket["message"]) else None
+            if key and key in leaders:
+                held.setdefault(leaders[key], []).append((custom_id, ticket))
+                continue
+            if key:
+                leaders[key] = custom_id
+            first.append((custom_id, ticket))
+        return first, held
+
+    def _release(self, pool, held, open_tickets, finish):
+        """Starts the held repeats whose first ticket is done. Returns what is still held."""
+        ready = [entry for leader, entries in held.items() if leader not in open_tickets for entry in entries]
+        if ready:
+            self._start(pool, ready, open_tickets, finish)
+        return {leader: entries for leader, entries in held.items() if leader in open_tickets}
+
+    def _start(self, pool, numbered, open_tickets, finish):
+        starts = {pool.submit(self._begin, ticket): (custom_id, ticket) for custom_id, ticket in numbered}
+        for future in as_completed(starts):
+            custom_id, ticket = starts[future]
+            try:
+                agent, answer, path = future.result()
+            except Exception as e:
+                logger.error(f"BATCH: Ticket {ticket['id']} failed to start: {e}", exc_info=True)
+                finish(ticket, "failed", path="model", error=str(e), model_calls=0)
+                continue
+            if answer:
+                finish(ticket, "resolved", path=path, answer=answer, model_calls=0)
+            else:
+                open_tickets[custom_id] = (ticket, agent, 0)
+
+    def _begin(self, ticket):
+        # The runner makes the model calls itself; the async client is the process's shared one (unused here)
+        agent = SupportAgent(client=self.client, session_id=f"batch-{ticket['id']}")
+        answer, path = agent.begin_turn(ticket["message"])
+        return agent, answer, path
+
+    # ---------------------------------------------------------
+    # Message Batches API
+    # ---------------------------------------------------------
+    def _submit_and_wait(self, open_tickets, round_number):
+        """Submits the next request of every open ticket. Returns {custom_id: result} once all batches ended."""
+        requests = [{"custom_id": cid, "params": agent.next_request()} for cid, (_, agent, _) in open_tickets.items()]
+        batch_ids = []
+        for start in range(0, len(requests), self.max_batch_requests):
+            chunk = requests[start:start + self.max_batch_requests]
+            batch = self.client.messages.batches.create(requests=chunk)
+            batch_ids.append(batch.id)
+            logger.info(f"BATCH: Round {round_number}: submitted {batch.id} ({len(chunk)} requests)")
+
+        results = {}
+        pending = list(batch_ids)
+        while pending:
+            for batch_id in list(pending):
+                batch = self.client.messages.batches.retrieve(batch_id)
+                if batch.processing_status != "ended":
+                    continue
+                pending.remove(batch_id)
+                for entry in self.client.messages.batches.results(batch_id):
+                    results[entry.custom_id] = entry.result
+                logger.info(f"BATCH: Round {round_number}: {batch_id} ended ({batch.request_counts.succeeded} succeeded, "
+                            f"{batch.request_counts.errored} errored, {batch.request_counts.expired} expired)")
+            if pending:
+                time.sleep(self.poll_interval)
+        return results
+
+    def _apply_results(self, pool, open_tickets, results, finish):
+        """Runs every ticket's tools on the pool. Returns the tickets that need another round."""
+        still_open = {}
+        futures = {}
+        for custom_id, (ticket, agent, calls) in open_tickets.items():
+            result = results.get(custom_id)
+            result_type = getattr(result, "type", "missing")
+            if result_type == "succeeded":
+                # Copied context: tool spans nest under this round's span
+                future = pool.submit(contextvars.copy_context().run, agent.apply_response, result.message)
+                futures[future] = (custom_id, ticket, agent, calls + 1)
+                continue
+
+            error_type = getattr(getattr(getattr(result, "error", None), "error", None), "type", None)
+            if result_type in RETRYABLE_RESULTS or error_type in RETRYABLE_ERRORS:
+                logger.warning(f"BATCH: Ticket {ticket['id']} request {result_type} ({error_type}), retrying next round")
+                still_open[custom_id] = (ticket, agent, calls + 1)
+            else:
+                logger.error(f"BATCH: Ticket {ticket['id']} request {result_type} ({error_type})")
+                finish(ticket, "failed", path="model", error=f"Batch request {result_type}: {error_type}",
+                       model_calls=calls + 1)
+
+        for future in as_completed(futures):
+            custom_id, ticket, agent, calls = futures[future]
+            try:
+                answer = future.result()
+            except Exception as e:
+                logger.error(f"BATCH: Ticket {ticket['id']} failed: {e}", exc_info=True)
+                finish(ticket, "failed", path="model", error=str(e), model_calls=calls)
+                continue
+            if answer is None:
+                still_open[custom_id] = (ticket, agent, calls)
+            else:
+                finish(ticket, "resolved", path="model", answer=answer, model_calls=calls)
+        return still_open
@@ -0,0 +1,116 @@
+import logging
+import re
+
+from services.policy_index import nouns
+from services.services import EnterpriseServices
+from tools.tools import registry
+
+logger = logging.getLogger("Fast Path")
+
+# ---------------------------------------------------------
+# Deterministic pre-check that runs before the Re-Act loop.
+# Routine return requests (an explicit "I want to return ORD-123" as the
+# first message, order eligible, neutral sentiment, item not excluded)
+# are decided in code with no model call. Refunds are only issued for a bare
+# request; denials (Final Sale, OMS not eligible) may come with more text.
+# Anything that needs judgement falls through to Claude (returns None).
+# ---------------------------------------------------------
+
+ORDER_ID = re.compile(r"\bORD-\d+\b", re.IGNORECASE)
+# An explicit request to return the item: "I want to return ORD-123", "please refund ORD-123",
+# "Return ORD-123". Mentioning the word is not enough ("Where is my refund for ORD-123?").
+RETURN_REQUEST = re.compile(
+    r"(?:^|[.!]\s*|\b(?:please|kindly)\s+)(?:just\s+)?(?:return|refund)\s+(?:(?:my|this|the|order|for)\s+)*ORD-\d+|"
+    r"\bI(?:'d|\s+would)?\s+(?:like|want|wish|need)\s+to\s+(?:return|get\s+a\s+refund)\b|"
+    r"\bI(?:'d|\s+would)?\s+(?:like|want|need)\s+(?:a|my)\s+refund\b|"
+    r"\b(?:start|process|initiate)\s+(?:a|my|the)\s+(?:return|refund)\b",
+    re.IGNORECASE,
+)
+# Questions, negations and status checks are never requests, even with the words above
+# ("Should I return ORD-555 or keep it?", "I do not want to return ORD-123, just checking").
+NOT_A_REQUEST = re.compile(
+    r"\?|\b(?:not|no|don'?t|doesn'?t|didn'?t|won'?t|never|instead|rather|"
+    r"where|when|why|how|what|whether|if|should|eligible|eligibility|status|track\w*|"
+    r"check\w*|already|yet|still|keep)\b",
+    re.IGNORECASE,
+)
+
+# Words that mean the customer is asking for judgement: exception protocol,
+# item condition, or risk signals. Any of these hands the turn to Claude.
+NEEDS_JUDGEMENT = re.compile(
+    r"\b(vip|holiday|gift|high[\s_-]?value|exception|loyal\w*|late|"
+    r"open\w*|used|tried|tested|testing|sampl\w*|worn|damaged|defective|broken|warranty|missing|wrong|"
+    r"angry|furious|scam|ridiculous|unacceptable|lawyer|manager|human|"
+    r"damn|hell|shit|fuck\w*|crap)\b",
+    re.IGNORECASE,
+)
+NEGATIVE_SENTIMENTS = {"angry", "annoyed"}
+
+# A bare return request is made of these words, the order ID and the item's own
+# name. Anything else ("I unboxed it", "it gave me a rash") may be a condition the
+# policy cares about, so only bare requests are approved without Claude.
+BARE_REQUEST_WORDS = nouns("""
+    hi hello hey i i'd would like want wish need to return refund get a an my the this these that
+    order for please kindly just process start initiate it them item items thanks thank you
+""")
+
+DENY_INELIGIBLE = (
+    "I've checked order {order_id} ({items}). Unfortunately it isn't eligible for return"
+    "{reason}. If you believe this is a mistake, let me know and I can take a closer look."
+)
+DENY_EXCLUDED = (
+    "I've checked order {order_id} ({items}). Under our Return Policy, {category} items are "
+    "Final Sale and can't be returned, so I'm unable to process a refund for this order."
+)
+APPROVE = (
+    "Good news! Your return for order {order_id} ({items}) has been approved. "
+    "Refund transaction {transaction_id}: {message}"
+)
+
+def resolve(user_input):
+    """
+    Returns a templated answer for clearly routine requests, or None to defer to Claude.
+    Only sees this message, so the agent calls it on a conversation's first turn alone.
+    """
+    order_ids = {m.upper() for m in ORDER_ID.findall(user_input)}
+    if (len(order_ids) != 1 or not RETURN_REQUEST.search(user_input)
+            or NOT_A_REQUEST.search(user_input) or NEEDS_JUDGEMENT.search(user_input)):
+        return None
+    order_id = order_ids.pop()
+
+    policy = EnterpriseServices.policy_index.get("returns")
+    if policy is None or not policy.exclusions:
+        logger.warning("FAST PATH: Return policy exclusions unavailable, deferring to Claude.")
+        return None
+
+    order = registry.call("look_up_order", {"order_id": order_id})
+    if "error" in order or order.get("customer_sentiment") in NEGATIVE_SENTIMENTS:
+        return None
+
+    items = order.get("items", [])
+    details = {"order_id": order_id, "items": ", ".join(items)}
+    bare = nouns(ORDER_ID.sub(" ", user_input)) <= BARE_REQUEST_WORDS | nouns(" ".join(items))
+    if not bare and any(policy.has_conditions(item) for item in items):
+        return None  # the message may describe the item's condition: Claude applies the category rules
+
+    # Policy overrides database: exclusions win even if the OMS says eligible
+    # Conditional exclusions ("Used Headphones") need the customer to report the
+    # condition, and those messages are deferred above
+    exclusion = next(filter(None, (policy.is_excluded(item) for item in items)), None)
+    if exclusion:
+        logger.info(f"FAST PATH: {order_id} DENIED (policy exclusion: {exclusion.category}), no model call.")
+        return DENY_EXCLUDED.format(category=exclusion.category, **details)
+
+    if not order.get("eligible_for_return"):
+        reason = order.get("return_reason")
+        logger.info(f"FAST PATH: {order_id} DENIED (OMS not eligible: {reason}), no model call.")
+        return DENY_INELIGIBLE.format(reason=f" ({reason.replace('_', ' ')})" if reason else "", **details)
+
+    if not bare:
+        return None  # refunds are irreversible: approve only the bare request
+
+    refund = registry.call("execute_order_return", {"order_id": order_id, "reason": "Routine return: eligible, policy compliant"})
+    if refund.get("status") != "success":
+        return None
+    logger.info(f"FAST PATH: {order_id} APPROVED ({refund.get('transaction_id')}), no model call.")
+    return APPROVE.format(transaction_id=refund.get("transaction_id"), message=refund.get("message", ""), **details)
@@ -0,0 +1,127 @@
+import json
+import logging
+
+logger = logging.getLogger("History Manager")
+
+# Rough chars-per-token ratio for English + JSON (good enough for budgeting)
+CHARS_PER_TOKEN = 4
+
+# Tools whose old results are the cheapest to drop (static text the model can re-fetch)
+COMPACT_FIRST = ("get_policy_info",)
+
+# Compacted tool_result payloads start with this, so they are not compacted twice
+COMPACTED_PREFIX = '{"compacted": true'
+
+
+class HistoryManager:
+    """
+    Keeps `SupportAgent.messages` under a token budget.
+
+    Tracks an estimated token count per message and, once the budget is
+    exceeded, compacts the conversation oldest-first:
+      1. Old tool_result payloads are replaced by a short stub (policy text first).
+      2. If that is not enough, whole old turns are dropped.
+    tool_result blocks are never removed on their own, so every tool_use
+    in the history keeps its matching tool_result.
+    """
+
+    __slots__ = ("token_budget", "keep_chars", "token_counts")
+
+    def __init__(self, token_budget, keep_chars=200):
+        self.token_budget = token_budget
+        self.keep_chars = keep_chars
+        self.token_counts = []  # aligned with the messages list
+
+    # ---------------------------------------------------------
+    # Token accounting
+    # ---------------------------------------------------------
+    @staticmethod
+    def estimate_tokens(message):
+        content = message["content"]
+        if isinstance(content, str):
+            return len(content) // CHARS_PER_TOKEN + 1
+        blocks = [b if isinstance(b, dict) else b.model_dump(exclude_none=True) for b in content]
+        return len(json.dumps(blocks, default=str)) // CHARS_PER_TOKEN + 1
+
+    def total_tokens(self, messages):
+        if len(self.token_counts) > len(messages):
+            # History was replaced from outside; recount everything
+            self.token_counts = []
+        for message in messages[len(self.token_counts):]:
+            self.token_counts.append(self.estimate_tokens(message))
+        return sum(self.token_counts)
+
+    # ---------------------------------------------------------
+    # Compaction
+    # ---------------------------------------------------------
+    def compact(self, messages):
+        """Compacts `messages` in place until it fits the budget."""
+        total = self.total_tokens(messages)
+        if total <= self.token_budget:
+            return
+
+        logger.info(f"HISTORY: {total} tokens over budget {self.token_budget}, compacting.")
+
+        # The newest message is what Claude has to act on now: never touch it
+        tool_names = self._tool_names_by_id(messages)
+        candidates = []
+        for i, message in enumerate(messages[:-1]):
+            if message["role"] != "user" or isinstance(message["content"], str):
+                continue
+            for block in message["content"]:
+                if block.get("type") == "tool_result" and not block["content"].startswith(COMPACTED_PREFIX):
+                    name = tool_names.get(block["tool_use_id"])
+                    candidates.append((name not in COMPACT_FIRST, i, block, name))
+
+        # Policy results first, then everything else, oldest first within each group
+        for _, i, block, name in sorted(candidates, key=lambda c: (c[0], c[1])):
+            block["content"] = self._summarize(name, block["content"])
+            self.token_counts[i] = self.estimate_tokens(messages[i])
+            total = sum(self.token_counts)
+            if total <= self.token_budget:
+                logger.info(f"HISTORY: compacted tool results, now {total} tokens.")
+                return
+
+        # Still too big: drop whole turns from the front. A turn starts at a
+        # plain-text user message, so cutting there never orphans a tool_result.
+        while total > self.token_budget:
+            cut = self._next_turn_start(messages)
+            if cut is None:
+                break
+            del messages[:cut]
+            del self.token_counts[:cut]
+            total = sum(self.token_counts)
+            logger.info(f"HISTORY: dropped oldest turn ({cut} messages), now {total} tokens.")
+
+    def _summarize(self, tool_name, content):
+        if tool_name in COMPACT_FIRST:
+            return json.dumps({
+                "compacted": True,
+                "note": f"Earlier '{tool_name}' output removed to save space. Call the tool again if needed."
+            })
+        if len(content) <= self.keep_chars + len(COMPACTED_PREFIX):
+            return content
+        return json.dumps({"compacted": True, "summary": content[:self.keep_chars] + "..."})
+
+    @staticmethod
+    def _tool_names_by_id(messages):
+        names = {}
+        for message in messages:
+            if message["role"] != "assistant" or isinstance(message["content"], str):
+                continue
+            for block in message["content"]:
+                block_type = block.get("type") if isinstance(block, dict) else block.type
+                if block_type == "tool_use":
+                    if isinstance(block, dict):
+                        names[block["id"]] = block["name"]
+                    else:
+                        names[block.id] = block.name
+        return names
+
+    @staticmethod
+    def _next_turn_start(messages):
+        """Index of the second turn's opening user message (None if only one turn is left)."""
+        for i in range(1, len(messages)):
+            if messages[i]["role"] == "user" and isinstance(messages[i]["content"], str):
+                return i
+        return None
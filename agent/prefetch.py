@@ -0,0 +1,120 @@
+import asyncio
+import contextvars
+import logging
+from concurrent.futures import Future
+
+from agent.fast_path import ORDER_ID
+from services.services import EnterpriseServices
+from tools.tools import item_names, registry
+
+logger = logging.getLogger("Prefetch")
+
+# ---------------------------------------------------------
+# Speculative tool calls, started while the turn's first Claude call is in flight.
+# The SOP makes `look_up_order` and the returns policy mandatory for any order
+# query, so when the message names an order both are fetched up front. When
+# Claude then asks for exactly that call, the result (or the running call) is
+# served instead of starting a new one: one tool round-trip less on the
+# critical path. A policy call with `items` (the SOP asks for them once the
+# order is known) is answered from the prefetched document: the rules for
+# those items are picked out of the compiled policy locally.
+# Unused results are simply dropped at the end of the turn.
+# ---------------------------------------------------------
+
+
+def plan(user_input, max_orders=3):
+    """The (tool name, input) calls worth starting for this message: none unless it names an order."""
+    order_ids = sorted({m.upper() for m in ORDER_ID.findall(user_input)})[:max_orders]
+    if not order_ids:
+        return []
+    calls = [("look_up_order", {"order_id": order_id}) for order_id in order_ids]
+    calls.append(("get_policy_info", {"policy_type": "returns"}))
+    return calls
+
+
+def call_key(name, tool_input):
+    """Identifies a call by tool and arguments, defaults filled in ({"items": ""} == no items). None if invalid."""
+    tool = registry.get(name)
+    if tool is None or not isinstance(tool_input, dict):
+        return None
+    try:
+        bound = tool.signature.bind(**tool_input)
+    except TypeError:
+        return None
+    bound.apply_defaults()
+    return name, tuple(sorted((k, repr(v)) for k, v in bound.arguments.items()))
+
+
+class Prefetch:
+    """One turn's speculative calls, each served at most once to a matching tool_use block."""
+
+    def __init__(self, executor, calls):
+        # Started in a copy of the caller's context: spans nest under the turn, session id carries over
+        self._futures = {}
+        for name, tool_input in calls:
+            key = call_key(name, tool_input)
+            if key and key not in self._futures:
+                self._futures[key] = executor.submit(contextvars.copy_context().run, registry.call, name, tool_input)
+                logger.info(f"PREFETCH: Started '{name}' with input {tool_input}")
+        self.served = 0
+
+    def take(self, name, tool_input):
+        """
+        The prefetched future for this exact call (removed, so a repeat call runs fresh),
+        one derived from the prefetched policy document for a call with `items`, or None.
+        """
+        future = self._futures.pop(call_key(name, tool_input), None)
+        if future is None:
+            future = self._narrow(name, tool_input)
+        if future is not None:
+            self.served += 1
+            logger.info(f"PREFETCH: Serving '{name}' with input {tool_input} from prefetch")
+        return future
+
+    def _narrow(self, name, tool_input):
+        """get_policy_info with `items`, answered from the prefetched whole document (left for a later exact call)."""
+        if name != "get_policy_info" or not isinstance(tool_input, dict) or not isinstance(tool_input.get("items"), str):
+            return None
+        names = item_names(tool_input["items"])
+        document = self._futures.get(call_key(name, {**tool_input, "items": ""}))
+        if not names or document is None:
+            return None
+
+        narrowed = Future()
+
+        def done(future):
+            if future.cancelled():
+                narrowed.cancel()  # discarded with the rest of the prefetch
+                return
+            if not narrowed.set_running_or_notify_cancel():
+                return
+            if future.exception() is not None:
+                narrowed.set_exception(future.exception())
+            elif "error" in future.result():
+                narrowed.set_result(future.result())  # the document itself failed: so would this call
+            else:
+                # Same answer the tool gives: the compiled rules for the items, or the whole document
+                relevant = EnterpriseServices.relevant_policy(tool_input["policy_type"], names)
+                narrowed.set_result(future.result() if relevant is None else relevant)
+
+        document.add_done_callback(done)
+        return narrowed
+
+    def discard(self):
+        """Drops what is left, e.g. once a refund may have changed the order."""
+        for future in self._futures.values():
+            future.cancel()  # not started yet: skip it; already running: finishes, result unused
+        self._futures.clear()
+
+    @staticmethod
+    async def await_result(name, future):
+        """Async wait for a prefetched call, bounded by the tool's timeout."""
+        tool = registry.get(name)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), tool.timeout if tool else None)
+        except asyncio.TimeoutError:
+            return registry.timeout_error(name)
+
+
+# Nothing to serve (prefetch off, batch mode, turn answered without tools)
+NO_PREFETCH = Prefetch(None, [])
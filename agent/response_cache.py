@@ -0,0 +1,170 @@
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from agent.fast_path import ORDER_ID
+from services.policy_index import singular
+from tools.tools import registry
+
+logger = logging.getLogger("Response Cache")
+
+# Tools whose output is static policy text. A turn that used any other tool
+# (order lookup, refunds, escalations) depended on live state. check_precedents
+# is cacheable for its input but its cases are about specific orders, and an
+# answer built on them is not a generic one.
+POLICY_TOOLS = frozenset(name for name, tool in registry.tools.items() if tool.cacheable) - {"check_precedents"}
+
+CONTRACTIONS = [(re.compile(p), r) for p, r in (
+    (r"n't\b", " not"), (r"'s\b", " is"), (r"'re\b", " are"), (r"'m\b", " am"), (r"'ve\b", " have"), (r"'ll\b", " will"),
+)]
+NON_WORD = re.compile(r"[^a-z0-9 ]+")
+
+# Filler that doesn't change what is being asked ("hi, what's your return window please?")
+STOPWORDS = frozenset("""
+    a an the is are am was were be been do does did can could would will should may might
+    i me my mine you your yours we us our it its this that these those there here
+    of to for on in at by with about from as and or so if just also please pls
+    hi hello hey thanks thank thx ok okay tell know like want wanted need wondering
+    have has get got any some
+""".split())
+
+
+def normalize(text):
+    """Lowercase, contractions expanded, punctuation dropped, whitespace collapsed."""
+    text = text.lower().replace("’", "'")
+    for pattern, replacement in CONTRACTIONS:
+        text = pattern.sub(replacement, text)
+    return " ".join(NON_WORD.sub(" ", text).split())
+
+
+def trigrams(text):
+    padded = f" {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def similarity(a, b):
+    """Jaccard similarity of two trigram sets."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def key_words(text):
+    return frozenset(singular(w) for w in normalize(text).split() if w not in STOPWORDS)
+
+
+def cache_key(words):
+    """The question's key words in a fixed order: word order and filler don't change the key."""
+    return " ".join(sorted(words))
+
+
+class _Entry:
+    __slots__ = ("answer", "grams", "words", "word_grams", "policies", "created")
+
+    def __init__(self, answer, grams, words, policies):
+        self.answer = answer
+        self.grams = grams
+        self.words = words
+        self.word_grams = {w: trigrams(w) for w in words}
+        self.policies = policies
+        self.created = time.monotonic()
+
+
+class ResponseCache:
+    """
+    Answers to policy-only questions, reused for repeats of the same question.
+
+    Questions are keyed by their key words: normalized, singular, filler
+    dropped, sorted ("What's your return window?" and "hi, the window for
+    returns?" share a key). Otherwise a question matches a cached one when the
+    character trigrams of their keys are at least `min_similarity` alike
+    (Jaccard) and every key word on either side has a close counterpart on the
+    other: typos are tolerated, an extra word such as "opened" is not.
+
+    Only first-turn answers that used nothing but policy documents are stored,
+    so a cached answer never depends on an order or on earlier conversation.
+    Entries expire after `ttl_seconds`, the least recently used are evicted
+    beyond `max_entries`, and `invalidate(policy_type)` drops every answer
+    built from that policy (wired to PolicyCache.on_change).
+    """
+
+    def __init__(self, ttl_seconds=3600, max_entries=512, min_similarity=0.75, word_similarity=0.5):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.min_similarity = min_similarity
+        self.word_similarity = word_similarity
+
+        self._entries = OrderedDict()  # cache key -> _Entry
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def eligible(user_input):
+        """Questions about a specific order are never served from (or stored in) the cache."""
+        return not ORDER_ID.search(user_input)
+
+    def get(self, user_input):
+        """Returns a cached answer for the question, or None."""
+        words = key_words(user_input)
+        key = cache_key(words)
+        if not key:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            score = 1.0
+            if entry is None:
+                entry, score, key = self._closest(trigrams(key), words)
+            if entry is None:
+                return None
+            if now - entry.created >= self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+
+        logger.info(f"FAQ CACHE: HIT for '{user_input}' (matched '{key}', similarity {score:.2f}), no model call.")
+        return entry.answer
+
+    def _closest(self, grams, words):
+        # Called with self._lock held. Linear scan: max_entries is small and the sets are precomputed.
+        best, best_score, best_key = None, self.min_similarity, None
+        for key, entry in self._entries.items():
+            score = similarity(grams, entry.grams)
+            if score >= best_score and self._same_words(words, entry):
+                best, best_score, best_key = entry, score, key
+        return best, best_score, best_key
+
+    def _same_words(self, words, entry):
+        if words == entry.words:
+            return True
+        if len(words) != len(entry.words):
+            return False
+        grams = {w: trigrams(w) for w in words}
+        return (all(any(similarity(g, eg) >= self.word_similarity for eg in entry.word_grams.values()) for g in grams.values())
+                and all(any(similarity(eg, g) >= self.word_similarity for g in grams.values()) for eg in entry.word_grams.values()))
+
+    def put(self, user_input, answer, policies):
+        """Stores the answer to a policy-only question. `policies` are the policy types it was built from."""
+        words = key_words(user_input)
+        key = cache_key(words)
+        if not key:
+            return
+        with self._lock:
+            self._entries[key] = _Entry(answer, trigrams(key), words, frozenset(policies))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        logger.info(f"FAQ CACHE: Stored answer for '{key}' (policies: {', '.join(sorted(policies))})")
+
+    def invalidate(self, policy_type=None):
+        """Drops the answers built from `policy_type` (all answers if None)."""
+        with self._lock:
+            stale = [k for k, e in self._entries.items() if policy_type is None or policy_type in e.policies]
+            for key in stale:
+                del self._entries[key]
+        if stale:
+            logger.info(f"FAQ CACHE: Invalidated {len(stale)} answer(s) after '{policy_type}' policy change")
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,360 @@
+import asyncio
+import contextlib
+import logging
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+
+from observability import telemetry
+
+logger = logging.getLogger("Scheduler")
+
+# Priorities (lower is served first)
+URGENT, NORMAL = 0, 1
+
+# Customers who are upset or asking for a person: their turns jump the queue
+URGENT_WORDS = re.compile(
+    r"\b(angry|furious|livid|upset|scam|ridiculous|unacceptable|outrageous|lawyer|sue|"
+    r"complaint|manager|supervisor|human)\b",
+    re.IGNORECASE,
+)
+
+# Budgets tracked from the response headers: anthropic-ratelimit-{name}-{limit|remaining|reset}
+BUDGETS = ("requests", "input-tokens", "output-tokens")
+
+
+class _Budget:
+    """
+    One rate limit as last reported by the API. The API refills its buckets
+    continuously (limit per minute), so between responses the local estimate
+    refills at the same rate and is charged for every call sent.
+    """
+    __slots__ = ("limit", "remaining", "updated", "reset_at")
+
+    def __init__(self, limit, remaining, updated, reset_at):
+        self.limit = limit
+        self.remaining = remaining
+        self.updated = updated
+        self.reset_at = reset_at
+
+    def available(self, now):
+        if self.limit:
+            return min(self.limit, self.remaining + self.limit / 60 * (now - self.updated))
+        return self.remaining if now < self.reset_at else float("inf")
+
+    def wait(self, need, now):
+        """Seconds until `need` is available (0 if it is now)."""
+        missing = min(need, self.limit or need) - self.available(now)
+        if missing <= 0:
+            return 0.0
+        return missing / (self.limit / 60) if self.limit else max(0.0, self.reset_at - now)
+
+    def charge(self, amount, now):
+        self.remaining = self.available(now) - amount
+        self.updated = now
+
+
+class _Waiter:
+    """A queued call; once granted, the ticket its caller hands back to `release`."""
+    __slots__ = ("session_id", "priority", "cost", "wake", "granted", "queued_at", "granted_at", "charged")
+
+    def __init__(self, session_id, priority, cost, wake):
+        self.session_id = session_id
+        self.priority = priority
+        self.cost = cost
+        self.wake = wake
+        self.granted = False
+        self.queued_at = time.monotonic()
+        self.granted_at = None
+        self.charged = None  # the scheduler's running charge totals when this call was granted
+
+    @property
+    def queued_ms(self):
+        return (self.granted_at - self.queued_at) * 1000
+
+
+def _header_number(headers, name):
+    try:
+        return float(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+
+def _seconds_until(timestamp):
+    """RFC 3339 reset time -> seconds from now (None if missing / unparseable)."""
+    try:
+        reset = datetime.fromisoformat(timestamp.replace("Z", "+00:00"))
+    except (AttributeError, ValueError):
+        return None
+    return max(0.0, (reset - datetime.now(timezone.utc)).total_seconds())
+
+
+def _retryable(error):
+    """Rate limits, overload / server errors and connection failures are worth another try."""
+    import anthropic  # already loaded by the time a call has failed
+    if isinstance(error, anthropic.APIConnectionError):
+        return True
+    status = getattr(error, "status_code", None)
+    return status is not None and (status == 429 or status >= 500)
+
+
+def _error_headers(error):
+    return getattr(getattr(error, "response", None), "headers", None)
+
+
+class RequestScheduler:
+    """
+    Process-wide admission control for Messages API calls.
+
+    Every call waits for a slot before it is sent:
+      - at most `max_concurrency` calls are in flight;
+      - the request / input token / output token budgets reported in the
+        `anthropic-ratelimit-*` response headers must cover the call's
+        estimated cost (they refill continuously between responses);
+      - after a 429, everything pauses for the `retry-after` the API asked for.
+    Waiting calls are served by priority (URGENT before NORMAL), and within a
+    priority round-robin across sessions, so one long conversation can't
+    starve the others. Failed calls that are worth retrying (see
+    `_retryable`) are re-queued after a jittered exponential backoff.
+
+    Sync callers (`call`) block their thread; async callers (`acall`,
+    `astream`) await without holding a thread.
+    """
+
+    def __init__(self, max_concurrency=16, max_retries=4, base_delay=0.5, max_delay=20.0):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self._lock = threading.Lock()
+        self._queues = (OrderedDict(), OrderedDict())  # by priority: session id -> deque of waiters
+        self._in_flight = 0
+        self._probing = True
+        self._budgets = {}  # name -> _Budget
+        self._charged = {}  # name -> total cost of every call granted so far
+        self._paused_until = 0.0
+        self._timer = None  # re-dispatches once budgets have refilled
+        self.stats = {"calls": 0, "retries": 0, "rate_limited": 0, "failed": 0}
+
+    # ---------------------------------------------------------
+    # Calls
+    # ---------------------------------------------------------
+    def call(self, send, session_id, priority=NORMAL, cost=None):
+        """
+        Sends `send()` (a `with_raw_response` call) when a slot is free, retrying
+        failures worth retrying. Returns the parsed response.
+        """
+        for attempt in range(self.max_retries + 1):
+            ticket = self.acquire(session_id, priority, cost)
+            try:
+                raw = send()
+            except BaseException as e:
+                self.release(ticket, _error_headers(e), e)
+                delay = self._retry_delay(e, attempt) if isinstance(e, Exception) else None
+                if delay is None:
+                    raise
+                time.sleep(delay)
+                continue
+            self.release(ticket, raw.headers)
+            self._annotate(ticket, attempt)
+            return raw.parse()
+
+    async def acall(self, send, session_id, priority=NORMAL, cost=None):
+        """Async `call`: `send()` returns an awaitable raw response."""
+        for attempt in range(self.max_retries + 1):
+            ticket = await self.aacquire(session_id, priority, cost)
+            try:
+                raw = await send()
+            except BaseException as e:
+                self.release(ticket, _error_headers(e), e)
+                delay = self._retry_delay(e, attempt) if isinstance(e, Exception) else None
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self.release(ticket, raw.headers)
+            self._annotate(ticket, attempt)
+            return raw.parse()
+
+    @contextlib.asynccontextmanager
+    async def astream(self, open_stream, session_id, priority=NORMAL, cost=None):
+        """
+        Opens `open_stream()` (a `messages.stream(...)` manager) when a slot is free and holds
+        the slot until the stream is closed. Only opening is retried: once events have
+        been yielded to the caller, a retry would repeat them.
+        """
+        for attempt in range(self.max_retries + 1):
+            ticket = await self.aacquire(session_id, priority, cost)
+            manager = open_stream()
+            try:
+                stream = await manager.__aenter__()
+            except BaseException as e:
+                self.release(ticket, _error_headers(e), e)
+                delay = self._retry_delay(e, attempt) if isinstance(e, Exception) else None
+                if delay is None:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+            self._annotate(ticket, attempt)
+            try:
+                yield stream
+            finally:
+                await manager.__aexit__(None, None, None)
+                self.release(ticket, stream.response.headers)
+            return
+
+    def _retry_delay(self, error, attempt):
+        """Seconds to wait before retrying `error`, or None if it should be raised."""
+        if not _retryable(error) or attempt >= self.max_retries:
+            with self._lock:
+                self.stats["failed"] += 1
+            return None
+        # Full jitter: concurrent callers that failed together don't retry together
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        retry_after = _header_number(_error_headers(error) or {}, "retry-after")
+        if retry_after is not None:
+            delay = max(delay, min(retry_after, self.max_delay))
+        with self._lock:
+            self.stats["retries"] += 1
+        logger.warning(f"SCHEDULER: Messages API call failed ({getattr(error, 'status_code', type(error).__name__)}), "
+                       f"retry {attempt + 1}/{self.max_retries} in {delay:.2f}s")
+        return delay
+
+    @staticmethod
+    def _annotate(ticket, attempt):
+        telemetry.current_span().set_attributes({
+            "scheduler.priority": "urgent" if ticket.priority == URGENT else "normal",
+            "scheduler.attempts": attempt + 1,
+            "scheduler.queued_ms": ticket.queued_ms,
+        })
+
+    # ---------------------------------------------------------
+    # Slots
+    # ---------------------------------------------------------
+    def acquire(self, session_id, priority=NORMAL, cost=None):
+        """Blocks until the call may be sent. Returns the ticket to `release` once it is done."""
+        granted = threading.Event()
+        waiter = _Waiter(session_id, priority, cost or {}, granted.set)
+        self._enqueue(waiter)
+        granted.wait()
+        return waiter
+
+    async def aacquire(self, session_id, priority=NORMAL, cost=None):
+        """Async `acquire`."""
+        loop = asyncio.get_running_loop()
+        granted = loop.create_future()
+
+        def wake():
+            loop.call_soon_threadsafe(lambda: granted.done() or granted.set_result(None))
+
+        waiter = _Waiter(session_id, priority, cost or {}, wake)
+        self._enqueue(waiter)
+        try:
+            await granted
+        except asyncio.CancelledError:
+            self._cancel(waiter)
+            raise
+        return waiter
+
+    def release(self, ticket, headers=None, error=None):
+        """Frees the call's slot and updates the budgets from its response (or error) headers."""
+        with self._lock:
+            self._in_flight -= 1
+            self._probing = False
+            self.stats["calls"] += 1
+            if headers is not None:
+                self._update_budgets(ticket, headers)
+            if getattr(error, "status_code", None) == 429:
+                self.stats["rate_limited"] += 1
+                retry_after = _header_number(headers or {}, "retry-after") or self.base_delay
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+                logger.warning(f"SCHEDULER: Rate limited, pausing new calls for {retry_after:.2f}s")
+            self._dispatch()
+
+    def _enqueue(self, waiter):
+        with self._lock:
+            self._queues[waiter.priority].setdefault(waiter.session_id, deque()).append(waiter)
+            self._dispatch()
+
+    def _cancel(self, waiter):
+        with self._lock:
+            if not waiter.granted:
+                sessions = self._queues[waiter.priority]
+                waiting = sessions.get(waiter.session_id)
+                if waiting and waiter in waiting:
+                    waiting.remove(waiter)
+                    if not waiting:
+                        del sessions[waiter.session_id]
+                return
+        self.release(waiter)  # granted, but the caller is gone: give the slot back
+
+    # ---------------------------------------------------------
+    # Dispatch (called with self._lock held)
+    # ---------------------------------------------------------
+    def _dispatch(self):
+        # Until a first response reports the budgets, send one call at a time
+        while self._in_flight < (1 if self._probing else self.max_concurrency):
+            sessions = next((q for q in self._queues if q), None)
+            if sessions is None:
+                return
+            session_id, waiting = next(iter(sessions.items()))
+            waiter = waiting[0]
+
+            now = time.monotonic()
+            wait = max([self._paused_until - now] + [b.wait(waiter.cost.get(name, 0), now)
+                                                     for name, b in self._budgets.items()])
+            if wait > 0:
+                self._wake_in(wait)
+                return
+
+            # Round-robin: the session goes to the back of its priority's line
+            waiting.popleft()
+            if waiting:
+                sessions.move_to_end(session_id)
+            else:
+                del sessions[session_id]
+            for name, amount in waiter.cost.items():
+                self._charged[name] = self._charged.get(name, 0) + amount
+                if name in self._budgets:
+                    self._budgets[name].charge(amount, now)
+            self._in_flight += 1
+            waiter.granted, waiter.granted_at, waiter.charged = True, now, dict(self._charged)
+            waiter.wake()
+
+    def _wake_in(self, seconds):
+        if self._timer is not None and self._timer.is_alive():
+            return  # a dispatch is already due; releases also dispatch in between
+        self._timer = threading.Timer(seconds, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _on_timer(self):
+        with self._lock:
+            self._timer = None
+            self._dispatch()
+
+    def _update_budgets(self, ticket, headers):
+        """
+        The headers describe the budgets when `ticket`'s call reached the API. Calls granted
+        since then are charged again (the API may not have seen them yet), and refilling
+        counts from when the call was sent. Concurrent calls can reach the API in a different
+        order than they were granted, so a report only ever lowers the local estimate
+        (the refill raises it again).
+        """
+        now = time.monotonic()
+        for name in BUDGETS:
+            remaining = _header_number(headers, f"anthropic-ratelimit-{name}-remaining")
+            if remaining is None:
+                continue
+            limit = _header_number(headers, f"anthropic-ratelimit-{name}-limit")
+            reset_in = _seconds_until(headers.get(f"anthropic-ratelimit-{name}-reset"))
+            sent_since = self._charged.get(name, 0) - (ticket.charged or {}).get(name, 0)
+            reported = _Budget(limit, remaining - sent_since, ticket.granted_at or now,
+                               now + (reset_in if reset_in is not None else 60.0))
+            current = self._budgets.get(name)
+            if current is None or current.limit != limit or reported.available(now) < current.available(now):
+                self._budgets[name] = reported
@@ -0,0 +1,189 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+logger = logging.getLogger("SessionStore")
+
+
+class SessionConflict(Exception):
+    """The session was saved by another turn since it was loaded (turns of one session must not overlap)."""
+
+
+def _to_json(block):
+    # Assistant turns hold SDK content blocks (TextBlock, ToolUseBlock); store them as API dicts
+    return block.model_dump(exclude_none=True)
+
+
+def serialize_state(state):
+    return json.dumps(state, default=_to_json, separators=(",", ":"))
+
+
+def deserialize_state(data):
+    state = json.loads(data)
+    # Rows written before the session state had more than the history
+    return {"messages": state} if isinstance(state, list) else state
+
+
+class SessionStore(ABC):
+    """
+    Where session state (`SupportAgent.session_state()`: the history and the
+    flags that outlive a turn) lives between turns. With an external store,
+    any worker process can serve any session's next turn.
+
+    Every save bumps the session's version. `save` takes the version `load`
+    returned and raises SessionConflict if another turn saved in between, so
+    overlapping turns fail loudly instead of silently dropping history.
+    Sessions not saved for `ttl_seconds` expire (None: never).
+    """
+
+    def __init__(self, ttl_seconds=None):
+        self.ttl_seconds = ttl_seconds
+
+    @abstractmethod
+    def load(self, session_id):
+        """(state, version) for the session, or ({}, 0) for a new (or expired) one."""
+
+    @abstractmethod
+    def save(self, session_id, state, version):
+        """Stores the state if the session is still at `version`. Returns the new version."""
+
+    @abstractmethod
+    def delete(self, session_id):
+        """Removes the session (no-op if it does not exist)."""
+
+    @abstractmethod
+    def purge_expired(self):
+        """Deletes sessions older than the TTL. Returns how many were removed."""
+
+    def _expired(self, updated_at, now=None):
+        return self.ttl_seconds is not None and updated_at < (now or time.time()) - self.ttl_seconds
+
+
+class InMemorySessionStore(SessionStore):
+    """Single-process store (the default when no SESSION_STORE is configured)."""
+
+    def __init__(self, ttl_seconds=None):
+        super().__init__(ttl_seconds)
+        self._sessions = {}  # session id -> (data, version, updated_at)
+        self._lock = threading.Lock()
+
+    def load(self, session_id):
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return {}, 0
+        data, version, updated_at = entry
+        return ({}, version) if self._expired(updated_at) else (deserialize_state(data), version)
+
+    def save(self, session_id, state, version):
+        data = serialize_state(state)
+        with self._lock:
+            current = self._sessions.get(session_id, (None, 0, None))[1]
+            if current != version:
+                raise SessionConflict(f"Session {session_id} is at version {current}, not {version}")
+            self._sessions[session_id] = (data, version + 1, time.time())
+        return version + 1
+
+    def delete(self, session_id):
+        self._sessions.pop(session_id, None)
+
+    def purge_expired(self):
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, (_, _, updated_at) in self._sessions.items() if self._expired(updated_at, now)]
+            for session_id in expired:
+                del self._sessions[session_id]
+        return len(expired)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions as JSON rows in a local SQLite file, shared by the worker
+    processes on one host. Each process opens its own connection (WAL mode
+    lets readers and the single writer proceed side by side).
+    """
+
+    def __init__(self, db_path, ttl_seconds=None):
+        super().__init__(ttl_seconds)
+        self.db_path = db_path
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        # Called with self._lock held. Connections must not cross a fork.
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "id TEXT PRIMARY KEY, messages TEXT NOT NULL, updated_at REAL NOT NULL, "
+                "version INTEGER NOT NULL DEFAULT 0)"
+            )
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(sessions)")}
+            if "version" not in columns:  # store created before versioning
+                conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def load(self, session_id):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT messages, version, updated_at FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        if row is None:
+            return {}, 0
+        data, version, updated_at = row
+        return ({}, version) if self._expired(updated_at) else (deserialize_state(data), version)
+
+    def save(self, session_id, state, version):
+        data = serialize_state(state)
+        with self._lock:
+            conn = self._connection()
+            if version == 0:
+                saved = conn.execute(
+                    "INSERT INTO sessions (id, messages, updated_at, version) VALUES (?, ?, ?, 1) "
+                    "ON CONFLICT (id) DO NOTHING",
+                    (session_id, data, time.time()),
+                ).rowcount
+            else:
+                saved = conn.execute(
+                    "UPDATE sessions SET messages = ?, updated_at = ?, version = version + 1 "
+                    "WHERE id = ? AND version = ?",
+                    (data, time.time(), session_id, version),
+                ).rowcount
+        if not saved:
+            raise SessionConflict(f"Session {session_id} was saved by another turn since version {version}")
+        return version + 1
+
+    def delete(self, session_id):
+        with self._lock:
+            self._connection().execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def purge_expired(self):
+        if self.ttl_seconds is None:
+            return 0
+        with self._lock:
+            return self._connection().execute(
+                "DELETE FROM sessions WHERE updated_at < ?", (time.time() - self.ttl_seconds,)).rowcount
+
+
+def create_session_store(url, ttl_seconds=None):
+    """
+    Builds a store from a SESSION_STORE url:
+      memory              -> InMemorySessionStore
+      sqlite:///path.db   -> SQLiteSessionStore (relative paths resolve from the project root)
+    """
+    if not url or url == "memory":
+        return InMemorySessionStore(ttl_seconds)
+    if url.startswith("sqlite:///"):
+        path = url[len("sqlite:///"):]
+        if not os.path.isabs(path):
+            path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), path)
+        return SQLiteSessionStore(path, ttl_seconds)
+    raise ValueError(f"Unsupported SESSION_STORE '{url}' (use 'memory' or 'sqlite:///path')")
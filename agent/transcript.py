@@ -0,0 +1,109 @@
+import json
+import sys
+
+# ---------------------------------------------------------
+# Compact form of a conversation history, for sessions between turns.
+# During a turn the agent works on plain API message dicts (plus the SDK
+# content blocks Claude returned). Once the turn ends, the history is packed
+# into __slots__ records: no per-message dicts, no pydantic objects, and
+# tool payloads (inputs and results) stored as interned JSON strings, so the
+# identical policy text fetched by a thousand sessions is held once.
+# `unpack` rebuilds the dicts when the session's next turn starts.
+# ---------------------------------------------------------
+
+
+def _intern(text):
+    # sys.intern'ed strings are freed once no session holds them any more
+    return sys.intern(text) if isinstance(text, str) else text
+
+
+def _compact_json(value):
+    return _intern(json.dumps(value, separators=(",", ":"), default=str))
+
+
+class _Text:
+    __slots__ = ("text",)
+
+    def __init__(self, text):
+        self.text = text
+
+    def to_dict(self):
+        return {"type": "text", "text": self.text}
+
+
+class _ToolUse:
+    __slots__ = ("id", "name", "input")
+
+    def __init__(self, id, name, input):
+        self.id = id
+        self.name = _intern(name)
+        self.input = _compact_json(input)
+
+    def to_dict(self):
+        return {"type": "tool_use", "id": self.id, "name": self.name, "input": json.loads(self.input)}
+
+
+class _ToolResult:
+    __slots__ = ("tool_use_id", "content", "is_error")
+
+    def __init__(self, tool_use_id, content, is_error=None):
+        self.tool_use_id = tool_use_id
+        self.content = _intern(content)  # the tool output as JSON text (see SupportAgent._tool_result)
+        self.is_error = is_error
+
+    def to_dict(self):
+        block = {"type": "tool_result", "tool_use_id": self.tool_use_id, "content": self.content}
+        if self.is_error is not None:
+            block["is_error"] = self.is_error
+        return block
+
+
+class _Block:
+    """Any other content block, as compact JSON."""
+    __slots__ = ("json",)
+
+    def __init__(self, block):
+        self.json = _compact_json(block)
+
+    def to_dict(self):
+        return json.loads(self.json)
+
+
+class _Message:
+    __slots__ = ("role", "content")  # content: str, or a tuple of blocks
+
+    def __init__(self, role, content):
+        self.role = _intern(role)
+        self.content = content
+
+    def to_dict(self):
+        if isinstance(self.content, str):
+            return {"role": self.role, "content": self.content}
+        return {"role": self.role, "content": [block.to_dict() for block in self.content]}
+
+
+def _pack_block(block):
+    if not isinstance(block, dict):
+        block = block.model_dump(exclude_none=True)  # SDK content block (TextBlock, ToolUseBlock)
+    kind, keys = block.get("type"), set(block)
+    if kind == "text" and keys == {"type", "text"}:
+        return _Text(block["text"])
+    if kind == "tool_use" and keys == {"type", "id", "name", "input"}:
+        return _ToolUse(block["id"], block["name"], block["input"])
+    if kind == "tool_result" and keys <= {"type", "tool_use_id", "content", "is_error"} and isinstance(
+            block.get("content"), str):
+        return _ToolResult(block["tool_use_id"], block["content"], block.get("is_error"))
+    return _Block(block)
+
+
+def pack(messages):
+    """The history as a tuple of compact records."""
+    return tuple(
+        _Message(m["role"], m["content"] if isinstance(m["content"], str) else tuple(map(_pack_block, m["content"])))
+        for m in messages
+    )
+
+
+def unpack(records):
+    """API message dicts from `pack`'s records."""
+    return [record.to_dict() for record in records]
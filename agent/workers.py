@@ -0,0 +1,182 @@
+"""
+Multi-process deployment mode (WORKERS > 0).
+
+The Chainlit process only routes messages. N worker processes run the agent
+turns, each with its own event loop serving up to WORKER_CONCURRENCY turns
+at a time. Workers share nothing in memory:
+  - session state (history, URGENT flag) lives in the session store (SESSION_STORE),
+    loaded before and saved after every turn, so any worker can serve any session;
+  - turns of one session run one at a time: the front-end queues a session's
+    next turn until the previous one finished, and the store's version check
+    rejects a save that would overwrite another turn's;
+  - sessions idle for SESSION_TTL_SECONDS are purged by the workers;
+  - each worker opens the Kùzu graph read-only, so they don't lock each other out.
+
+Importing this module must not import services/ (or anything that opens
+the graph): the front-end process never touches the database.
+"""
+import asyncio
+import atexit
+import itertools
+import logging
+import multiprocessing
+import threading
+import weakref
+
+from config import Config
+
+logger = logging.getLogger("Workers")
+
+_STOP = None  # sentinel on the request queue
+PURGE_INTERVAL = 3600.0  # seconds between expired-session sweeps in each worker
+
+
+class WorkerPool:
+    """Front-end side: hands turns to the worker processes and relays their events."""
+
+    def __init__(self, workers, store_url, concurrency=16):
+        if not store_url or store_url == "memory":
+            raise ValueError("Worker mode needs a shared SESSION_STORE (e.g. sqlite:///data/sessions.sqlite3).")
+
+        ctx = multiprocessing.get_context("spawn")  # fresh interpreters: no inherited DB handles or threads
+        self._requests = ctx.Queue()
+        self._events = ctx.Queue()
+        self._ids = itertools.count()
+        self._pending = {}  # request id -> (event loop, asyncio.Queue)
+        self._lock = threading.Lock()
+        self._session_locks = weakref.WeakValueDictionary()  # session id -> asyncio.Lock, while a turn holds it
+
+        self.processes = [
+            ctx.Process(target=_worker_main, args=(i, store_url, concurrency, self._requests, self._events),
+                        name=f"agent-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for process in self.processes:
+            process.start()
+        threading.Thread(target=self._relay, name="worker-events", daemon=True).start()
+        atexit.register(self.close)
+        logger.info(f"WORKERS: Started {workers} worker processes ({concurrency} turns each)")
+
+    async def astream(self, session_id, user_input):
+        """
+        Same events as `SupportAgent.astream`, produced by whichever worker picks the turn up.
+        A session's turns are dispatched one at a time, in the order they arrive.
+        """
+        session_lock = self._session_locks.setdefault(session_id, asyncio.Lock())
+        async with session_lock:
+            request_id = next(self._ids)
+            events = asyncio.Queue()
+            with self._lock:
+                self._pending[request_id] = (asyncio.get_running_loop(), events)
+            try:
+                self._requests.put((request_id, session_id, user_input))
+                while True:
+                    event = await events.get()
+                    if event["type"] == "error":
+                        raise RuntimeError(f"Worker failed to run the turn: {event['error']}")
+                    yield event
+                    if event["type"] == "final":
+                        return
+            finally:
+                with self._lock:
+                    self._pending.pop(request_id, None)
+
+    async def arun(self, session_id, user_input):
+        async for event in self.astream(session_id, user_input):
+            if event["type"] == "final":
+                return event["text"]
+
+    def _relay(self):
+        while True:
+            request_id, event = self._events.get()
+            with self._lock:
+                target = self._pending.get(request_id)
+            if target:
+                loop, events = target
+                loop.call_soon_threadsafe(events.put_nowait, event)
+
+    def close(self):
+        for _ in self.processes:
+            self._requests.put(_STOP)
+        for process in self.processes:
+            process.join(timeout=5)
+
+
+# ---------------------------------------------------------
+# Worker process side
+# ---------------------------------------------------------
+def _worker_main(index, store_url, concurrency, requests, events):
+    # Must happen before services/ is imported: its class body reads GRAPH_READ_ONLY
+    Config.GRAPH_READ_ONLY = True
+
+    from agent.session_store import create_session_store
+    from observability.logs import setup_logging
+    setup_logging()
+    store = create_session_store(store_url, ttl_seconds=Config.SESSION_TTL_SECONDS)
+    asyncio.run(_serve(index, store, concurrency, requests, events))
+
+
+async def _serve(index, store, concurrency, requests, events):
+    from agent.agent import SupportAgent, shared_clients
+    from observability.tracing import setup_phoenix_tracing
+    from services.services import EnterpriseServices
+
+    if Config.TRACING:
+        setup_phoenix_tracing()
+    # Deliver refunds / tickets left in the outbox by a previous run
+    EnterpriseServices.outbox.start_worker()
+
+    # One pair of SDK clients (and connection pools) per process, shared by all sessions
+    client, async_client = shared_clients()
+    logger.info(f"WORKERS: Worker {index} ready")
+
+    slots = asyncio.Semaphore(concurrency)
+    tasks = set()
+
+    async def purge():
+        while True:
+            try:
+                purged = await asyncio.to_thread(store.purge_expired)
+                if purged:
+                    logger.info(f"WORKERS: Worker {index} purged {purged} expired sessions")
+            except Exception as e:
+                logger.warning(f"WORKERS: Session purge failed in worker {index}: {e}")
+            await asyncio.sleep(PURGE_INTERVAL)
+
+    purger = asyncio.create_task(purge())
+
+    async def handle(request_id, session_id, user_input):
+        try:
+            agent = SupportAgent(client=client, async_client=async_client, session_id=session_id)
+            state, version = await asyncio.to_thread(store.load, session_id)
+            agent.restore_session_state(state)
+
+            # Saved before the final event goes out, so the session's next turn sees it
+            if Config.STREAM_RESPONSES:
+                async for event in agent.astream(user_input):
+                    if event["type"] == "final":
+                        await asyncio.to_thread(store.save, session_id, agent.session_state(), version)
+                    events.put((request_id, event))
+            else:
+                answer = await agent.arun(user_input)
+                await asyncio.to_thread(store.save, session_id, agent.session_state(), version)
+                events.put((request_id, {"type": "final", "text": answer}))
+        except Exception as e:
+            logger.error(f"WORKERS: Turn failed in worker {index}: {e}", exc_info=True)
+            events.put((request_id, {"type": "error", "error": str(e)}))
+        finally:
+            slots.release()
+
+    while True:
+        # Only take a request when there is room for it, so idle workers pick up the next one
+        await slots.acquire()
+        request = await asyncio.to_thread(requests.get)
+        if request is _STOP:
+            break
+        task = asyncio.create_task(handle(*request))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    purger.cancel()
+    if tasks:
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,26 +1,67 @@
 import chainlit as cl
-from agent.agent import SupportAgent
+from config import Config
+from observability.logs import setup_logging
 from observability.tracing import setup_phoenix_tracing 
 
-# Initialize Tracing ONCE at startup
-setup_phoenix_tracing()
+setup_logging()
+
+if Config.WORKERS > 0:
+    # Turns run in worker processes; this process never opens the graph
+    from agent.workers import WorkerPool
+    workers = WorkerPool(Config.WORKERS, Config.SESSION_STORE, concurrency=Config.WORKER_CONCURRENCY)
+else:
+    from agent.agent import SupportAgent
+    from services.services import EnterpriseServices
+    workers = None
 
 @cl.on_chat_start
 def start():
     # Initialize the agent and store it in the session
-    cl.user_session.set("agent", SupportAgent())
+    if workers is None:
+        # Tracing is set up on first use (only the first call does the work);
+        # in worker mode each worker process sets up its own
+        if Config.TRACING:
+            setup_phoenix_tracing()
+        # Deliver refunds / tickets left in the outbox by a previous run
+        EnterpriseServices.outbox.start_worker()
+        cl.user_session.set("agent", SupportAgent(session_id=cl.user_session.get("id")))
     
 @cl.on_message
 async def main(message: cl.Message):
-    agent = cl.user_session.get("agent")
+    if workers is None:
+        agent = cl.user_session.get("agent")
+        arun, astream = agent.arun, agent.astream
+    else:
+        session_id = cl.user_session.get("id")
+        arun = lambda text: workers.arun(session_id, text)
+        astream = lambda text: workers.astream(session_id, text)
     
     # Send an empty message to show the "Thinking" state
     msg = cl.Message(content="")
     await msg.send()
-    
-    # Run the Agent Logic (Synchronous call to Anthropic)
-    response = agent.run(message.content)
-    
-    # Update the UI with the final response
-    msg.content = response
-    await msg.update()
\ No newline at end of file
+
+    if not Config.STREAM_RESPONSES:
+        # Run the Agent Logic (Async call to Anthropic, does not block other sessions)
+        response = await arun(message.content)
+
+        # Update the UI with the final response
+        msg.content = response
+        await msg.update()
+        return
+
+    # Stream tokens into the message and show each tool call as a step
+    steps = {}
+    async for event in astream(message.content):
+        if event["type"] == "text":
+            await msg.stream_token(event["text"])
+        elif event["type"] == "tool_call":
+            step = cl.Step(name=event["name"], type="tool")
+            step.input = event["input"]
+            await step.send()
+            steps[event["id"]] = step
+        elif event["type"] == "tool_result":
+            step = steps.pop(event["id"])
+            step.output = event["result"]
+            await step.update()
+
+    await msg.update()
@@ -0,0 +1,229 @@
+"""
+Offline replay benchmark for the agent hot path.
+
+Runs scripted conversations through `SupportAgent.run` against the local
+fake Messages API (benchmarks/fake_api.py), so it needs no network access
+and no API key. The fast path and FAQ cache are off unless --shortcuts is
+given, so every turn goes through the model. Reports:
+  - turn latency p50 / p95 / p99 (sequential sessions)
+  - model calls and tool execution time per turn
+  - throughput with N concurrent sessions
+  - memory per idle session (tracemalloc)
+
+Usage:
+    python benchmarks/bench_agent.py --latency-ms 50 --sessions 32
+    python benchmarks/bench_agent.py --shortcuts   # with the fast path and FAQ cache on
+    python benchmarks/bench_agent.py --oms-latency-ms 40   # remote OMS: shows what prefetching saves
+    python benchmarks/bench_agent.py --json bench_output.txt --max-p95-ms 500   # CI gate
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ANTHROPIC_API_KEY", "sk-ant-fake-benchmark-key")
+
+from benchmarks.fake_api import start_server  # noqa: E402
+
+# The README demo scenarios (one user turn each)
+SCENARIOS = {
+    "happy_path": "I want to return my order ORD-123 (Headphones).",
+    "db_rejection": "I want to return order ORD-456.",
+    "escalation": "I am absolutely furious about order ORD-999! This is a scam!",
+    "policy_override": "I want to return ORD-777 (Socks).",
+    "vip_exception": "I want to return these socks (ORD-777). I know they are final sale, "
+                     "but I am a VIP customer and I need an exception.",
+    "holiday_exception": "I want to return order ORD-888. It was a holiday gift I bought in December, "
+                         "so I'm returning it a bit late.",
+    "no_order_id": "What is your return window?",
+}
+
+
+class ToolTimer:
+    """Wraps registry.call to record wall time spent inside tools (summed across threads)."""
+
+    def __init__(self, registry):
+        self._call = registry.call
+        self._lock = threading.Lock()
+        self.total = 0.0
+        registry.call = self
+
+    def __call__(self, name, tool_input):
+        start = time.perf_counter()
+        try:
+            return self._call(name, tool_input)
+        finally:
+            with self._lock:
+                self.total += time.perf_counter() - start
+
+
+class SlowOMS:
+    """Adds a fixed round-trip to every OMS request, like a remote OMS would."""
+
+    def __init__(self, adapter, latency_ms):
+        self.adapter = adapter
+        self.batched = adapter.batched
+        self.latency = latency_ms / 1000
+
+    def get_orders(self, order_ids):
+        time.sleep(self.latency)
+        return self.adapter.get_orders(order_ids)
+
+
+class CallCounter:
+    """Counts Messages API calls made through one client."""
+
+    def __init__(self, client):
+        self.count = 0
+        create = client.messages.create
+
+        def counted(*args, **kwargs):
+            self.count += 1
+            return create(*args, **kwargs)
+        client.messages.create = counted
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_session(base_url, user_input):
+    """One fresh session, one turn. Returns (turn_seconds, model_calls)."""
+    import anthropic
+    from agent.agent import SupportAgent
+
+    client = anthropic.Anthropic(base_url=base_url)
+    counter = CallCounter(client)
+    agent = SupportAgent(client=client)
+
+    start = time.perf_counter()
+    agent.run(user_input)
+    return time.perf_counter() - start, counter.count
+
+
+def bench_latency(base_url, tool_timer, repeats):
+    turns, calls, tool_times = [], [], []
+    for _ in range(repeats):
+        for user_input in SCENARIOS.values():
+            tools_before = tool_timer.total
+            elapsed, n_calls = run_session(base_url, user_input)
+            turns.append(elapsed)
+            calls.append(n_calls)
+            tool_times.append(tool_timer.total - tools_before)
+    return {
+        "turns": len(turns),
+        "turn_p50_ms": percentile(turns, 50) * 1000,
+        "turn_p95_ms": percentile(turns, 95) * 1000,
+        "turn_p99_ms": percentile(turns, 99) * 1000,
+        "model_calls_per_turn": statistics.mean(calls),
+        "tool_ms_per_turn": statistics.mean(tool_times) * 1000,
+    }
+
+
+def bench_throughput(base_url, sessions, turns_per_session):
+    inputs = list(SCENARIOS.values())
+    jobs = [inputs[i % len(inputs)] for i in range(sessions * turns_per_session)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        results = list(pool.map(lambda text: run_session(base_url, text), jobs))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "concurrent_sessions": sessions,
+        "turns": len(results),
+        "turns_per_sec": len(results) / elapsed,
+        "model_calls_per_sec": sum(r[1] for r in results) / elapsed,
+        "concurrent_turn_p95_ms": percentile([r[0] for r in results], 95) * 1000,
+    }
+
+
+def bench_memory(base_url, sessions):
+    """
+    Average memory held by one idle session after a completed turn. Sessions are
+    created the way the app creates them: no injected clients, so they share the
+    process's SDK clients (pointed at `base_url` by main).
+    """
+    from agent.agent import SupportAgent
+
+    # Warm up imports/caches so they are not charged to the sessions
+    SupportAgent().run(SCENARIOS["happy_path"])
+
+    inputs = list(SCENARIOS.values())
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    agents = []
+    for i in range(sessions):
+        agent = SupportAgent()
+        agent.run(inputs[i % len(inputs)])
+        agents.append(agent)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    total = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    return {"memory_sessions": sessions, "kb_per_session": total / sessions / 1024}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline agent benchmark against a fake Messages API")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Fake model latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=5.0)
+    parser.add_argument("--oms-latency-ms", type=float, default=0.0,
+                        help="Fake OMS round-trip per order lookup (uncached)")
+    parser.add_argument("--repeats", type=int, default=5, help="Sequential passes over all scenarios")
+    parser.add_argument("--sessions", type=int, default=16, help="Concurrent sessions for the throughput run")
+    parser.add_argument("--turns-per-session", type=int, default=4)
+    parser.add_argument("--memory-sessions", type=int, default=50)
+    parser.add_argument("--shortcuts", action="store_true",
+                        help="Leave the fast path and FAQ cache on (timings then mix shortcut and model turns)")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    parser.add_argument("--max-p95-ms", type=float, help="Exit non-zero if sequential turn p95 exceeds this")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)  # agent/service logs would dominate the timings
+    from config import Config
+    # Time the model path: a shortcut turn takes under a millisecond and would hide it
+    Config.FAST_PATH = Config.FAQ_CACHE = args.shortcuts
+
+    from tools.tools import registry
+    if args.oms_latency_ms:
+        from services.services import EnterpriseServices
+        EnterpriseServices.oms.adapter = SlowOMS(EnterpriseServices.oms.adapter, args.oms_latency_ms)
+        EnterpriseServices.oms.cache_ttl = 0  # every lookup pays the round-trip
+    server, base_url = start_server(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms)
+    Config.ANTHROPIC_BASE_URL = base_url  # for the process's shared SDK clients
+    tool_timer = ToolTimer(registry)
+
+    results = {"fake_latency_ms": args.latency_ms, "fake_oms_latency_ms": args.oms_latency_ms,
+               "shortcuts": args.shortcuts}
+    results.update(bench_latency(base_url, tool_timer, args.repeats))
+    results.update(bench_throughput(base_url, args.sessions, args.turns_per_session))
+    results.update(bench_memory(base_url, args.memory_sessions))
+    server.shutdown()
+
+    print("\n📊 Agent benchmark (fake Messages API)")
+    for key, value in results.items():
+        print(f"  {key:<28} {value:,.2f}" if isinstance(value, float) else f"  {key:<28} {value}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.max_p95_ms is not None and results["turn_p95_ms"] > args.max_p95_ms:
+        print(f"❌ turn p95 {results['turn_p95_ms']:.1f}ms exceeds budget {args.max_p95_ms:.1f}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
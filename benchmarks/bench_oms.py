@@ -0,0 +1,82 @@
+"""
+Burst benchmark for order lookups against the stub OMS (benchmarks/fake_oms.py).
+
+Many concurrent sessions look up a small set of hot orders plus a long
+tail of cold ones. Compares one HTTP request per lookup with the
+OrderLookup front end (read cache + coalescing + micro-batching) and
+reports lookup latency and how many requests reached the OMS.
+
+Usage:
+    python benchmarks/bench_oms.py --latency-ms 30 --threads 64 --lookups 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_agent import percentile  # noqa: E402
+from benchmarks.fake_oms import start_server  # noqa: E402
+from services.oms import MOCK_ORDERS, HttpOMS, OrderLookup  # noqa: E402
+
+
+def make_orders(n_cold):
+    orders = dict(MOCK_ORDERS)
+    for i in range(n_cold):
+        orders[f"ORD-{100000 + i}"] = {"status": "delivered", "items": ["Gaming Mouse"],
+                                      "eligible_for_return": True, "customer_sentiment": "neutral"}
+    return orders
+
+
+def workload(orders, lookups, hot_share, seed=7):
+    rng = random.Random(seed)
+    hot, cold = list(MOCK_ORDERS), [o for o in orders if o not in MOCK_ORDERS]
+    return [rng.choice(hot) if rng.random() < hot_share else rng.choice(cold) for _ in range(lookups)]
+
+
+def run(lookup, ids, threads):
+    def timed(order_id):
+        start = time.perf_counter()
+        lookup(order_id)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(threads) as pool:
+        latencies = list(pool.map(timed, ids))
+    return time.perf_counter() - start, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OMS lookup burst benchmark")
+    parser.add_argument("--latency-ms", type=float, default=30.0, help="Stub OMS latency per request")
+    parser.add_argument("--threads", type=int, default=64, help="Concurrent sessions")
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--hot-share", type=float, default=0.8, help="Share of lookups hitting the hot orders")
+    parser.add_argument("--cold-orders", type=int, default=5000)
+    args = parser.parse_args()
+
+    orders = make_orders(args.cold_orders)
+    ids = workload(orders, args.lookups, args.hot_share)
+    server, url = start_server(latency_ms=args.latency_ms, orders=orders)
+
+    print(f"\n📊 OMS lookups: {args.lookups} over {args.threads} threads, stub latency {args.latency_ms:.0f}ms")
+    variants = {
+        "direct (1 request/lookup)": lambda adapter: (lambda order_id: adapter.get_orders([order_id])),
+        "OrderLookup": lambda adapter: OrderLookup(adapter).get,
+    }
+    for name, build in variants.items():
+        adapter = HttpOMS(url, pool_size=args.threads)
+        before = server.stats.requests
+        elapsed, latencies = run(build(adapter), ids, args.threads)
+        adapter.close()
+        print(f"  {name:<28} {len(ids) / elapsed:>9,.0f} lookups/s  "
+              f"p50 {percentile(latencies, 50) * 1000:6.1f}ms  p95 {percentile(latencies, 95) * 1000:6.1f}ms  "
+              f"OMS requests {server.stats.requests - before:>6}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
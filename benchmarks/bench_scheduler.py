@@ -0,0 +1,118 @@
+"""
+Rate-limit benchmark for the Claude call scheduler (agent/scheduler.py).
+
+Drives many concurrent sessions through `SupportAgent.run` against the
+local fake Messages API with a per-minute request limit, once calling the
+API directly (SDK retries only, as before the scheduler) and once through
+the scheduler. Every turn goes to the model (fast path and FAQ cache off).
+Reports failed turns, 429s returned by the API, model calls per second as
+a share of the limit, and turn latency for upset customers (scheduled
+first) vs. everyone else.
+
+Usage:
+    python benchmarks/bench_scheduler.py
+    python benchmarks/bench_scheduler.py --rpm 600 --sessions 48 --max-failed-turns 0   # CI gate
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("ANTHROPIC_API_KEY", "sk-ant-fake-benchmark-key")
+
+from benchmarks.bench_agent import SCENARIOS, percentile  # noqa: E402
+from benchmarks.fake_api import FakeRateLimits, start_server  # noqa: E402
+from config import Config  # noqa: E402
+
+
+def run_mode(scheduled, args):
+    import anthropic
+    from agent.agent import SupportAgent, scheduler
+
+    Config.MODEL_SCHEDULER = scheduled
+    limits = FakeRateLimits(args.rpm, start_empty=True)  # steady state, not the initial burst
+    server, base_url = start_server(latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 4, rate_limits=limits)
+    # Before the scheduler, the SDK's own retries (2, with backoff) were all there was
+    client = anthropic.Anthropic(base_url=base_url, max_retries=0 if scheduled else anthropic.DEFAULT_MAX_RETRIES)
+    stats_before = dict(scheduler.stats)
+
+    inputs = list(SCENARIOS.items())
+
+    def session(index):
+        agent = SupportAgent(client=client, async_client=client, session_id=f"bench-{index}")
+        turns = []
+        for turn in range(args.turns_per_session):
+            name, user_input = inputs[(index + turn) % len(inputs)]
+            start = time.perf_counter()
+            try:
+                agent.run(user_input)
+                ok = True
+            except Exception:
+                ok = False
+            turns.append((name, ok, time.perf_counter() - start))
+        return turns
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        turns = [t for session_turns in pool.map(session, range(args.sessions)) for t in session_turns]
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    ok = [seconds for _, passed, seconds in turns if passed]
+    urgent = [seconds for name, passed, seconds in turns if passed and name == "escalation"]
+    normal = [seconds for name, passed, seconds in turns if passed and name != "escalation"]
+    return {
+        "turns": len(turns),
+        "failed_turns": len(turns) - len(ok),
+        "api_429s": limits.rejected,
+        "calls_per_sec": limits.accepted / elapsed,
+        "limit_utilization_pct": limits.accepted / elapsed / (args.rpm / 60) * 100,
+        "turn_p50_ms": percentile(ok, 50) * 1000,
+        "turn_p95_ms": percentile(ok, 95) * 1000,
+        "urgent_turn_p50_ms": percentile(urgent, 50) * 1000,
+        "normal_turn_p50_ms": percentile(normal, 50) * 1000,
+        "scheduler_retries": scheduler.stats["retries"] - stats_before["retries"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput and errors at the API rate limit, with and without the scheduler")
+    parser.add_argument("--rpm", type=int, default=1200, help="Fake API requests per minute")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="Fake model latency per call")
+    parser.add_argument("--sessions", type=int, default=24, help="Concurrent sessions")
+    parser.add_argument("--turns-per-session", type=int, default=4)
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    parser.add_argument("--max-failed-turns", type=int, help="Exit non-zero if the scheduled run fails more turns")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    Config.FAST_PATH = False  # every turn needs the model
+    Config.FAQ_CACHE = False
+
+    print(f"\n🚦 Scheduler benchmark ({args.sessions} sessions x {args.turns_per_session} turns, "
+          f"limit {args.rpm} requests/min, {args.latency_ms:.0f}ms per call)")
+    results = {}
+    for name, scheduled in (("direct", False), ("scheduled", True)):
+        results[name] = run_mode(scheduled, args)
+        r = results[name]
+        print(f"  {name:<10} failed turns {r['failed_turns']:>3}/{r['turns']}  429s {r['api_429s']:>4}  "
+              f"{r['calls_per_sec']:5.1f} calls/s ({r['limit_utilization_pct']:3.0f}% of limit)  "
+              f"p50/p95 {r['turn_p50_ms']:,.0f}/{r['turn_p95_ms']:,.0f}ms  "
+              f"upset vs. others p50 {r['urgent_turn_p50_ms']:,.0f} vs. {r['normal_turn_p50_ms']:,.0f}ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failed = results["scheduled"]["failed_turns"]
+    if args.max_failed_turns is not None and failed > args.max_failed_turns:
+        print(f"❌ {failed} turns failed with the scheduler (budget {args.max_failed_turns})")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Cold-start check: how long it takes to import the app's modules.
+
+Each module is imported in a fresh interpreter with `python -X importtime`.
+The script reports its cumulative import time, the interpreter's wall time,
+and the slowest direct dependencies, so an eager heavy import (SDKs,
+exporters, the graph database) shows up as a regression. Also times the
+first-use costs that are now deferred (Anthropic SDK import, graph open).
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --budget-ms 300   # CI gate on the agent import
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MODULES = ["config", "services.services", "tools.tools", "agent.agent", "agent.workers"]
+
+# First-use costs, each measured in a fresh interpreter after the module import
+FIRST_USE = {
+    "anthropic SDK import": "import anthropic",
+    "graph open (first precedent lookup)": "from services.services import EnterpriseServices; EnterpriseServices._graph()",
+}
+
+
+def import_profile(module, repeats):
+    """Best-of-N (cumulative import microseconds, wall seconds, {direct import: cumulative us})."""
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=BASE_DIR, capture_output=True, text=True,
+            env={**os.environ, "LOG_LEVEL": "CRITICAL"},
+        )
+        wall = time.perf_counter() - start
+        if proc.returncode != 0:
+            sys.exit(f"❌ import {module} failed:\n{proc.stderr[-2000:]}")
+
+        # importtime lists children before their parent, indented two spaces per level
+        total, children, pending = 0, {}, {}
+        for line in proc.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            _, cumulative, raw_name = line.split("|")
+            name, depth = raw_name.strip(), (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+            if depth == 1:
+                pending[name] = int(cumulative)
+            elif depth == 0:
+                if name == module:
+                    total, children = int(cumulative), pending
+                pending = {}
+        if best is None or total < best[0]:
+            best = (total, wall, children)
+    return best
+
+
+def first_use_ms(statement):
+    code = (
+        "import time, logging; logging.disable(logging.CRITICAL)\n"
+        "import services.services\n"
+        f"t = time.perf_counter(); {statement}\n"
+        "print((time.perf_counter() - t) * 1000)"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=BASE_DIR, capture_output=True, text=True)
+    return float(proc.stdout.strip().splitlines()[-1]) if proc.returncode == 0 else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time / cold-start check")
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh interpreters per module (best is kept)")
+    parser.add_argument("--top", type=int, default=3, help="Slowest direct imports to list per module")
+    parser.add_argument("--budget-ms", type=float, help="Exit non-zero if importing agent.agent takes longer")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"\n🚀 Startup: module import time (fresh interpreter, best of {args.repeats})")
+    for module in MODULES:
+        total_us, wall, children = import_profile(module, args.repeats)
+        results[module] = {"import_ms": total_us / 1000, "interpreter_wall_ms": wall * 1000}
+        slowest = sorted(children.items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+        print(f"  {module:<20} {total_us / 1000:8.1f}ms  (interpreter {wall * 1000:6.0f}ms)  "
+              + ", ".join(f"{name} {us / 1000:.0f}ms" for name, us in slowest))
+
+    print("\n⏳ Deferred to first use")
+    for name, statement in FIRST_USE.items():
+        ms = first_use_ms(statement)
+        results[name] = {"first_use_ms": ms}
+        print(f"  {name:<38} {ms:8.1f}ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    agent_ms = results["agent.agent"]["import_ms"]
+    if args.budget_ms is not None and agent_ms > args.budget_ms:
+        print(f"❌ agent.agent import {agent_ms:.1f}ms exceeds budget {args.budget_ms:.1f}ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Tracing overhead benchmark.
+
+Runs the same scripted turns (against the local fake Messages API) with
+tracing off and under several sampling settings, each in a fresh
+interpreter because tracing is set up once per process. Spans go to the
+file exporter at /dev/null, so this measures the in-process cost
+(recording, sampling, queueing, serialization) and not a collector.
+Reports the mean turn time, its overhead vs. tracing off, and the span
+pipeline counters (kept / sampled out / dropped).
+
+Usage:
+    python benchmarks/bench_tracing.py
+    python benchmarks/bench_tracing.py --turns 200 --max-overhead-pct 15   # CI gate on the default mode
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# name -> environment overrides
+MODES = {
+    "off": {"TRACING": "false"},
+    "100% head": {"TRACE_SAMPLE_RATE": "1.0", "TRACE_TAIL_SAMPLING": "false"},
+    "10% head": {"TRACE_SAMPLE_RATE": "0.1", "TRACE_TAIL_SAMPLING": "false"},
+    "10% head + tail": {"TRACE_SAMPLE_RATE": "0.1", "TRACE_TAIL_SAMPLING": "true"},
+}
+GATED_MODE = "10% head + tail"
+
+
+def child(turns):
+    """Runs `turns` turns in this process and prints the result as JSON."""
+    sys.path.insert(0, BASE_DIR)
+    import logging
+    logging.disable(logging.CRITICAL)
+
+    import anthropic
+    from agent.agent import SupportAgent
+    from benchmarks.bench_agent import SCENARIOS
+    from benchmarks.fake_api import start_server
+    from config import Config
+    from observability.tracing import setup_phoenix_tracing
+
+    enabled = Config.TRACING and setup_phoenix_tracing()
+    _, url = start_server(0, 0.0)
+    client = anthropic.Anthropic(api_key="sk-ant-fake-benchmark-key", base_url=url)
+    inputs = list(SCENARIOS.values())
+
+    SupportAgent(client=client, async_client=client).run(inputs[0])  # warm-up (imports, graph, caches)
+    start = time.perf_counter()
+    for i in range(turns):
+        SupportAgent(client=client, async_client=client).run(inputs[i % len(inputs)])
+    elapsed = time.perf_counter() - start
+
+    stats = {}
+    if enabled:
+        from opentelemetry import trace
+        provider = trace.get_tracer_provider()
+        provider.force_flush()
+        processor = provider._active_span_processor._span_processors[0]
+        stats = processor.stats()
+    print(json.dumps({"turn_ms": elapsed / turns * 1000, "spans": stats}))
+
+
+def run_mode(overrides, turns):
+    env = {**os.environ, "ANTHROPIC_API_KEY": "sk-ant-fake-benchmark-key", "FAST_PATH": "false",
+           "TRACE_EXPORTER": "file", "TRACE_FILE": os.devnull, "TRACING": "true", **overrides}
+    proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", str(turns)],
+                          cwd=BASE_DIR, env=env, capture_output=True, text=True)
+    if proc.returncode != 0:
+        sys.exit(f"❌ benchmark run failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tracing overhead per turn, by sampling mode")
+    parser.add_argument("--turns", type=int, default=100, help="Sequential turns per mode")
+    parser.add_argument("--max-overhead-pct", type=float,
+                        help=f"Exit non-zero if '{GATED_MODE}' adds more than this to the mean turn time")
+    parser.add_argument("--json", metavar="PATH", help="Also write the results as JSON")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    results = {}
+    print(f"\n🔭 Tracing overhead ({args.turns} turns per mode, fake API, spans to /dev/null)")
+    for name, overrides in MODES.items():
+        results[name] = run_mode(overrides, args.turns)
+        overhead = (results[name]["turn_ms"] / results["off"]["turn_ms"] - 1) * 100
+        results[name]["overhead_pct"] = overhead
+        spans = results[name]["spans"]
+        kept = sum(v for k, v in spans.items() if k.startswith("kept_"))
+        print(f"  {name:<18} {results[name]['turn_ms']:7.2f}ms/turn  ({overhead:+5.1f}%)  "
+              f"spans kept {kept}, sampled out {spans.get('sampled_out', 0)}, "
+              f"dropped {sum(v for k, v in spans.items() if k.startswith('dropped_'))}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    gated = results[GATED_MODE]["overhead_pct"]
+    if args.max_overhead_pct is not None and gated > args.max_overhead_pct:
+        print(f"❌ '{GATED_MODE}' overhead {gated:.1f}% exceeds budget {args.max_overhead_pct:.1f}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
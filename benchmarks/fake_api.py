@@ -0,0 +1,388 @@
+"""
+Local stand-in for the Anthropic Messages API (POST /v1/messages).
+
+A tiny deterministic "model" follows the same SOP as Config.SYSTEM_PROMPT,
+so scripted conversations produce realistic tool_use / end_turn sequences
+without network access:
+  1. Order ID in the user message -> look_up_order + get_policy_info (one turn)
+     Policy question, no order ID  -> get_policy_info, then an answer quoting it
+  2. Angry customer                -> escalate_to_human
+     Eligible and not Final Sale   -> execute_order_return
+     Exception request (VIP etc.)  -> check_precedents
+  3. Anything else                 -> end_turn with a short answer
+
+Latency is configurable per call, and `"stream": true` requests are
+answered with server-sent events, so streaming can be benchmarked too.
+The Message Batches endpoints (create / retrieve / results) are served as
+well: a batch "processes" for `batch_latency_ms`, then its results are ready.
+Optional per-minute request / input token limits behave like the API's:
+continuously refilled buckets, `anthropic-ratelimit-*` headers on every
+response, and 429 + `retry-after` once a bucket is empty.
+
+Run standalone:  python benchmarks/fake_api.py --port 8765 --latency-ms 400 --rpm 120
+"""
+import argparse
+import datetime
+import itertools
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ORDER_ID = re.compile(r"\bORD-\d+\b", re.IGNORECASE)
+FINAL_SALE = ("socks", "underwear", "swimwear", "card", "software", "cream", "beauty")
+EXCEPTION_WORDS = ("vip", "holiday", "gift", "high value", "exception")
+ANGRY_WORDS = ("furious", "scam", "angry", "ridiculous")
+POLICY_TOPICS = {"shipping": ("shipping", "delivery", "ship"), "privacy": ("privacy", "data"),
+                 "returns": ("return", "refund", "window", "policy")}
+
+_ids = itertools.count(1)
+
+
+class FakeRateLimits:
+    """Per-minute request / input token limits (0 = unlimited), refilled continuously."""
+
+    def __init__(self, requests_per_minute=0, input_tokens_per_minute=0, start_empty=False):
+        self.limits = {name: limit for name, limit in
+                       (("requests", requests_per_minute), ("input-tokens", input_tokens_per_minute)) if limit}
+        # Like the API, buckets start full (a burst is allowed); start_empty measures the steady rate
+        self.levels = {name: 0.0 if start_empty else limit for name, limit in self.limits.items()}
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self.accepted = 0
+        self.rejected = 0
+
+    def take(self, input_tokens):
+        """Charges one request. Returns (accepted, response headers)."""
+        need = {"requests": 1, "input-tokens": input_tokens}
+        with self.lock:
+            now = time.monotonic()
+            for name, limit in self.limits.items():
+                self.levels[name] = min(limit, self.levels[name] + limit / 60 * (now - self.updated))
+            self.updated = now
+
+            short = {name: min(need[name], limit) - self.levels[name] for name, limit in self.limits.items()}
+            accepted = all(missing <= 0 for missing in short.values())
+            if accepted:
+                self.accepted += 1
+                for name in self.limits:
+                    self.levels[name] -= need[name]
+            else:
+                self.rejected += 1
+
+            headers = {}
+            for name, limit in self.limits.items():
+                level = max(0.0, self.levels[name])
+                full_at = time.time() + (limit - level) / (limit / 60)
+                headers[f"anthropic-ratelimit-{name}-limit"] = str(limit)
+                headers[f"anthropic-ratelimit-{name}-remaining"] = str(int(level))
+                headers[f"anthropic-ratelimit-{name}-reset"] = datetime.datetime.fromtimestamp(
+                    full_at, datetime.timezone.utc).isoformat()
+            if not accepted:
+                wait = max(missing / (self.limits[name] / 60) for name, missing in short.items() if missing > 0)
+                headers["retry-after"] = str(max(1, round(wait)))
+        return accepted, headers
+
+
+class FakeModel:
+    """Decides the next assistant message from the conversation so far."""
+
+    def respond(self, messages):
+        user_text = self._last_user_text(messages)
+        results = self._tool_results_since_user_text(messages)
+
+        if not results:
+            match = ORDER_ID.search(user_text)
+            topic = next((t for t, words in POLICY_TOPICS.items() if any(w in user_text.lower() for w in words)), None)
+            if not match and topic:
+                return self._tools("Let me check our policy.", ("get_policy_info", {"policy_type": topic}))
+            if not match:
+                return self._text("Happy to help! Could you share your Order ID (e.g. ORD-123)?")
+            order_id = match.group(0).upper()
+            return self._tools(
+                "Let me check that order and our return policy.",
+                ("look_up_order", {"order_id": order_id}),
+                ("get_policy_info", {"policy_type": "returns"}),
+            )
+
+        called = {name for name, _ in results.values()}
+        if called == {"get_policy_info"} and not ORDER_ID.search(user_text):
+            policy = next(iter(results.values()))[1]
+            excerpt = " ".join(str(policy.get("policy_text", policy)).split())[:160]
+            return self._text(f"Here is what our policy says: {excerpt}")
+        order = next((r for name, r in results.values() if name == "look_up_order"), {})
+        order_id = ORDER_ID.search(user_text).group(0).upper()
+        text = user_text.lower()
+
+        if "error" in order:
+            return self._text(f"I couldn't find order {order_id}. Could you double-check the ID?")
+        if called & {"execute_order_return", "escalate_to_human"}:
+            return self._text(f"All done: your request for {order_id} has been processed.")
+
+        if order.get("customer_sentiment") == "angry" or any(w in text for w in ANGRY_WORDS):
+            return self._tools("I'm sorry about this. Connecting you with a specialist.", (
+                "escalate_to_human",
+                {"order_id": order_id, "reason": "Customer upset", "policy_check_confirmation": "verified_compliant"},
+            ))
+
+        items = " ".join(order.get("items", [])).lower()
+        final_sale = any(w in items for w in FINAL_SALE)
+        if order.get("eligible_for_return") and not final_sale:
+            return self._tools("Your item is eligible. Processing the return now.",
+                               ("execute_order_return", {"order_id": order_id, "reason": "Customer request"}))
+
+        if "check_precedents" in called:
+            precedent = next(r for name, r in results.values() if name == "check_precedents")
+            if precedent.get("decision") == "APPROVE":
+                return self._tools(f"Approved per precedent {precedent['precedent_id']}.",
+                                   ("execute_order_return", {"order_id": order_id, "reason": "Precedent exception"}))
+        elif any(w in text for w in EXCEPTION_WORDS):
+            tags = " ".join(w.replace(" ", "_") for w in EXCEPTION_WORDS if w in text)
+            return self._tools("Let me check for past exceptions.", ("check_precedents", {"query_tags_str": tags}))
+
+        return self._text(f"I'm sorry, order {order_id} is not eligible for return under our policy.")
+
+    # ---------------------------------------------------------
+    # Conversation helpers
+    # ---------------------------------------------------------
+    @staticmethod
+    def _last_user_text(messages):
+        for message in reversed(messages):
+            if message["role"] != "user":
+                continue
+            content = message["content"]
+            if isinstance(content, str):
+                return content
+            texts = [b["text"] for b in content if b.get("type") == "text"]
+            if texts:
+                return " ".join(texts)
+        return ""
+
+    @staticmethod
+    def _tool_results_since_user_text(messages):
+        """tool_use_id -> (tool name, parsed result) for the current turn."""
+        names, results = {}, {}
+        for message in messages:
+            content = message["content"]
+            if isinstance(content, str) or (message["role"] == "user" and
+                                            any(b.get("type") == "text" for b in content)):
+                names, results = {}, {}
+                continue
+            for block in content:
+                if block.get("type") == "tool_use":
+                    names[block["id"]] = block["name"]
+                elif block.get("type") == "tool_result":
+                    try:
+                        payload = json.loads(block["content"])
+                    except (TypeError, ValueError):
+                        payload = {}
+                    results[block["tool_use_id"]] = (names.get(block["tool_use_id"]), payload)
+        return results
+
+    @staticmethod
+    def _text(text):
+        return [{"type": "text", "text": text}], "end_turn"
+
+    @staticmethod
+    def _tools(preamble, *calls):
+        content = [{"type": "text", "text": preamble}]
+        for name, tool_input in calls:
+            content.append({"type": "tool_use", "id": f"toolu_fake_{next(_ids)}", "name": name, "input": tool_input})
+        return content, "tool_use"
+
+
+class FakeMessagesHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # headers and body are separate writes: avoid the delayed-ACK stall
+    model = FakeModel()
+    latency_ms = 0.0
+    jitter_ms = 0.0
+    ttft_ms = None  # time to first streamed token; defaults to latency_ms / 4
+    batch_latency_ms = 0.0
+    batches = {}  # batch id -> (created, ready at, results)
+    batches_lock = threading.Lock()
+    rate_limits = None  # FakeRateLimits
+
+    def log_message(self, format, *args):
+        pass  # keep benchmark output clean
+
+    def do_POST(self):
+        if not self.path.startswith("/v1/messages"):
+            self.send_error(404)
+            return
+
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        request = json.loads(body)
+        if self.path.startswith("/v1/messages/batches"):
+            self._create_batch(request)
+            return
+
+        headers = {}
+        if self.rate_limits:
+            accepted, headers = self.rate_limits.take(len(body) // 4)
+            if not accepted:
+                error = {"type": "error", "error": {"type": "rate_limit_error", "message": "Rate limit exceeded (fake)"}}
+                self._send_json(error, headers, status=429)
+                return
+        message = self._message(request, len(body))
+
+        latency = max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+        if request.get("stream"):
+            self._stream(message, latency, headers)
+        else:
+            time.sleep(latency)
+            self._send_json(message, headers)
+
+    def _message(self, request, body_size):
+        content, stop_reason = self.model.respond(request["messages"])
+        usage = {
+            "input_tokens": body_size // 4,
+            "output_tokens": len(json.dumps(content)) // 4,
+            "cache_creation_input_tokens": 0,
+            "cache_read_input_tokens": 0,
+        }
+        return {
+            "id": f"msg_fake_{next(_ids)}",
+            "type": "message",
+            "role": "assistant",
+            "model": request.get("model", "fake-model"),
+            "content": content,
+            "stop_reason": stop_reason,
+            "stop_sequence": None,
+            "usage": usage,
+        }
+
+    # ---------------------------------------------------------
+    # Message Batches
+    # ---------------------------------------------------------
+    def _create_batch(self, request):
+        batch_id = f"msgbatch_fake_{next(_ids)}"
+        results = [
+            {"custom_id": r["custom_id"],
+             "result": {"type": "succeeded", "message": self._message(r["params"], len(json.dumps(r["params"])))}}
+            for r in request["requests"]
+        ]
+        with self.batches_lock:
+            self.batches[batch_id] = (time.time(), time.time() + self.batch_latency_ms / 1000, results)
+        self._send_json(self._batch(batch_id))
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")  # v1 messages batches <id> [results]
+        with self.batches_lock:
+            batch = self.batches.get(parts[3]) if len(parts) >= 4 and parts[:3] == ["v1", "messages", "batches"] else None
+        if batch is None:
+            self.send_error(404)
+            return
+        if len(parts) == 4:
+            self._send_json(self._batch(parts[3]))
+            return
+
+        data = "".join(json.dumps(r) + "\n" for r in batch[2]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/binary")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _batch(self, batch_id):
+        with self.batches_lock:
+            created, ready_at, results = self.batches[batch_id]
+        ended = time.time() >= ready_at
+        timestamp = lambda t: datetime.datetime.fromtimestamp(t, datetime.timezone.utc).isoformat()  # noqa: E731
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {"processing": 0 if ended else len(results), "succeeded": len(results) if ended else 0,
+                               "errored": 0, "canceled": 0, "expired": 0},
+            "created_at": timestamp(created),
+            "ended_at": timestamp(ready_at) if ended else None,
+            "expires_at": timestamp(created + 86400),
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": f"/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+
+    def _send_json(self, payload, headers=None, status=200):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, message, latency, headers=None):
+        ttft = (self.ttft_ms / 1000) if self.ttft_ms is not None else latency / 4
+        chunks = [(i, b) for i, b in enumerate(message["content"])]
+        per_chunk = (latency - ttft) / max(1, len(chunks))
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        time.sleep(ttft)
+        start = {**message, "content": [], "stop_reason": None, "usage": {**message["usage"], "output_tokens": 1}}
+        self._event("message_start", {"type": "message_start", "message": start})
+        for index, block in chunks:
+            if block["type"] == "text":
+                self._event("content_block_start", {"type": "content_block_start", "index": index,
+                                                    "content_block": {"type": "text", "text": ""}})
+                for word in re.findall(r"\S+\s*", block["text"]):
+                    self._event("content_block_delta", {"type": "content_block_delta", "index": index,
+                                                        "delta": {"type": "text_delta", "text": word}})
+            else:
+                self._event("content_block_start", {"type": "content_block_start", "index": index,
+                                                    "content_block": {**block, "input": {}}})
+                self._event("content_block_delta", {"type": "content_block_delta", "index": index,
+                                                    "delta": {"type": "input_json_delta",
+                                                              "partial_json": json.dumps(block["input"])}})
+            self._event("content_block_stop", {"type": "content_block_stop", "index": index})
+            time.sleep(per_chunk)
+        self._event("message_delta", {"type": "message_delta",
+                                      "delta": {"stop_reason": message["stop_reason"], "stop_sequence": None},
+                                      "usage": {"output_tokens": message["usage"]["output_tokens"]}})
+        self._event("message_stop", {"type": "message_stop"})
+        self.close_connection = True
+
+    def _event(self, name, data):
+        self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode())
+        self.wfile.flush()
+
+
+def start_server(port=0, latency_ms=0.0, jitter_ms=0.0, ttft_ms=None, batch_latency_ms=0.0, rate_limits=None):
+    """Starts the fake API on a daemon thread. Returns (server, base_url)."""
+    handler = type("ConfiguredHandler", (FakeMessagesHandler,),
+                   {"latency_ms": latency_ms, "jitter_ms": jitter_ms, "ttft_ms": ttft_ms,
+                    "batch_latency_ms": batch_latency_ms, "batches": {}, "rate_limits": rate_limits})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="fake-anthropic", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the Anthropic Messages API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--ttft-ms", type=float, default=None)
+    parser.add_argument("--batch-latency-ms", type=float, default=0.0, help="Processing time of a Message Batch")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute before 429s (0 = unlimited)")
+    parser.add_argument("--itpm", type=int, default=0, help="Input tokens per minute before 429s (0 = unlimited)")
+    args = parser.parse_args()
+
+    limits = FakeRateLimits(args.rpm, args.itpm) if args.rpm or args.itpm else None
+    server, url = start_server(args.port, args.latency_ms, args.jitter_ms, args.ttft_ms, args.batch_latency_ms, limits)
+    print(f"🧪 Fake Messages API listening on {url} (set ANTHROPIC_BASE_URL={url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
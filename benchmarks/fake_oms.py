@@ -0,0 +1,95 @@
+"""
+Local stub of an Order Management System for the HTTP OMS adapter.
+
+Serves the demo orders (services/oms.py MOCK_ORDERS) over keep-alive HTTP:
+    GET /orders?ids=ORD-123,ORD-456  ->  {"orders": {"ORD-123": {...}, ...}}
+Unknown ids are left out of the response. Every request sleeps for the
+configured latency and is counted, so benchmarks can see how many round
+trips batching and coalescing saved.
+
+Run standalone:  python benchmarks/fake_oms.py --port 8766 --latency-ms 30
+                 OMS_BASE_URL=http://127.0.0.1:8766 chainlit run app.py
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.oms import MOCK_ORDERS  # noqa: E402
+
+
+class RequestStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.ids_requested = 0
+
+    def record(self, n_ids):
+        with self._lock:
+            self.requests += 1
+            self.ids_requested += n_ids
+
+
+class FakeOMSHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    orders = MOCK_ORDERS
+    stats = None
+    latency_ms = 0.0
+    jitter_ms = 0.0
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/orders":
+            self.send_error(404)
+            return
+
+        ids = [i for i in ",".join(parse_qs(url.query).get("ids", [])).split(",") if i]
+        self.stats.record(len(ids))
+        time.sleep(max(0.0, self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000)
+
+        data = json.dumps({"orders": {i: self.orders[i] for i in ids if i in self.orders}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def start_server(port=0, latency_ms=0.0, jitter_ms=0.0, orders=None):
+    """Starts the stub OMS on a daemon thread. Returns (server, base_url); request counts are in server.stats."""
+    stats = RequestStats()
+    handler = type("ConfiguredHandler", (FakeOMSHandler,), {
+        "latency_ms": latency_ms, "jitter_ms": jitter_ms, "stats": stats,
+        "orders": MOCK_ORDERS if orders is None else orders,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    server.stats = stats
+    threading.Thread(target=server.serve_forever, name="fake-oms", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stub Order Management System")
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, url = start_server(args.port, args.latency_ms, args.jitter_ms)
+    print(f"🧪 Stub OMS listening on {url} (set OMS_BASE_URL={url})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
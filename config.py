@@ -7,6 +7,8 @@ load_dotenv()
 class Config:
     # API Configuration
     ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
+    # Optional override, e.g. a local stand-in for the Messages API (None = api.anthropic.com)
+    ANTHROPIC_BASE_URL = os.getenv("ANTHROPIC_BASE_URL")
     
     # Model Settings
     # Using Sonnet for best reasoning. Switch to "claude-3-haiku-20240307" for speed/cost.
@@ -14,6 +16,112 @@ class Config:
     MAX_TOKENS = 1024
     TEMPERATURE = 0.0  # 0.0 forces the model to be deterministic (crucial for Support)
 
+    # Logging / tracing (configured by the entry points, not at import)
+    LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")  # DEBUG also logs every full API response
+    TRACING = os.getenv("TRACING", "true").lower() == "true"
+    # Where spans go: "otlp" (Phoenix at TRACE_OTLP_ENDPOINT), "console", or "file" (JSON lines in TRACE_FILE).
+    # Console/file also export the agent's metrics (token counts, durations) every METRICS_EXPORT_INTERVAL_MS.
+    TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "otlp").lower()
+    TRACE_FILE = os.getenv("TRACE_FILE")  # default: data/traces.jsonl
+    METRICS_EXPORT_INTERVAL_MS = int(os.getenv("METRICS_EXPORT_INTERVAL_MS", "60000"))
+    TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "http://127.0.0.1:4317"))
+    # Sampling: TRACE_SAMPLE_RATE of turns are exported. With tail sampling on, the rest are
+    # still exported if they failed, escalated, or took longer than TRACE_SLOW_TURN_MS.
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+    TRACE_TAIL_SAMPLING = os.getenv("TRACE_TAIL_SAMPLING", "true").lower() == "true"
+    TRACE_SLOW_TURN_MS = float(os.getenv("TRACE_SLOW_TURN_MS", "8000"))
+    # Export queue: spans beyond TRACE_QUEUE_SIZE are dropped (and counted) rather than blocking turns
+    TRACE_QUEUE_SIZE = int(os.getenv("TRACE_QUEUE_SIZE", "2048"))
+    TRACE_EXPORT_BATCH_SIZE = int(os.getenv("TRACE_EXPORT_BATCH_SIZE", "256"))
+    TRACE_EXPORT_TIMEOUT_SECONDS = float(os.getenv("TRACE_EXPORT_TIMEOUT_SECONDS", "5"))
+    # Longest string kept in a span attribute (full prompts, tool results); longer values are truncated
+    TRACE_MAX_ATTRIBUTE_LENGTH = int(os.getenv("TRACE_MAX_ATTRIBUTE_LENGTH", "4096"))
+
+    # Policy documents are cached in memory; changes on disk are picked up by polling
+    POLICY_CACHE_TTL = float(os.getenv("POLICY_CACHE_TTL", "3600"))
+    POLICY_POLL_INTERVAL = float(os.getenv("POLICY_POLL_INTERVAL", "2.0"))
+
+    # Order Management System. Unset = in-memory demo orders.
+    # Otherwise `GET {OMS_BASE_URL}/orders?ids=...` with pooled keep-alive connections.
+    OMS_BASE_URL = os.getenv("OMS_BASE_URL")
+    OMS_API_KEY = os.getenv("OMS_API_KEY")
+    OMS_TIMEOUT = float(os.getenv("OMS_TIMEOUT", "5.0"))
+    OMS_POOL_SIZE = int(os.getenv("OMS_POOL_SIZE", "16"))
+    OMS_CACHE_TTL = float(os.getenv("OMS_CACHE_TTL", "2.0"))  # short: order state changes
+    OMS_BATCH_WINDOW_MS = float(os.getenv("OMS_BATCH_WINDOW_MS", "5"))
+    OMS_MAX_BATCH = int(os.getenv("OMS_MAX_BATCH", "50"))
+
+    # Durable outbox for refunds / escalation tickets (SQLite; default data/outbox.sqlite3)
+    OUTBOX_DB_PATH = os.getenv("OUTBOX_DB_PATH")
+    OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "8"))
+    OUTBOX_BACKOFF_SECONDS = float(os.getenv("OUTBOX_BACKOFF_SECONDS", "1.0"))
+
+    # Kùzu connections shared by concurrent sessions (size to tool-worker concurrency)
+    GRAPH_POOL_SIZE = int(os.getenv("GRAPH_POOL_SIZE", "8"))
+    # Open the graph read-only (always on in worker processes; the agent never writes to it)
+    GRAPH_READ_ONLY = os.getenv("GRAPH_READ_ONLY", "false").lower() == "true"
+
+    # Precedent lookups: served from an in-memory tag index over the Kùzu graph
+    PRECEDENT_INDEX = os.getenv("PRECEDENT_INDEX", "true").lower() == "true"
+    PRECEDENT_TOP_K = int(os.getenv("PRECEDENT_TOP_K", "3"))
+    PRECEDENT_INDEX_REFRESH_SECONDS = float(os.getenv("PRECEDENT_INDEX_REFRESH_SECONDS", "30"))
+
+    # Estimated token budget for the conversation history sent on each call.
+    # Once exceeded, old tool results (policy text first) are compacted.
+    HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "20000"))
+
+    # Cache the system prompt, tool schema and history prefix between loop iterations
+    PROMPT_CACHING = os.getenv("PROMPT_CACHING", "true").lower() == "true"
+
+    # Stream tokens and tool steps to the Chainlit UI as they arrive
+    STREAM_RESPONSES = os.getenv("STREAM_RESPONSES", "true").lower() == "true"
+
+    # Decide routine, clearly (non-)compliant return requests in code without calling Claude
+    FAST_PATH = os.getenv("FAST_PATH", "true").lower() == "true"
+
+    # Serve repeated policy-only questions ("what's your return window?") from earlier answers.
+    # A question matches a cached one if it is at least FAQ_CACHE_SIMILARITY alike (character trigrams)
+    # with the same key words. Entries expire after FAQ_CACHE_TTL and when a policy they used changes.
+    FAQ_CACHE = os.getenv("FAQ_CACHE", "true").lower() == "true"
+    FAQ_CACHE_TTL = float(os.getenv("FAQ_CACHE_TTL", "3600"))
+    FAQ_CACHE_MAX_ENTRIES = int(os.getenv("FAQ_CACHE_MAX_ENTRIES", "512"))
+    FAQ_CACHE_SIMILARITY = float(os.getenv("FAQ_CACHE_SIMILARITY", "0.75"))
+
+    # Start look_up_order + the returns policy for ORD- IDs in the message while the first
+    # Claude call is in flight, and serve them when Claude asks (up to PREFETCH_MAX_ORDERS orders)
+    PREFETCH = os.getenv("PREFETCH", "true").lower() == "true"
+    PREFETCH_MAX_ORDERS = int(os.getenv("PREFETCH_MAX_ORDERS", "3"))
+
+    # Batch mode (scripts/resolve_tickets.py): model steps go through the Message Batches API
+    BATCH_POLL_INTERVAL = float(os.getenv("BATCH_POLL_INTERVAL", "30"))  # seconds between status checks
+    BATCH_MAX_REQUESTS = int(os.getenv("BATCH_MAX_REQUESTS", "10000"))  # per Message Batch (API limit 100,000)
+    BATCH_MAX_ROUNDS = int(os.getenv("BATCH_MAX_ROUNDS", "8"))  # model calls per ticket before giving up
+    BATCH_TOOL_WORKERS = int(os.getenv("BATCH_TOOL_WORKERS", "32"))  # tickets whose tools run at once
+
+    # Deployment: 0 = agents run inside the Chainlit process.
+    # N > 0 = N worker processes, each serving WORKER_CONCURRENCY turns at a time,
+    # with conversation histories kept in SESSION_STORE ("memory" or "sqlite:///path").
+    WORKERS = int(os.getenv("WORKERS", "0"))
+    WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "16"))
+    SESSION_STORE = os.getenv("SESSION_STORE", "sqlite:///data/sessions.sqlite3")
+    SESSION_TTL_SECONDS = float(os.getenv("SESSION_TTL_SECONDS", "86400"))  # idle sessions are purged after this
+
+    # Process-wide scheduling of Claude calls (agent/scheduler.py): at most MODEL_MAX_CONCURRENCY
+    # in flight, paced by the rate-limit headers, upset customers / escalations first, and
+    # 429 / overloaded / connection errors retried up to MODEL_MAX_RETRIES times with jittered backoff
+    MODEL_SCHEDULER = os.getenv("MODEL_SCHEDULER", "true").lower() == "true"
+    MODEL_MAX_CONCURRENCY = int(os.getenv("MODEL_MAX_CONCURRENCY", "16"))
+    MODEL_MAX_RETRIES = int(os.getenv("MODEL_MAX_RETRIES", "4"))
+    MODEL_RETRY_BASE_DELAY = float(os.getenv("MODEL_RETRY_BASE_DELAY", "0.5"))  # seconds, doubled per attempt
+    MODEL_RETRY_MAX_DELAY = float(os.getenv("MODEL_RETRY_MAX_DELAY", "20"))
+
+    # Max tool calls from one Claude response that run side by side
+    MAX_PARALLEL_TOOLS = int(os.getenv("MAX_PARALLEL_TOOLS", "4"))
+    # Threads that run tool calls for the whole process: every session's sync turns,
+    # prefetches and batch-mode tickets share them (keep it >= BATCH_TOOL_WORKERS)
+    TOOL_POOL_SIZE = int(os.getenv("TOOL_POOL_SIZE", "64"))
+
 # System Prompt (The "Standard Operating Procedure (SOP)")
     SYSTEM_PROMPT = """
     You are an AI Resolution Agent for a major retailer.
@@ -45,6 +153,7 @@ class Config:
     2. **Preliminary Check**: Call `look_up_order` to check system status.
     3. **Policy Verification (MANDATORY)**: 
        - Call `get_policy_info(policy_type="returns")` immediately to understand rules for this item.
+       - If you already know the item names, pass them as `items` to receive only the rules that apply.
     4. **Risk Assessment**:
        - IF `customer_sentiment` is "angry/annoyed" OR user uses profanity -> Call `escalate_to_human`.
     5. **Decision Logic**:
@@ -0,0 +1,12 @@
+import logging
+
+from config import Config
+
+
+def setup_logging():
+    """Logs to STDOUT (Terminal). Called by entry points (app, workers), never at import of a library module."""
+    logging.basicConfig(
+        level=getattr(logging, Config.LOG_LEVEL.upper(), logging.INFO),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        datefmt='%H:%M:%S'
+    )
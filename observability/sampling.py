@@ -0,0 +1,191 @@
+# sampling.py
+# Span pipeline for production load: head + tail sampling in front of a bounded,
+# non-blocking export queue. Imported by tracing.setup_phoenix_tracing() only
+# (it needs opentelemetry-sdk).
+import collections
+import logging
+import threading
+import time
+
+from opentelemetry.context import _SUPPRESS_INSTRUMENTATION_KEY, attach, detach, set_value
+from opentelemetry.sdk.trace import SpanProcessor
+from opentelemetry.trace import StatusCode
+
+logger = logging.getLogger("Tracing")
+
+TRACE_ID_LOW_BITS = (1 << 64) - 1
+
+
+class _PendingTrace:
+    __slots__ = ("spans", "keep", "touched")
+
+    def __init__(self):
+        self.spans = []
+        self.keep = None  # reason the trace must be exported, if any
+        self.touched = time.monotonic()
+
+
+class SamplingSpanProcessor(SpanProcessor):
+    """
+    Decides which traces are exported and exports them off the request path.
+
+    Head sampling: a fixed `sample_rate` fraction of traces, chosen from the
+    trace id (the same rule as TraceIdRatioBased), is exported as spans end.
+
+    Tail sampling (`tail=True`): spans of the other traces are held until the
+    trace's local root span ends. The trace is still exported if any span
+    failed, any span asked to be kept (`sampling.keep`, e.g. escalations), or
+    the root took at least `slow_ms`. Held traces are bounded
+    (`max_pending_traces` x `max_spans_per_trace`); the oldest go first.
+
+    Export: kept spans go into a queue of at most `max_queue_size` spans,
+    drained in batches by one background thread. When the collector is slow
+    or down, the queue fills up and new spans are dropped (and counted)
+    instead of blocking the agent.
+    """
+
+    def __init__(self, exporter, sample_rate=1.0, tail=True, slow_ms=8000.0,
+                 max_queue_size=2048, max_export_batch_size=256, schedule_delay_ms=1000.0,
+                 max_pending_traces=512, max_spans_per_trace=256, pending_timeout_seconds=300.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.tail = tail
+        self.slow_ms = slow_ms
+        self.max_queue_size = max_queue_size
+        self.max_export_batch_size = max_export_batch_size
+        self.schedule_delay = schedule_delay_ms / 1000
+        self.max_pending_traces = max_pending_traces
+        self.max_spans_per_trace = max_spans_per_trace
+        self.pending_timeout_seconds = pending_timeout_seconds
+
+        self._head_bound = round(min(max(sample_rate, 0.0), 1.0) * (TRACE_ID_LOW_BITS + 1))
+        self._pending = collections.OrderedDict()  # trace id -> _PendingTrace, oldest first
+        self._queue = collections.deque()
+        self._lock = threading.Lock()
+        self._export_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._shutdown = False
+        self.counts = collections.Counter()
+
+        self._worker = threading.Thread(target=self._export_forever, name="span-exporter", daemon=True)
+        self._worker.start()
+
+    # ---------------------------------------------------------
+    # Sampling (called by the SDK as each span ends)
+    # ---------------------------------------------------------
+    def head_sampled(self, trace_id):
+        return (trace_id & TRACE_ID_LOW_BITS) < self._head_bound
+
+    def on_end(self, span):
+        trace_id = span.context.trace_id
+        if self.head_sampled(trace_id):
+            self._enqueue([span], "head")
+            return
+        if not self.tail:
+            with self._lock:
+                self.counts["sampled_out"] += 1
+            return
+
+        is_root = span.parent is None or span.parent.is_remote
+        with self._lock:
+            pending = self._pending.pop(trace_id, None) or _PendingTrace()
+            if len(pending.spans) < self.max_spans_per_trace:
+                pending.spans.append(span)
+            else:
+                self.counts["dropped_trace_too_long"] += 1
+            pending.keep = pending.keep or self._keep_reason(span, is_root)
+            pending.touched = time.monotonic()
+
+            if not is_root:
+                self._pending[trace_id] = pending  # re-inserted as the newest
+                self._evict_locked()
+                return
+
+        if pending.keep:
+            self._enqueue(pending.spans, pending.keep)
+        else:
+            with self._lock:
+                self.counts["sampled_out"] += len(pending.spans)
+
+    def _keep_reason(self, span, is_root):
+        if span.status.status_code is StatusCode.ERROR:
+            return "error"
+        keep = span.attributes.get("sampling.keep")
+        if keep:
+            return str(keep)
+        if is_root and span.end_time and (span.end_time - span.start_time) / 1e6 >= self.slow_ms:
+            return "slow"
+        return None
+
+    def _evict_locked(self):
+        # Traces whose root never ends (or a burst of concurrent ones) must not grow without bound
+        now = time.monotonic()
+        while self._pending:
+            trace_id, oldest = next(iter(self._pending.items()))
+            if len(self._pending) <= self.max_pending_traces and now - oldest.touched < self.pending_timeout_seconds:
+                break
+            del self._pending[trace_id]
+            self.counts["dropped_pending_overflow"] += len(oldest.spans)
+
+    # ---------------------------------------------------------
+    # Bounded export queue
+    # ---------------------------------------------------------
+    def _enqueue(self, spans, reason):
+        with self._lock:
+            room = self.max_queue_size - len(self._queue)
+            accepted = spans[:max(room, 0)]
+            self._queue.extend(accepted)
+            self.counts[f"kept_{reason}"] += len(accepted)
+            dropped = len(spans) - len(accepted)
+            if dropped:
+                self.counts["dropped_queue_full"] += dropped
+                first_drop = self.counts["dropped_queue_full"] == dropped
+            full_batch = len(self._queue) >= self.max_export_batch_size
+
+        if dropped and first_drop:
+            logger.warning(f"TRACING: Export queue full ({self.max_queue_size} spans), dropping spans; "
+                           f"is the collector reachable?")
+        if full_batch:
+            self._wakeup.set()
+
+    def _export_forever(self):
+        while not self._shutdown:
+            self._wakeup.wait(self.schedule_delay)
+            self._wakeup.clear()
+            self._export_batches()
+
+    def _export_batches(self, deadline=None):
+        with self._export_lock:
+            while deadline is None or time.monotonic() < deadline:
+                with self._lock:
+                    batch = [self._queue.popleft() for _ in range(min(self.max_export_batch_size, len(self._queue)))]
+                if not batch:
+                    return True
+                # Don't trace the exporter's own network calls
+                token = attach(set_value(_SUPPRESS_INSTRUMENTATION_KEY, True))
+                try:
+                    result = self.exporter.export(batch)
+                    outcome = "exported" if getattr(result, "name", "SUCCESS") == "SUCCESS" else "export_failed"
+                except Exception as e:
+                    logger.warning(f"TRACING: Span export failed: {e}")
+                    outcome = "export_failed"
+                finally:
+                    detach(token)
+                with self._lock:
+                    self.counts[outcome] += len(batch)
+            return False
+
+    def stats(self):
+        """Span counts by outcome (kept_<reason>, exported, sampled_out, dropped_*) plus the current backlog."""
+        with self._lock:
+            return {**self.counts, "queued": len(self._queue), "pending_traces": len(self._pending)}
+
+    def force_flush(self, timeout_millis=30000):
+        return self._export_batches(deadline=time.monotonic() + timeout_millis / 1000)
+
+    def shutdown(self):
+        self._shutdown = True
+        self._wakeup.set()
+        self._worker.join(timeout=5)
+        self.force_flush(timeout_millis=5000)  # bounded: a dead collector must not hang process exit
+        self.exporter.shutdown()
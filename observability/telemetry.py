@@ -0,0 +1,161 @@
+# telemetry.py
+# Explicit spans and metrics for the agent loop, tool dispatch, service calls
+# and graph queries (the Anthropic calls themselves are auto-instrumented).
+#
+# Everything here is a no-op until tracing.setup_phoenix_tracing() has installed an
+# OpenTelemetry provider and called enable(), so agent/service code can call
+# these helpers unconditionally without importing OpenTelemetry up front.
+import functools
+import time
+from contextlib import contextmanager
+
+TRACER_NAME = "enterprise-cx-agent"
+
+_otel = None  # (trace module, tracer, {instrument name: instrument}) once enabled
+
+
+class _NoopSpan:
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+    def record_exception(self, exception, attributes=None):
+        pass
+
+    def set_status(self, status, description=None):
+        pass
+
+    def end(self):
+        pass
+
+    def is_recording(self):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+def enable(span_stats=None):
+    """
+    Creates the tracer and metric instruments. Called once a provider is installed.
+    `span_stats` (callable -> {outcome: count}) is exported as the tracing.spans counter,
+    so sampled-out and dropped spans are visible.
+    """
+    global _otel
+    from opentelemetry import metrics, trace
+
+    meter = metrics.get_meter(TRACER_NAME)
+    instruments = {
+        "turn": meter.create_histogram("agent.turn.duration", unit="ms", description="One user turn, end to end"),
+        "iteration": meter.create_histogram("agent.iteration.duration", unit="ms",
+                                            description="One Re-Act iteration (model call + its tools)"),
+        "tool": meter.create_histogram("agent.tool.duration", unit="ms", description="One tool dispatch"),
+        "service": meter.create_histogram("service.call.duration", unit="ms",
+                                          description="One EnterpriseServices call"),
+        "tokens": meter.create_counter("agent.llm.tokens", unit="{token}",
+                                       description="Tokens by type (input, output, cache_read, cache_write)"),
+        "graph_rows": meter.create_histogram("graph.query.rows", unit="{row}", description="Rows returned by a Kùzu query"),
+    }
+    if span_stats is not None:
+        def observe(options):
+            return [metrics.Observation(count, {"outcome": outcome}) for outcome, count in span_stats().items()
+                    if outcome not in ("queued", "pending_traces")]
+        meter.create_observable_counter("tracing.spans", callbacks=[observe], unit="{span}",
+                                        description="Spans by pipeline outcome (kept_*, exported, sampled_out, dropped_*)")
+    _otel = (trace, trace.get_tracer(TRACER_NAME), instruments)
+
+
+def enabled():
+    return _otel is not None
+
+
+@contextmanager
+def span(name, attributes=None, metric=None, metric_attributes=None):
+    """
+    Runs the block inside a new current span (child of whatever span is active).
+    If `metric` names a duration histogram, the block's wall time is recorded to it too,
+    with `metric_attributes` as they are when the block exits (the caller may fill them in).
+    Exceptions are recorded on the span and re-raised.
+    """
+    if _otel is None:
+        yield NOOP_SPAN
+        return
+
+    _, tracer, instruments = _otel
+    start = time.perf_counter()
+    try:
+        with tracer.start_as_current_span(name, attributes=attributes) as current:
+            yield current
+    finally:
+        if metric:
+            instruments[metric].record((time.perf_counter() - start) * 1000, metric_attributes or {})
+
+
+def traced(name, **attributes):
+    """Decorator: wraps every call in `span(name)` and records it in the service duration histogram."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _otel is None:
+                return func(*args, **kwargs)
+            with span(name, attributes, metric="service", metric_attributes={"operation": name}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span():
+    """The active span, e.g. to add attributes from inside a traced function."""
+    if _otel is None:
+        return NOOP_SPAN
+    return _otel[0].get_current_span()
+
+
+def keep_trace(reason):
+    """Asks the tail sampler to export the current trace whatever the sample rate (e.g. escalations)."""
+    current_span().set_attribute("sampling.keep", reason)
+
+
+def mark_error(target, message):
+    """Marks `target` as failed (error traces are always exported), for errors returned rather than raised."""
+    if _otel is None:
+        return
+    from opentelemetry.trace import Status, StatusCode
+    target.set_status(Status(StatusCode.ERROR, message))
+
+
+def record_usage(target, usage):
+    """Token usage of one Messages API response, on `target` span and in the token counter."""
+    if _otel is None or usage is None:
+        return
+    counts = {
+        "input": usage.input_tokens or 0,
+        "output": usage.output_tokens or 0,
+        "cache_read": getattr(usage, "cache_read_input_tokens", 0) or 0,
+        "cache_write": getattr(usage, "cache_creation_input_tokens", 0) or 0,
+    }
+    target.set_attributes({
+        "gen_ai.usage.input_tokens": counts["input"],
+        "gen_ai.usage.output_tokens": counts["output"],
+        "gen_ai.usage.cache_read_input_tokens": counts["cache_read"],
+        "gen_ai.usage.cache_creation_input_tokens": counts["cache_write"],
+    })
+    tokens = _otel[2]["tokens"]
+    for token_type, count in counts.items():
+        if count:
+            tokens.add(count, {"type": token_type})
+
+
+def record_rows(target, rows, query_name):
+    if _otel is None:
+        return
+    target.set_attribute("db.response.returned_rows", rows)
+    _otel[2]["graph_rows"].record(rows, {"query": query_name})
+
+
+def record_tool(tool_name, seconds, status):
+    if _otel is None:
+        return
+    _otel[2]["tool"].record(seconds * 1000, {"tool": tool_name, "status": status})
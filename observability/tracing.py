@@ -1,28 +1,126 @@
 # tracing.py
-from opentelemetry import trace
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
-from openinference.instrumentation.anthropic import AnthropicInstrumentor
+# The OpenTelemetry / OpenInference packages are imported inside setup_phoenix_tracing():
+# the gRPC exporter alone adds a noticeable chunk of cold-start time, so processes
+# that never trace (scripts, benchmarks, tracing disabled) don't pay for it.
+import logging
+import os
+import threading
+
+from config import Config
+from observability import telemetry
+
+logger = logging.getLogger("Tracing")
+
+_setup_lock = threading.Lock()
+_tracing_enabled = None  # None = not set up yet
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICE_NAME = "enterprise-cx-agent"
+
+
+def _json_lines(item):
+    return item.to_json(indent=None) + os.linesep
+
+
+def _local_output():
+    """Stream for the console/file exporters (the file is opened for the life of the process)."""
+    if Config.TRACE_EXPORTER == "console":
+        return None  # exporters default to stdout
+    path = Config.TRACE_FILE or os.path.join(BASE_DIR, "data", "traces.jsonl")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    return open(path, "a", buffering=1)
+
 
 def setup_phoenix_tracing():
     """
-    Configures the application to send traces to a local Arize Phoenix server.
+    Configures OpenTelemetry tracing. By default spans go to a local Arize Phoenix
+    server; TRACE_EXPORTER=console|file writes spans and metrics locally instead.
+    Safe to call more than once (e.g. on first use in every worker process):
+    only the first call does the setup. Returns True if tracing is on.
     """
-    # 1. Initialize the Tracer Provider (The core OTEL engine)
-    tracer_provider = TracerProvider()
-    trace.set_tracer_provider(tracer_provider)
-
-    # 2. Configure the Exporter (Where to send data)
-    # Phoenix listens on localhost:4317 (gRPC) by default for OTEL data
-    phoenix_exporter = OTLPSpanExporter(endpoint="http://127.0.0.1:4317")
-
-    # 3. Add the processor (Batches logs for performance)
-    span_processor = BatchSpanProcessor(phoenix_exporter)
-    tracer_provider.add_span_processor(span_processor)
-
-    # 4. Auto-Instrument Anthropic
-    # This magically wraps every client.messages.create() call
-    AnthropicInstrumentor().instrument(tracer_provider=tracer_provider)
-    
-    print("🔭 Observability: Tracing enabled. Sending to Phoenix (localhost:6006)")
\ No newline at end of file
+    global _tracing_enabled
+    with _setup_lock:
+        if _tracing_enabled is not None:
+            return _tracing_enabled
+
+        try:
+            from opentelemetry import metrics, trace
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import SpanLimits, TracerProvider
+            from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+            from opentelemetry.sdk.trace.sampling import ALWAYS_ON, ParentBased, TraceIdRatioBased
+            from observability.sampling import SamplingSpanProcessor
+        except ImportError as e:
+            logger.warning(f"TRACING: Disabled, observability packages not installed ({e})")
+            _tracing_enabled = False
+            return False
+
+        # 1. Initialize the Tracer Provider (The core OTEL engine)
+        # With tail sampling every span is recorded, and the processor decides per trace.
+        # Without it, unsampled turns are not recorded at all (cheapest).
+        resource = Resource.create({"service.name": SERVICE_NAME})
+        tracer_provider = TracerProvider(
+            resource=resource,
+            sampler=ALWAYS_ON if Config.TRACE_TAIL_SAMPLING else ParentBased(TraceIdRatioBased(Config.TRACE_SAMPLE_RATE)),
+            # Caps full prompts / tool results so a span costs the same however big the payload
+            span_limits=SpanLimits(max_attribute_length=Config.TRACE_MAX_ATTRIBUTE_LENGTH),
+        )
+        # Truncation is the intended behaviour, not worth a warning per span
+        logging.getLogger("opentelemetry.attributes").setLevel(logging.ERROR)
+
+        # 2. Configure the Exporter (Where to send data)
+        if Config.TRACE_EXPORTER in ("console", "file"):
+            from opentelemetry.sdk.metrics import MeterProvider
+            from opentelemetry.sdk.metrics.export import ConsoleMetricExporter, PeriodicExportingMetricReader
+
+            out = _local_output()
+            output = {"out": out} if out else {}
+            span_exporter = ConsoleSpanExporter(formatter=_json_lines, **output)
+            metric_reader = PeriodicExportingMetricReader(
+                ConsoleMetricExporter(formatter=_json_lines, **output),
+                export_interval_millis=Config.METRICS_EXPORT_INTERVAL_MS,
+            )
+            metrics.set_meter_provider(MeterProvider(resource=resource, metric_readers=[metric_reader]))
+            destination = getattr(out, "name", "stdout")
+        else:
+            try:
+                from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+            except ImportError as e:
+                logger.warning(f"TRACING: Disabled, OTLP exporter not installed ({e}); "
+                               f"set TRACE_EXPORTER=console or file to trace locally")
+                _tracing_enabled = False
+                return False
+            # Phoenix listens on localhost:4317 (gRPC) by default for OTEL data
+            span_exporter = OTLPSpanExporter(endpoint=Config.TRACE_OTLP_ENDPOINT,
+                                             timeout=Config.TRACE_EXPORT_TIMEOUT_SECONDS)
+            destination = Config.TRACE_OTLP_ENDPOINT
+
+        # 3. Add the processor (samples, then batches spans to the exporter off the request path)
+        span_processor = SamplingSpanProcessor(
+            span_exporter,
+            sample_rate=Config.TRACE_SAMPLE_RATE,
+            tail=Config.TRACE_TAIL_SAMPLING,
+            slow_ms=Config.TRACE_SLOW_TURN_MS,
+            max_queue_size=Config.TRACE_QUEUE_SIZE,
+            max_export_batch_size=Config.TRACE_EXPORT_BATCH_SIZE,
+        )
+        tracer_provider.add_span_processor(span_processor)
+        trace.set_tracer_provider(tracer_provider)
+
+        # 4. Auto-Instrument Anthropic
+        # This magically wraps every client.messages.create() call
+        try:
+            from openinference.instrumentation.anthropic import AnthropicInstrumentor
+            AnthropicInstrumentor().instrument(tracer_provider=tracer_provider)
+        except ImportError:
+            logger.warning("TRACING: openinference-instrumentation-anthropic not installed, "
+                           "LLM calls are covered by the agent's own spans only")
+
+        # 5. The agent's own spans and metrics (turns, tools, services, graph queries)
+        telemetry.enable(span_stats=span_processor.stats)
+
+        sampling = f"{Config.TRACE_SAMPLE_RATE:.0%} of turns" + (
+            f" + errors/escalations/turns over {Config.TRACE_SLOW_TURN_MS:.0f}ms" if Config.TRACE_TAIL_SAMPLING else "")
+        print(f"🔭 Observability: Tracing enabled ({sampling}). Sending to {destination}")
+        _tracing_enabled = True
+        return True
@@ -1,12 +1,46 @@
+import argparse
+import csv
+import json
 import kuzu
 import shutil
 import os
+import sys
+import tempfile
+import time
 
 # Ensure paths are correct relative to this script
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 DB_PATH = os.path.join(BASE_DIR, "data", "context_graph_db")
 
-def init_db():
+DEFAULT_BATCH_SIZE = 50_000
+
+# Seed data: the demo's 3 Exception Scenarios
+SEED_CASES = [
+    # --- SCENARIO 1: VIP Socks ---
+    {
+        "id": "PREC-VIP-001",
+        "decision": "APPROVE",
+        "rationale": "VIP customers are allowed to return Final Sale apparel as a one-time loyalty courtesy.",
+        "tags": ['socks', 'vip', 'exception', 'apparel']
+    },
+    # --- SCENARIO 2: Holiday Gifts ---
+    {
+        "id": "PREC-HOL-002",
+        "decision": "APPROVE",
+        "rationale": "Holiday gifts purchased in Dec have an extended 60-day return window.",
+        "tags": ['holiday', 'gift', 'late', 'extension', 'december']
+    },
+    # --- SCENARIO 3: High-Value Tech ---
+    {
+        "id": "PREC-TECH-003",
+        "decision": "APPROVE",
+        "rationale": "High-Value customers (> $5k spend) allowed one opened tech return per year.",
+        "tags": ['monitor', 'electronics', 'opened', 'high_value', 'tech']
+    },
+]
+
+
+def reset_db():
     # Ensure 'data' folder exists
     os.makedirs(os.path.join(BASE_DIR, "data"), exist_ok=True)
 
@@ -18,66 +52,193 @@ def init_db():
         else:
             shutil.rmtree(DB_PATH) # Use rmtree for folders
             print(f"🗑️  Cleared existing database folder at {DB_PATH}")
-    
+
+
+def open_db():
+    """Opens (or creates) the graph and makes sure the schema exists."""
+    os.makedirs(os.path.join(BASE_DIR, "data"), exist_ok=True)
     db = kuzu.Database(DB_PATH)
     conn = kuzu.Connection(db)
-    
-    print(f"⚙️  Initializing Kùzu Graph Database at {DB_PATH}...")
 
-    conn.execute("CREATE NODE TABLE SupportCase(id STRING, decision STRING, rationale STRING, PRIMARY KEY (id))")
-    conn.execute("CREATE NODE TABLE Tag(name STRING, PRIMARY KEY (name))")
-    conn.execute("CREATE REL TABLE HAS_TAG(FROM SupportCase TO Tag)")
-    
-    # --- SCENARIO 1: VIP Socks ---
-    conn.execute("""
-        CREATE (c:SupportCase {
-            id: 'PREC-VIP-001', 
-            decision: 'APPROVE', 
-            rationale: 'VIP customers are allowed to return Final Sale apparel as a one-time loyalty courtesy.'
-        })
-    """)
-    tags_1 = ['socks', 'vip', 'exception', 'apparel']
+    conn.execute("CREATE NODE TABLE IF NOT EXISTS SupportCase(id STRING, decision STRING, rationale STRING, PRIMARY KEY (id))")
+    conn.execute("CREATE NODE TABLE IF NOT EXISTS Tag(name STRING, PRIMARY KEY (name))")
+    conn.execute("CREATE REL TABLE IF NOT EXISTS HAS_TAG(FROM SupportCase TO Tag)")
+    # Write version of the precedent data, bumped by every upsert (see services/precedent_index.py)
+    conn.execute("CREATE NODE TABLE IF NOT EXISTS GraphMeta(key STRING, version INT64, PRIMARY KEY (key))")
+    return db, conn
 
-    # --- SCENARIO 2: Holiday Gifts ---
-    conn.execute("""
-        CREATE (c:SupportCase {
-            id: 'PREC-HOL-002', 
-            decision: 'APPROVE', 
-            rationale: 'Holiday gifts purchased in Dec have an extended 60-day return window.'
-        })
-    """)
-    tags_2 = ['holiday', 'gift', 'late', 'extension', 'december']
 
-    # --- SCENARIO 3: High-Value Tech ---
-    conn.execute("""
-        CREATE (c:SupportCase {
-            id: 'PREC-TECH-003', 
-            decision: 'APPROVE', 
-            rationale: 'High-Value customers (> $5k spend) allowed one opened tech return per year.'
-        })
-    """)
-    tags_3 = ['monitor', 'electronics', 'opened', 'high_value', 'tech']
-
-    # --- Create Tags & Edges ---
-    all_tags = list(set(tags_1 + tags_2 + tags_3)) 
-    
-    for tag in all_tags:
-        conn.execute(f"CREATE (:Tag {{name: '{tag}'}})")
-
-    def link_case(case_id, tags):
-        for tag in tags:
-            # FIX: Updated MATCH clause to use SupportCase
-            conn.execute(f"""
-                MATCH (c:SupportCase), (t:Tag) 
-                WHERE c.id = '{case_id}' AND t.name = '{tag}' 
-                CREATE (c)-[:HAS_TAG]->(t)
-            """)
-
-    link_case('PREC-VIP-001', tags_1)
-    link_case('PREC-HOL-002', tags_2)
-    link_case('PREC-TECH-003', tags_3)
-    
+# ---------------------------------------------------------
+# Case export readers (CSV / JSONL / Parquet)
+# Every record needs: id, decision, rationale, tags
+# `tags` is a list, or a string separated by spaces, commas or '|'
+# ---------------------------------------------------------
+def read_cases(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        with open(path, newline="") as f:
+            yield from csv.DictReader(f)
+    elif ext in (".jsonl", ".ndjson"):
+        with open(path) as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif ext == ".parquet":
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            sys.exit("❌ Parquet input needs pyarrow: pip install pyarrow")
+        for batch in pq.ParquetFile(path).iter_batches():
+            yield from batch.to_pylist()
+    else:
+        sys.exit(f"❌ Unsupported export format '{ext}' (use .csv, .jsonl or .parquet)")
+
+
+def normalize_tags(tags):
+    if isinstance(tags, str):
+        tags = tags.replace("|", " ").replace(",", " ").split()
+    # Same normalization check_precedents applies to query tags
+    return sorted({t.strip().lower() for t in tags or [] if t.strip()})
+
+
+def batched(records, batch_size):
+    batch = {}
+    for record in records:
+        # Later rows for the same case win (latest export state)
+        batch[str(record["id"])] = record
+        if len(batch) >= batch_size:
+            yield list(batch.values())
+            batch = {}
+    if batch:
+        yield list(batch.values())
+
+
+# ---------------------------------------------------------
+# Bulk upsert
+# ---------------------------------------------------------
+def _write_csv(path, rows):
+    with open(path, "w", newline="") as f:
+        csv.writer(f).writerows(rows)
+
+
+def _fetch_column(conn, query, parameters):
+    result = conn.execute(query, parameters)
+    values = set()
+    while result.has_next():
+        values.add(result.get_next()[0])
+    return values
+
+
+def _copy(conn, table, path, rows):
+    # The parallel CSV reader rejects quoted newlines (multi-line rationales)
+    parallel = not any("\n" in value or "\r" in value for row in rows for value in map(str, row))
+    _write_csv(path, rows)
+    conn.execute(f"COPY {table} FROM '{path}' (HEADER=false, PARALLEL={str(parallel).lower()})")
+
+
+def _rollback(conn):
+    try:
+        conn.execute("ROLLBACK")
+    except RuntimeError:
+        pass  # Kùzu already rolled back the transaction when the failing statement raised
+
+
+def upsert_batch(conn, batch, tmp_dir):
+    """
+    Loads one batch of cases with COPY FROM, in one transaction.
+    Cases that already exist are detached and deleted first, then the whole
+    batch (cases, new tags, edges) is bulk-copied, so an update replaces the
+    case's fields and its tag edges. Per-row SET is far slower than delete + COPY.
+    If any step fails, the batch is rolled back and the existing cases are kept.
+    """
+    conn.execute("BEGIN TRANSACTION")
+    try:
+        counts = _upsert(conn, batch, tmp_dir)
+        conn.execute("COMMIT")
+    except Exception:
+        _rollback(conn)
+        raise
+    return counts
+
+
+def _upsert(conn, batch, tmp_dir):
+    ids = [str(r["id"]) for r in batch]
+    # UNWIND + key match does a primary-key lookup per id (WHERE ... IN $list scans the table)
+    existing = _fetch_column(conn, "UNWIND $ids AS id MATCH (c:SupportCase {id: id}) RETURN c.id", {"ids": ids})
+    if existing:
+        conn.execute("UNWIND $ids AS id MATCH (c:SupportCase {id: id}) DETACH DELETE c", {"ids": list(existing)})
+
+    tags_by_case = {str(r["id"]): normalize_tags(r.get("tags")) for r in batch}
+    all_tags = sorted({t for tags in tags_by_case.values() for t in tags})
+    known_tags = _fetch_column(conn, "UNWIND $names AS name MATCH (t:Tag {name: name}) RETURN t.name", {"names": all_tags})
+
+    cases = [[str(r["id"]), r["decision"], r["rationale"]] for r in batch]
+    new_tags = [[t] for t in all_tags if t not in known_tags]
+    edges = [[case_id, tag] for case_id, tags in tags_by_case.items() for tag in tags]
+
+    for table, rows in (("SupportCase", cases), ("Tag", new_tags), ("HAS_TAG", edges)):
+        if not rows:
+            continue
+        _copy(conn, table, os.path.join(tmp_dir, f"{table}.csv"), rows)
+
+    # Counts alone miss an in-place update (same cases, same number of edges)
+    conn.execute("MERGE (m:GraphMeta {key: 'precedents'}) "
+                 "ON CREATE SET m.version = 1 ON MATCH SET m.version = m.version + 1")
+    return len(cases) - len(existing), len(existing), len(edges)
+
+
+def ingest(conn, records, batch_size=DEFAULT_BATCH_SIZE):
+    start = time.perf_counter()
+    inserted = updated = edges = 0
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for i, batch in enumerate(batched(records, batch_size), start=1):
+            n_new, n_updated, n_edges = upsert_batch(conn, batch, tmp_dir)
+            inserted += n_new
+            updated += n_updated
+            edges += n_edges
+
+            elapsed = time.perf_counter() - start
+            print(f"  📦 Batch {i}: {inserted + updated} cases so far "
+                  f"({(inserted + updated) / elapsed:,.0f} rows/s)")
+
+    elapsed = time.perf_counter() - start
+    total = inserted + updated
+    print(f"✅ Ingested {total} cases ({inserted} new, {updated} updated), {edges} tag edges "
+          f"in {elapsed:.2f}s -> {total / elapsed if elapsed else 0:,.0f} rows/s")
+    return total
+
+
+def init_db():
+    reset_db()
+    db, conn = open_db()
+
+    print(f"⚙️  Initializing Kùzu Graph Database at {DB_PATH}...")
+    ingest(conn, SEED_CASES)
+
     print("✅ Graph initialized with 3 Exception Scenarios!")
 
+
+def main():
+    parser = argparse.ArgumentParser(description="Initialize or bulk-load the precedent Context Graph.")
+    parser.add_argument("--ingest", metavar="PATH",
+                        help="Case export to load (.csv, .jsonl or .parquet). Upserts into the existing graph.")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Cases per COPY batch (default {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--reset", action="store_true",
+                        help="With --ingest: wipe the graph before loading")
+    args = parser.parse_args()
+
+    if not args.ingest:
+        init_db()
+        return
+
+    if args.reset:
+        reset_db()
+    db, conn = open_db()
+    print(f"⚙️  Loading {args.ingest} into {DB_PATH}...")
+    ingest(conn, read_cases(args.ingest), batch_size=args.batch_size)
+
+
 if __name__ == "__main__":
-    init_db()
\ No newline at end of file
+    main()
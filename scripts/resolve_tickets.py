@@ -0,0 +1,98 @@
+"""
+Resolves a backlog of support tickets offline with the agent's SOP.
+
+Input is JSONL, one ticket per line: {"id": "...", "message": "..."}
+("text" or "body" are accepted for the message; the line number is used
+if there is no id). Results are appended to the output file, one JSON line
+per ticket, as soon as each ticket is resolved:
+    {"id", "status": "resolved" | "failed", "path": "fast" | "cache" | "model",
+     "answer" | "error", "model_calls"}
+
+Model steps go through the Message Batches API (see agent/batch.py), so
+set ANTHROPIC_BASE_URL to run against a local stand-in, e.g.
+    python benchmarks/fake_api.py --port 8765 --batch-latency-ms 500
+
+Usage:
+    python scripts/resolve_tickets.py tickets.jsonl --out data/ticket_results.jsonl
+    python scripts/resolve_tickets.py tickets.jsonl --poll-interval 2 --tool-workers 64
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from config import Config  # noqa: E402
+
+
+def read_tickets(path):
+    tickets = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            message = record.get("message") or record.get("text") or record.get("body")
+            if not message:
+                sys.exit(f"❌ {path}:{line_number}: ticket has no message")
+            tickets.append({"id": str(record.get("id", line_number)), "message": message})
+    return tickets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resolve a JSONL backlog of tickets via the Message Batches API")
+    parser.add_argument("tickets", help="Input JSONL file")
+    parser.add_argument("--out", default=os.path.join(BASE_DIR, "data", "ticket_results.jsonl"),
+                        help="Output JSONL file (appended to)")
+    parser.add_argument("--poll-interval", type=float, default=Config.BATCH_POLL_INTERVAL,
+                        help="Seconds between batch status checks")
+    parser.add_argument("--tool-workers", type=int, default=Config.BATCH_TOOL_WORKERS,
+                        help="Tickets whose tools run at the same time")
+    parser.add_argument("--max-rounds", type=int, default=Config.BATCH_MAX_ROUNDS,
+                        help="Model calls per ticket before it is marked failed")
+    args = parser.parse_args()
+
+    import anthropic
+    from agent.batch import BatchRunner
+    from observability.logs import setup_logging
+    from observability.tracing import setup_phoenix_tracing
+    from services.services import EnterpriseServices
+
+    setup_logging()
+    if Config.TRACING:
+        setup_phoenix_tracing()
+
+    tickets = read_tickets(args.tickets)
+    print(f"🚀 Resolving {len(tickets)} tickets from {args.tickets}")
+
+    client = anthropic.Anthropic(api_key=Config.ANTHROPIC_API_KEY, base_url=Config.ANTHROPIC_BASE_URL)
+    runner = BatchRunner(client, tool_workers=args.tool_workers, poll_interval=args.poll_interval,
+                         max_batch_requests=Config.BATCH_MAX_REQUESTS, max_rounds=args.max_rounds)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    paths = {}
+    start = time.perf_counter()
+    with open(args.out, "a") as out:
+        def write(record):
+            out.write(json.dumps(record) + "\n")
+            out.flush()  # results stream out as tickets finish
+            paths[record["path"]] = paths.get(record["path"], 0) + 1
+
+        counts = runner.run(tickets, on_result=write)
+    elapsed = time.perf_counter() - start
+
+    # Refunds and escalation tickets go out through the outbox: deliver them before exiting
+    if not EnterpriseServices.outbox.flush(timeout=60):
+        print(f"⚠️  Outbox not fully drained: {EnterpriseServices.outbox.stats()}")
+
+    print(f"📊 {counts['resolved']} resolved, {counts['failed']} failed in {elapsed:.1f}s "
+          f"({len(tickets) / elapsed:.1f} tickets/s) | by path: {paths} | results: {args.out}")
+    if counts["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
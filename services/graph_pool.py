@@ -0,0 +1,72 @@
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+
+from observability import telemetry
+
+logger = logging.getLogger("GraphPool")
+
+
+class GraphConnectionPool:
+    """
+    Fixed-size pool of Kùzu connections over one shared Database.
+
+    Queries run with bound parameters (`Connection.execute(query, params)`),
+    so user input never ends up in the query text. Concurrent sessions
+    each borrow their own connection instead of serializing on one.
+    """
+
+    def __init__(self, db_path, size=4, timeout=5.0, read_only=False):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        # Read-only opens don't take the write lock, so several processes can share the files
+        self.read_only = read_only
+        self.db = None
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.db is not None
+
+    def open(self):
+        """Opens the database and its connections. Raises if the database cannot be opened."""
+        import kuzu  # deferred: only processes that query the graph pay for the import
+
+        with self._lock:
+            if self.db is not None:
+                return
+            db = kuzu.Database(self.db_path, read_only=self.read_only)
+            for _ in range(self.size):
+                self._idle.put(kuzu.Connection(db))
+            self.db = db
+        mode = " (read-only)" if self.read_only else ""
+        logger.info(f"GRAPH POOL: Opened {self.size} connections to {self.db_path}{mode}")
+
+    @contextmanager
+    def connection(self):
+        """Borrows a connection for the duration of the `with` block."""
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No graph connection available within {self.timeout}s (pool size {self.size}).")
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def execute(self, query, parameters=None, name="query"):
+        """
+        Runs a parameterized query and returns all rows as a list.
+        `name` labels the query in traces and metrics (the text is recorded too).
+        """
+        attributes = {"db.system": "kuzu", "db.operation.name": name, "db.query.text": " ".join(query.split())}
+        with telemetry.span("graph.query", attributes) as span, self.connection() as conn:
+            result = conn.execute(query, parameters or {})
+            rows = []
+            while result.has_next():
+                rows.append(result.get_next())
+            telemetry.record_rows(span, len(rows), name)
+            return rows
@@ -0,0 +1,188 @@
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+
+logger = logging.getLogger("OMS")
+
+# Demo order data, served by MockOMS and by the stub server (benchmarks/fake_oms.py)
+MOCK_ORDERS = {
+    "ORD-123": {"status": "shipped", "items": ["Wireless Headphones"], "eligible_for_return": True, "customer_sentiment": "neutral"},
+    "ORD-456": {"status": "delivered", "items": ["Gaming Mouse"], "eligible_for_return": False, "return_reason": "window_expired", "customer_sentiment": "neutral"},
+    "ORD-999": {"status": "processing", "items": ["4K Monitor"], "eligible_for_return": True, "customer_sentiment": "angry"},
+    "ORD-777": {"status": "delivered", "items": ["Premium Wool Socks"], "eligible_for_return": True, "customer_sentiment": "neutral"},
+    "ORD-888": {"status": "delivered", "items": ["$50 PlayStation Store Card"], "eligible_for_return": True, "customer_sentiment": "neutral"},
+    "ORD-555": {"status": "delivered", "items": ["Luxury Night Cream"], "eligible_for_return": True, "customer_sentiment": "positive"}
+}
+
+
+# ---------------------------------------------------------
+# Adapters: where order data comes from
+# ---------------------------------------------------------
+class OMSAdapter(ABC):
+    """
+    Order Management System backend.
+    `get_orders(ids)` returns {order_id: order} for the ids that exist;
+    unknown ids are simply absent. Errors are raised.
+    """
+
+    # Whether lookups should be grouped into bulk requests (remote backends)
+    batched = False
+
+    @abstractmethod
+    def get_orders(self, order_ids):
+        ...
+
+
+class MockOMS(OMSAdapter):
+    """In-memory demo data (the default when no OMS_BASE_URL is configured)."""
+
+    def __init__(self, orders=None):
+        self.orders = MOCK_ORDERS if orders is None else orders
+
+    def get_orders(self, order_ids):
+        return {order_id: self.orders[order_id] for order_id in order_ids if order_id in self.orders}
+
+
+class HttpOMS(OMSAdapter):
+    """
+    OMS over HTTP: `GET {base_url}/orders?ids=ORD-1,ORD-2` -> {"orders": {id: order}}.
+    One keep-alive connection pool is shared by every session in the process.
+    """
+
+    batched = True
+
+    def __init__(self, base_url, timeout=5.0, pool_size=16, api_key=None):
+        import httpx  # ships with the anthropic SDK
+
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self.client = httpx.Client(
+            base_url=base_url,
+            timeout=timeout,
+            headers=headers,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    def get_orders(self, order_ids):
+        response = self.client.get("/orders", params={"ids": ",".join(order_ids)})
+        response.raise_for_status()
+        return response.json().get("orders", {})
+
+    def close(self):
+        self.client.close()
+
+
+# ---------------------------------------------------------
+# Lookup front end: read cache, coalescing and micro-batching
+# ---------------------------------------------------------
+class OrderLookup:
+    """
+    Serves single-order lookups on top of an OMSAdapter.
+
+    - Results (including "not found") are cached for `cache_ttl` seconds.
+    - Concurrent lookups of the same order share one in-flight request.
+    - For batched adapters, lookups arriving within `batch_window` seconds
+      are sent together as one bulk request (at most `max_batch` ids).
+    """
+
+    def __init__(self, adapter, cache_ttl=2.0, batch_window=0.005, max_batch=50,
+                 max_in_flight=4, timeout=10.0, max_cache_entries=10_000):
+        self.adapter = adapter
+        self.cache_ttl = cache_ttl
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.timeout = timeout
+        self.max_cache_entries = max_cache_entries
+
+        self._cache = {}      # order_id -> (order or None, expires_at)
+        self._in_flight = {}  # order_id -> Future shared by every waiting caller
+        self._queue = []      # order ids waiting for the next batch
+        self._cond = threading.Condition()
+        self._dispatcher = None
+        self._senders = ThreadPoolExecutor(max_in_flight, thread_name_prefix="oms") if adapter.batched else None
+
+    def get(self, order_id):
+        """The order dict, or None if the OMS does not know it. Raises if the OMS call fails."""
+        leader = False
+        with self._cond:
+            cached = self._cache.get(order_id)
+            if cached and cached[1] > time.monotonic():
+                return cached[0]
+
+            future = self._in_flight.get(order_id)
+            if future is None:
+                future = self._in_flight[order_id] = Future()
+                if self.adapter.batched:
+                    self._queue.append(order_id)
+                    self._start_dispatcher()
+                    self._cond.notify()
+                else:
+                    leader = True
+            else:
+                logger.debug(f"OMS: Coalesced lookup of {order_id} with an in-flight request")
+
+        if leader:
+            self._fetch([order_id])
+        return future.result(timeout=self.timeout)
+
+    def invalidate(self, order_id):
+        """Drops a cached order, e.g. after a refund changed its state."""
+        with self._cond:
+            self._cache.pop(order_id, None)
+
+    def _fetch(self, order_ids):
+        try:
+            orders = self.adapter.get_orders(order_ids)
+        except Exception as e:
+            with self._cond:
+                futures = [self._in_flight.pop(order_id) for order_id in order_ids]
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        expires_at = time.monotonic() + self.cache_ttl
+        with self._cond:
+            if len(self._cache) >= self.max_cache_entries:
+                self._evict_expired()
+            futures = []
+            for order_id in order_ids:
+                order = orders.get(order_id)
+                self._cache[order_id] = (order, expires_at)
+                futures.append((self._in_flight.pop(order_id), order))
+        for future, order in futures:
+            future.set_result(order)
+
+    def _evict_expired(self):
+        now = time.monotonic()
+        expired = [order_id for order_id, (_, expires_at) in self._cache.items() if expires_at <= now]
+        for order_id in expired:
+            del self._cache[order_id]
+        if len(self._cache) >= self.max_cache_entries:
+            self._cache.clear()
+
+    def _start_dispatcher(self):
+        # Called with self._cond held
+        if self._dispatcher is None:
+            self._dispatcher = threading.Thread(target=self._dispatch, name="oms-batcher", daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+
+                # Give concurrent sessions a short window to join this batch
+                deadline = time.monotonic() + self.batch_window
+                while len(self._queue) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = self._queue[:self.max_batch]
+                del self._queue[:self.max_batch]
+
+            logger.debug(f"OMS: Sending batch of {len(batch)} order lookups")
+            self._senders.submit(self._fetch, batch)
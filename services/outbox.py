@@ -0,0 +1,216 @@
+import json
+import logging
+import os
+import random
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar
+
+logger = logging.getLogger("Outbox")
+
+# Conversation the current tool call belongs to (set by the agent for each turn).
+# Side effects are deduplicated per (session, order_id).
+current_session_id = ContextVar("current_session_id", default=None)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    reference TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_due ON outbox (status, next_attempt_at);
+"""
+
+
+def idempotency_key(kind, order_id, session_id=None):
+    """One side effect of each kind per (session, order). Without a session: one per order."""
+    return f"{kind}:{session_id or '-'}:{order_id or '-'}"
+
+
+class Outbox:
+    """
+    Durable queue of side effects (refunds, escalation tickets) in SQLite.
+
+    `enqueue()` records the request under its idempotency key and returns
+    at once. A duplicate key returns the original reference instead of
+    queueing a second side effect. A background worker claims due rows in
+    batches and hands them to the handler registered for their kind.
+    Failed batches are retried with exponential backoff and jitter. After
+    `max_attempts` failures, the rows are parked as 'dead'.
+
+    Rows move pending -> sending -> sent. A claimed row carries a lease
+    (`next_attempt_at`), so rows left in 'sending' by a crashed worker are
+    picked up again once the lease runs out.
+    """
+
+    def __init__(self, db_path, batch_size=20, max_attempts=8, backoff_seconds=1.0,
+                 max_backoff_seconds=300.0, lease_seconds=60.0, poll_interval=1.0):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+
+        self.handlers = {}  # kind -> callable(list of payloads), raises on failure
+        self._conn = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._worker = None
+
+    def register(self, kind, handler):
+        self.handlers[kind] = handler
+
+    def _connection(self):
+        # Called with self._lock held
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    # ---------------------------------------------------------
+    # Producer side (agent tools)
+    # ---------------------------------------------------------
+    def enqueue(self, kind, key, reference, payload):
+        """
+        Queues a side effect unless `key` was seen before.
+        Returns (reference, status, duplicate); for a duplicate these are the original request's.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            inserted = conn.execute(
+                "INSERT INTO outbox (idempotency_key, kind, reference, payload, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (idempotency_key) DO NOTHING",
+                (key, kind, reference, json.dumps(payload), now, now),
+            ).rowcount
+            reference, status = conn.execute(
+                "SELECT reference, status FROM outbox WHERE idempotency_key = ?", (key,)
+            ).fetchone()
+
+        if inserted:
+            self.start_worker()
+            self._wakeup.set()
+        return reference, status, not inserted
+
+    def stats(self):
+        """Row counts per status."""
+        with self._lock:
+            return dict(self._connection().execute("SELECT status, COUNT(*) FROM outbox GROUP BY status"))
+
+    def flush(self, timeout=10.0):
+        """Waits until nothing is pending or in flight (scripts/benchmarks). Returns True if drained."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            counts = self.stats()
+            if not counts.get("pending") and not counts.get("sending"):
+                return True
+            self._wakeup.set()
+            time.sleep(0.05)
+        return False
+
+    # ---------------------------------------------------------
+    # Consumer side (background drain worker)
+    # ---------------------------------------------------------
+    def start_worker(self):
+        """Starts the drain worker (done on first enqueue; call at startup to drain rows left by a previous run)."""
+        with self._lock:
+            if self._worker is not None:
+                return
+            self._worker = threading.Thread(target=self._drain_forever, name="outbox-worker", daemon=True)
+            self._worker.start()
+
+    def _drain_forever(self):
+        while True:
+            try:
+                drained = self.drain_once()
+            except Exception as e:
+                logger.error(f"OUTBOX: Drain failed: {e}", exc_info=True)
+                drained = 0
+            if not drained:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def drain_once(self):
+        """Claims and delivers up to `batch_size` due rows. Returns how many rows were claimed."""
+        rows = self._claim()
+        by_kind = {}
+        for row in rows:
+            by_kind.setdefault(row[1], []).append(row)
+
+        for kind, batch in by_kind.items():
+            handler = self.handlers.get(kind)
+            try:
+                if handler is None:
+                    raise LookupError(f"No outbox handler registered for '{kind}'")
+                handler([{**json.loads(payload), "reference": reference} for _, _, reference, payload, _ in batch])
+            except Exception as e:
+                self._failed(kind, batch, e)
+            else:
+                self._sent(batch)
+                logger.info(f"OUTBOX: Delivered {len(batch)} '{kind}' item(s)")
+        return len(rows)
+
+    def _claim(self):
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                rows = conn.execute(
+                    "SELECT id, kind, reference, payload, attempts FROM outbox "
+                    "WHERE status IN ('pending', 'sending') AND next_attempt_at <= ? "
+                    "ORDER BY id LIMIT ?",
+                    (now, self.batch_size),
+                ).fetchall()
+                conn.executemany(
+                    "UPDATE outbox SET status = 'sending', next_attempt_at = ? WHERE id = ?",
+                    [(now + self.lease_seconds, row[0]) for row in rows],
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return rows
+
+    def _sent(self, batch):
+        now = time.time()
+        with self._lock:
+            self._connection().executemany(
+                "UPDATE outbox SET status = 'sent', sent_at = ?, attempts = attempts + 1, last_error = NULL WHERE id = ?",
+                [(now, row[0]) for row in batch],
+            )
+
+    def _failed(self, kind, batch, error):
+        now = time.time()
+        updates = []
+        for row_id, _, reference, _, attempts in batch:
+            attempts += 1
+            if attempts >= self.max_attempts:
+                logger.critical(f"OUTBOX: '{kind}' {reference} failed {attempts} times, parked as dead: {error}")
+                updates.append(("dead", attempts, now, str(error), row_id))
+                continue
+            delay = min(self.max_backoff_seconds, self.backoff_seconds * 2 ** (attempts - 1))
+            delay *= random.uniform(0.5, 1.5)  # jitter: don't retry every failed batch in lockstep
+            updates.append(("pending", attempts, now + delay, str(error), row_id))
+        logger.warning(f"OUTBOX: Delivery of {len(batch)} '{kind}' item(s) failed, will retry: {error}")
+
+        with self._lock:
+            self._connection().executemany(
+                "UPDATE outbox SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+                updates,
+            )
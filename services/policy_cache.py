@@ -0,0 +1,118 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger("PolicyCache")
+
+
+class PolicyCache:
+    """
+    In-process cache for the markdown policy documents.
+
+    Documents are preloaded at startup and served from memory. A daemon
+    thread polls the files' mtimes and reloads any document that changed,
+    so `get()` never touches the filesystem on the hot path. Entries also
+    expire after `ttl_seconds`, and the cache holds at most `max_entries`
+    documents (least recently used is evicted first).
+    """
+
+    def __init__(self, policy_dir, policy_files, max_entries=32, ttl_seconds=3600, poll_interval=2.0):
+        self.policy_dir = policy_dir
+        self.policy_files = policy_files  # policy_type -> filename
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.poll_interval = poll_interval
+
+        self._entries = OrderedDict()  # policy_type -> (text, mtime, loaded_at)
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._watcher = None
+
+    def path_for(self, policy_type):
+        filename = self.policy_files.get(policy_type)
+        return os.path.join(self.policy_dir, filename) if filename else None
+
+    # ---------------------------------------------------------
+    # Read path
+    # ---------------------------------------------------------
+    def get(self, policy_type):
+        """Returns the policy text, or None if the policy does not exist."""
+        with self._lock:
+            entry = self._entries.get(policy_type)
+            if entry and time.monotonic() - entry[2] < self.ttl_seconds:
+                self._entries.move_to_end(policy_type)
+                return entry[0]
+
+        # Miss (first use, evicted or expired): read from disk once
+        return self._load(policy_type)
+
+    def preload(self):
+        for policy_type in self.policy_files:
+            self._load(policy_type)
+        logger.info(f"POLICY CACHE: Preloaded {len(self._entries)} policy documents from {self.policy_dir}")
+
+    def _load(self, policy_type):
+        path = self.path_for(policy_type)
+        if not path or not os.path.exists(path):
+            return None
+
+        with open(path, "r") as f:
+            text = f.read()
+        mtime = os.path.getmtime(path)
+
+        with self._lock:
+            self._entries[policy_type] = (text, mtime, time.monotonic())
+            self._entries.move_to_end(policy_type)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                logger.debug(f"POLICY CACHE: Evicted '{evicted}'")
+        return text
+
+    # ---------------------------------------------------------
+    # Invalidation
+    # ---------------------------------------------------------
+    def on_change(self, callback):
+        """Registers `callback(policy_type)` to run after a policy document is reloaded."""
+        self._listeners.append(callback)
+
+    def refresh(self):
+        """Reloads every cached document whose file changed on disk. Returns the changed policy types."""
+        with self._lock:
+            cached = {policy_type: entry[1] for policy_type, entry in self._entries.items()}
+
+        changed = []
+        for policy_type, cached_mtime in cached.items():
+            path = self.path_for(policy_type)
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                # File removed: drop it so get() reports "not found"
+                with self._lock:
+                    self._entries.pop(policy_type, None)
+                changed.append(policy_type)
+                continue
+            if mtime != cached_mtime:
+                self._load(policy_type)
+                changed.append(policy_type)
+
+        for policy_type in changed:
+            logger.info(f"POLICY CACHE: '{policy_type}' changed on disk, reloaded.")
+            for callback in self._listeners:
+                callback(policy_type)
+        return changed
+
+    def start_watcher(self):
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, name="policy-watcher", daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self.poll_interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"POLICY CACHE: Refresh failed: {e}")
@@ -0,0 +1,240 @@
+import logging
+import re
+import threading
+from dataclasses import dataclass
+
+logger = logging.getLogger("PolicyIndex")
+
+# Item vocabulary per product category (singular, as `terms()` normalizes them; two-word
+# terms where one word alone is ambiguous: a "store card" is digital, a "graphics card" is not).
+# Policy sections are matched to a category by their heading, order items by their terms.
+CATEGORY_KEYWORDS = {
+    "electronics": {"electronic", "tech", "headphone", "earbud", "monitor", "mouse", "keyboard",
+                    "laptop", "phone", "tablet", "camera", "speaker", "console", "charger", "graphic card"},
+    "apparel": {"apparel", "clothing", "underwear", "sock", "swimwear", "shirt",
+                "jacket", "shoe", "dress", "jean"},
+    "intimates": {"intimate", "underwear", "sock", "swimwear", "lingerie", "bra"},
+    "digital": {"digital", "software", "subscription", "download", "voucher", "gift card", "store card",
+                "prepaid card", "wallet card", "gift certificate", "software key", "license key",
+                "product key", "activation key", "download code", "redeem code"},
+    "beauty": {"beauty", "skincare", "cream", "serum", "lotion", "makeup", "perfume", "shampoo", "cosmetic"},
+}
+
+# Exclusion qualifiers: "Used Headphones" only excludes *used* headphones
+CONDITION_WORDS = {"open", "opened", "used"}
+
+HEADING = re.compile(r"^#+\s*(?:\d+\.\s*)?(.+?)\s*$")
+SUBHEADING = re.compile(r"^\*\*([^*]+?):?\*\*:?\s*$")
+WINDOW = re.compile(r"within (\d+) days", re.IGNORECASE)
+WORD = re.compile(r"[a-z]+")
+PARENTHETICAL = re.compile(r"\(([^)]+)\)")
+
+
+@dataclass(frozen=True)
+class Exclusion:
+    category: str
+    item: str              # as written in the policy, e.g. "Used Headphones"
+    noun: str              # singular head noun, e.g. "headphone"
+    words: frozenset       # every noun of the item, qualifier excluded: {"gift", "card"}
+    condition: str = None  # "open"/"used" qualifier, or None if always excluded
+    scope: frozenset = frozenset()  # categories excluded as a whole: "Digital Goods" -> {"digital"}
+
+    def names(self, item_nouns):
+        """True if an item with these nouns is the excluded one: "Gift Card", not "Graphics Card"."""
+        return self.words <= item_nouns
+
+    def to_dict(self):
+        return {"category": self.category, "item": self.item, "condition": self.condition, "action": "REJECT"}
+
+
+@dataclass(frozen=True)
+class Clause:
+    section: str
+    text: str
+    categories: frozenset  # empty: applies to every item
+
+
+def singular(word):
+    return word[:-1] if word.endswith("s") and not word.endswith("ss") else word
+
+
+def nouns(text):
+    return {singular(w) for w in WORD.findall(text.lower())}
+
+
+def terms(text):
+    """Singular words plus adjacent word pairs: "PlayStation Store Card" -> {..., "store card"}."""
+    words = [singular(w) for w in WORD.findall(text.lower())]
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def categories_for(text):
+    words = terms(text)
+    return frozenset(category for category, keywords in CATEGORY_KEYWORDS.items() if words & keywords)
+
+
+class CompiledPolicy:
+    """One policy document parsed into exclusions, clauses and the return window."""
+
+    def __init__(self, policy_type, text):
+        self.policy_type = policy_type
+        self.exclusions = []
+        self.clauses = []
+        self.window_days = None
+        self._parse(text)
+
+        # head noun / category -> exclusions, so per-item checks are dict lookups.
+        # Conditional exclusions are also keyed by category: "Open Beauty
+        # Products" applies to a night cream once it has been opened. So are
+        # unconditional ones whose section names a whole category: every
+        # "Digital Goods" item is Final Sale, a "PlayStation Store Card" too.
+        self._by_noun = {}
+        self._by_category = {}
+        for exclusion in self.exclusions:
+            self._by_noun.setdefault(exclusion.noun, []).append(exclusion)
+            categories = categories_for(exclusion.item) if exclusion.condition else exclusion.scope
+            for category in categories:
+                self._by_category.setdefault(category, []).append(exclusion)
+
+    def _parse(self, text):
+        section = subsection = ""
+        for raw in text.splitlines():
+            line = raw.strip()
+            if not line:
+                continue
+            heading = HEADING.match(line)
+            if heading:
+                section, subsection = heading.group(1).strip("* "), ""
+                continue
+            sub = SUBHEADING.match(line)
+            if sub:
+                subsection = sub.group(1).strip()
+                continue
+
+            if "ACTION: REJECT" in line and ":**" in line:
+                self._parse_exclusions(line)
+                continue
+
+            if self.window_days is None:
+                window = WINDOW.search(line)
+                if window:
+                    self.window_days = int(window.group(1))
+
+            title = f"{section} / {subsection}" if subsection else section
+            text = line.lstrip("*- ").strip() if line[:2] in ("* ", "- ") else line
+            self.clauses.append(Clause(title, text, categories_for(subsection or section)))
+
+    def _parse_exclusions(self, line):
+        # `* **Apparel (Intimates):** Underwear, **Socks**, Swimwear. -> **ACTION: REJECT**`
+        category = line.split(":**")[0].strip("* ").strip()
+        # "Apparel (Intimates)" excludes intimates, not all apparel
+        narrowed = PARENTHETICAL.search(category)
+        scope = categories_for(narrowed.group(1) if narrowed else category)
+        items = line.split(":**", 1)[1].split("->")[0]
+        for item in items.replace("*", "").strip(" .").split(","):
+            item = item.strip()
+            words = item.lower().split()
+            if not words:
+                continue
+            condition = words[0] if words[0] in CONDITION_WORDS else None
+            qualified = nouns(" ".join(words[1:] if condition else words))
+            self.exclusions.append(Exclusion(category, item, singular(words[-1]), frozenset(qualified), condition,
+                                             frozenset() if condition else scope))
+
+    # ---------------------------------------------------------
+    # Lookups
+    # ---------------------------------------------------------
+    def exclusions_for(self, item):
+        """Every exclusion naming this item (all of its words, not just the head noun), conditional ones included."""
+        item_nouns = nouns(item)
+        found = [e for noun in item_nouns for e in self._by_noun.get(noun, ()) if e.names(item_nouns)]
+        found += [e for category in categories_for(item) for e in self._by_category.get(category, ())]
+        return list(dict.fromkeys(found))
+
+    def is_excluded(self, item, conditions=()):
+        """
+        The exclusion that forbids returning `item`, or None.
+        Conditional exclusions ("Used Headphones") only apply when the
+        condition is among `conditions` (e.g. reported by the customer).
+        """
+        for exclusion in self.exclusions_for(item):
+            if exclusion.condition is None or exclusion.condition in conditions:
+                return exclusion
+        return None
+
+    def has_conditions(self, item):
+        """
+        True if whether `item` can be returned depends on more than its name: a
+        conditional exclusion ("Used Headphones") or a category clause
+        ("Electronics: must be unopened") applies to it.
+        """
+        if any(e.condition for e in self.exclusions_for(item)):
+            return True
+        categories = categories_for(item)
+        return any(c.categories & categories for c in self.clauses)
+
+    def relevant(self, items):
+        """The clauses and exclusions that apply to these items (general clauses always included)."""
+        item_categories = {item: categories_for(item) for item in items}
+        wanted = frozenset().union(*item_categories.values())
+
+        report = {}
+        for item, categories in item_categories.items():
+            exclusions = self.exclusions_for(item)
+            unconditional = next((e for e in exclusions if e.condition is None), None)
+            report[item] = {
+                "categories": sorted(categories),
+                "excluded": unconditional is not None,
+                "exclusions": [e.to_dict() for e in exclusions],
+            }
+
+        clauses = [
+            f"[{c.section}] {c.text}" for c in self.clauses
+            if not c.categories or c.categories & wanted
+        ]
+        return {
+            "policy_type": self.policy_type,
+            "return_window_days": self.window_days,
+            "items": report,
+            "clauses": clauses,
+        }
+
+
+class PolicyIndex:
+    """
+    Structured view of the policy documents, compiled once from the policy
+    cache and recompiled whenever a document changes on disk.
+    """
+
+    def __init__(self, policy_cache):
+        self.policy_cache = policy_cache
+        self._compiled = {}
+        self._lock = threading.Lock()
+        policy_cache.on_change(self.recompile)
+
+    def compile_all(self):
+        for policy_type in self.policy_cache.policy_files:
+            self.recompile(policy_type)
+        logger.info(f"POLICY INDEX: Compiled {len(self._compiled)} policies "
+                    f"({sum(len(p.exclusions) for p in self._compiled.values())} exclusions)")
+
+    def recompile(self, policy_type):
+        text = self.policy_cache.get(policy_type)
+        with self._lock:
+            if text is None:
+                self._compiled.pop(policy_type, None)
+            else:
+                self._compiled[policy_type] = CompiledPolicy(policy_type, text)
+        logger.debug(f"POLICY INDEX: Recompiled '{policy_type}'")
+
+    def get(self, policy_type):
+        """The compiled policy, or None if the document does not exist."""
+        compiled = self._compiled.get(policy_type)
+        if compiled is None and policy_type in self.policy_cache.policy_files:
+            self.recompile(policy_type)
+            compiled = self._compiled.get(policy_type)
+        return compiled
+
+    def is_excluded(self, item, policy_type="returns", conditions=()):
+        compiled = self.get(policy_type)
+        return compiled.is_excluded(item, conditions) if compiled else None
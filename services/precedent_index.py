@@ -0,0 +1,158 @@
+import heapq
+import logging
+import math
+import threading
+import time
+from itertools import combinations
+
+logger = logging.getLogger("PrecedentIndex")
+
+# Query tags considered per lookup (the highest-IDF ones win if a query has more)
+MAX_QUERY_TAGS = 6
+
+SNAPSHOT_QUERY = """
+    MATCH (c:SupportCase)-[:HAS_TAG]->(t:Tag)
+    RETURN c.id, c.decision, c.rationale, t.name
+"""
+# Write version stamped by scripts/init_graph.py on every upsert
+VERSION_QUERY = """
+    MATCH (m:GraphMeta {key: 'precedents'})
+    RETURN m.version
+"""
+# Graphs built before the stamp existed: case/edge counts (misses in-place updates)
+LEGACY_VERSION_QUERY = """
+    MATCH (c:SupportCase)-[r:HAS_TAG]->(:Tag)
+    RETURN COUNT(DISTINCT c), COUNT(r)
+"""
+
+
+class _Snapshot:
+    """Immutable inverted index built from one read of the graph."""
+
+    def __init__(self, rows):
+        case_tags = {}
+        case_info = {}
+        for case_id, decision, rationale, tag in rows:
+            case_tags.setdefault(case_id, set()).add(tag)
+            case_info[case_id] = (decision, rationale)
+
+        # Ordinal order doubles as the tie-break: among cases with the same
+        # score, the most specific precedent (fewest tags) ranks first.
+        ordered = sorted(case_tags, key=lambda c: (len(case_tags[c]), c))
+        self.cases = [(c, *case_info[c], len(case_tags[c])) for c in ordered]
+
+        # tag -> bitmap over case ordinals (Python ints are arbitrary-size bitsets)
+        postings = {}
+        for ordinal, case_id in enumerate(ordered):
+            for tag in case_tags[case_id]:
+                postings.setdefault(tag, []).append(ordinal)
+        self.bitmaps = {tag: self._to_bitmap(ordinals, len(ordered)) for tag, ordinals in postings.items()}
+
+        # BM25-style IDF: rare tags carry more weight than common ones
+        n = len(ordered)
+        self.idf = {
+            tag: math.log((n - df + 0.5) / (df + 0.5) + 1)
+            for tag, df in ((tag, bitmap.bit_count()) for tag, bitmap in self.bitmaps.items())
+        }
+
+    @staticmethod
+    def _to_bitmap(ordinals, size):
+        buf = bytearray((size + 7) // 8)
+        for ordinal in ordinals:
+            buf[ordinal >> 3] |= 1 << (ordinal & 7)
+        return int.from_bytes(buf, "little")
+
+    def search(self, tags, k):
+        known = [t for t in dict.fromkeys(tags) if t in self.bitmaps]
+        known = heapq.nlargest(MAX_QUERY_TAGS, known, key=self.idf.__getitem__)
+        if not known:
+            return []
+
+        # Every candidate matches exactly one subset of the query tags, and its
+        # score is the summed IDF of that subset. Walk subsets best-first and
+        # pull cases out of each subset's exact-match bitmap.
+        subsets = [s for r in range(len(known), 0, -1) for s in combinations(known, r)]
+        subsets.sort(key=lambda s: sum(self.idf[t] for t in s), reverse=True)
+
+        union = 0
+        for tag in known:
+            union |= self.bitmaps[tag]
+
+        results = []
+        for subset in subsets:
+            bitmap = union
+            for tag in known:
+                if tag in subset:
+                    bitmap &= self.bitmaps[tag]
+                else:
+                    bitmap &= ~self.bitmaps[tag]
+
+            score = sum(self.idf[t] for t in subset)
+            while bitmap and len(results) < k:
+                lowest = bitmap & -bitmap
+                case_id, decision, rationale, tag_count = self.cases[lowest.bit_length() - 1]
+                results.append({
+                    "precedent_id": case_id,
+                    "decision": decision,
+                    "rationale": rationale,
+                    "matched_tags": list(subset),
+                    "score": round(score, 4),
+                })
+                bitmap ^= lowest
+            if len(results) >= k:
+                break
+        return results
+
+
+class PrecedentIndex:
+    """
+    In-memory inverted index (tag -> case bitmap) over the SupportCase/HAS_TAG graph.
+
+    The Kùzu graph stays the source of truth: the index is rebuilt from a
+    single snapshot query, and re-checked against the graph's write version
+    at most every `refresh_interval` seconds. Lookups never query
+    the graph, and return the top-k precedents ranked by IDF-weighted tag overlap.
+    """
+
+    def __init__(self, refresh_interval=30.0):
+        self.refresh_interval = refresh_interval
+        self._snapshot = None
+        self._version = None
+        self._checked_at = 0.0
+        self._version_query = VERSION_QUERY
+        self._lock = threading.Lock()
+
+    def _read_version(self, graph):
+        if self._version_query is VERSION_QUERY:
+            try:
+                return graph.execute(VERSION_QUERY, name="precedent_version")
+            except RuntimeError:
+                logger.warning("PRECEDENT INDEX: Graph has no write version (built by an older init_graph.py); "
+                               "falling back to case/edge counts, which miss in-place updates.")
+                self._version_query = LEGACY_VERSION_QUERY
+        return graph.execute(LEGACY_VERSION_QUERY, name="precedent_version")
+
+    def refresh(self, graph, force=False):
+        """Rebuilds the index if the graph changed (or unconditionally with force=True)."""
+        with self._lock:
+            version = self._read_version(graph)
+            self._checked_at = time.monotonic()
+            if not force and self._snapshot is not None and version == self._version:
+                return False
+
+            start = time.perf_counter()
+            rows = graph.execute(SNAPSHOT_QUERY, name="precedent_snapshot")
+
+            # Swap in the new snapshot in one assignment; readers never see a half-built index
+            self._snapshot = _Snapshot(rows)
+            self._version = version
+            logger.info(
+                f"PRECEDENT INDEX: Built over {len(self._snapshot.cases)} cases / "
+                f"{len(self._snapshot.bitmaps)} tags in {(time.perf_counter() - start) * 1000:.1f}ms"
+            )
+            return True
+
+    def search(self, graph, tags, k=3):
+        if self._snapshot is None or time.monotonic() - self._checked_at > self.refresh_interval:
+            self.refresh(graph)
+        return self._snapshot.search(tags, k)
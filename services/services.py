@@ -1,24 +1,34 @@
 import logging
 import random
 import os
-import kuzu
 
+from config import Config
+from observability import telemetry
+from services.graph_pool import GraphConnectionPool
+from services.oms import HttpOMS, MockOMS, OrderLookup
+from services.outbox import Outbox, current_session_id, idempotency_key
+from services.policy_cache import PolicyCache
+from services.policy_index import PolicyIndex
+from services.precedent_index import PrecedentIndex
 
-# Configure Logging to STDOUT (Terminal)
-logging.basicConfig(
-    level=logging.DEBUG,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    datefmt='%H:%M:%S'
-)
 logger = logging.getLogger("BackendServices")
 
+# Tags are bound as a parameter, so customer input never ends up in the query text
+PRECEDENT_QUERY = """
+    MATCH (c:SupportCase)-[:HAS_TAG]->(t:Tag)
+    WHERE t.name IN $tags
+    RETURN c.id, c.decision, c.rationale, COUNT(t) AS score
+    ORDER BY score DESC
+    LIMIT 1
+"""
+
 class EnterpriseServices:
     """
     Simulates Core Enterprise Integrations / API with 
     structured logging
     """
 
-    # Initialize DB Connection (Lazy loading or global)
+    # DB Connection (opened lazily on first precedent lookup, see _graph())
     # Ensure init_graph.py has been run first!
     # ---------------------------------------------------------
     # 1. Get directory of this file (.../services)
@@ -28,113 +38,228 @@ class EnterpriseServices:
     # 3. Point to the data folder
     DB_PATH = os.path.join(BASE_DIR, "data", "context_graph_db")
 
-    # Initialize connection
-    if os.path.exists(DB_PATH):
-        try:
-            db = kuzu.Database(DB_PATH)
-            conn = kuzu.Connection(db)
-            print(f"✅ Connected to Kùzu Graph at: {DB_PATH}")
-        except Exception as e:
-            conn = None
-            print(f"❌ Connection Failed: {e}")
-    else:
-        conn = None
-        print(f"⚠️  WARNING: Graph DB not found at {DB_PATH}. Run scripts/init_graph.py")
+    # A pool of connections (one per concurrent tool worker)
+    graph = GraphConnectionPool(DB_PATH, size=Config.GRAPH_POOL_SIZE, read_only=Config.GRAPH_READ_ONLY)
+
+    # In-memory precedent index, rebuilt from the graph when it changes
+    precedent_index = PrecedentIndex(refresh_interval=Config.PRECEDENT_INDEX_REFRESH_SECONDS)
+
+    # Order lookups: cached, coalesced and (for the HTTP backend) micro-batched
+    oms = OrderLookup(
+        HttpOMS(Config.OMS_BASE_URL, timeout=Config.OMS_TIMEOUT, pool_size=Config.OMS_POOL_SIZE,
+                api_key=Config.OMS_API_KEY) if Config.OMS_BASE_URL else MockOMS(),
+        cache_ttl=Config.OMS_CACHE_TTL,
+        batch_window=Config.OMS_BATCH_WINDOW_MS / 1000,
+        max_batch=Config.OMS_MAX_BATCH,
+        timeout=Config.OMS_TIMEOUT * 2
+    )
+
+    # Refunds and escalation tickets: deduplicated per (session, order) and
+    # delivered from a durable SQLite outbox by a background worker
+    outbox = Outbox(
+        Config.OUTBOX_DB_PATH or os.path.join(BASE_DIR, "data", "outbox.sqlite3"),
+        batch_size=Config.OUTBOX_BATCH_SIZE,
+        max_attempts=Config.OUTBOX_MAX_ATTEMPTS,
+        backoff_seconds=Config.OUTBOX_BACKOFF_SECONDS
+    )
+
+    # Policy documents: resolved from the project root (not the process cwd),
+    # preloaded into memory and reloaded by a watcher thread when they change
+    POLICY_DIR = os.path.join(BASE_DIR, "policies")
+    POLICY_FILES = {
+        "returns": "return_policy.md",
+        "shipping": "shipping_policy.md",
+        "privacy": "privacy_policy.md"
+    }
+    policy_cache = PolicyCache(
+        POLICY_DIR,
+        POLICY_FILES,
+        ttl_seconds=Config.POLICY_CACHE_TTL,
+        poll_interval=Config.POLICY_POLL_INTERVAL
+    )
+    policy_cache.preload()
+    policy_cache.start_watcher()
+
+    # Policies compiled into exclusions / clauses / windows; recompiled on change
+    policy_index = PolicyIndex(policy_cache)
+    policy_index.compile_all()
 
     @staticmethod
+    @telemetry.traced("service.look_up_order")
     def look_up_order(order_id):
         logger.info(f"API CALL: Querying OMS for Order ID: {order_id}")
-        
-        # Mock Database
-
-        mock_db = {
-            "ORD-123": {"status": "shipped", "items": ["Wireless Headphones"], "eligible_for_return": True, "customer_sentiment": "neutral"},
-            "ORD-456": {"status": "delivered", "items": ["Gaming Mouse"], "eligible_for_return": False, "return_reason": "window_expired", "customer_sentiment": "neutral"},
-            "ORD-999": {"status": "processing", "items": ["4K Monitor"], "eligible_for_return": True, "customer_sentiment": "angry"},
-            "ORD-777": {"status": "delivered", "items": ["Premium Wool Socks"], "eligible_for_return": True, "customer_sentiment": "neutral"},
-            "ORD-888": {"status": "delivered", "items": ["$50 PlayStation Store Card"], "eligible_for_return": True, "customer_sentiment": "neutral"},
-            "ORD-555": {"status": "delivered", "items": ["Luxury Night Cream"], "eligible_for_return": True, "customer_sentiment": "positive"}
-        }
+        span = telemetry.current_span()
+        span.set_attribute("order.id", str(order_id))
+
+        try:
+            result = EnterpriseServices.oms.get(order_id)
+        except Exception as e:
+            logger.error(f"API FAIL: OMS request failed for {order_id}: {e}")
+            return {"error": f"Order system unavailable: {str(e)}"}
 
-        result = mock_db.get(order_id)
+        span.set_attribute("order.found", bool(result))
         if result:
+            span.set_attribute("order.status", result["status"])
             logger.info(f"API SUCCESS: Order found: {order_id} | Status: {result['status']}")
-            return result
+            return dict(result)  # callers may annotate it; keep the cached copy intact
         else:
             logger.warning(f"API FAIL: Order lookup failed: {order_id}")
             return {"error": "Order ID not found in system."}
 
     @staticmethod
+    @telemetry.traced("service.execute_refund")
     def execute_refund(order_id, reason):
         logger.info(f"API CALL: Initiating Refund | Order: {order_id} | Reason: {reason}")
-        
-        # Simulate Transaction
+        EnterpriseServices.oms.invalidate(order_id)  # its return state is about to change
+
+        key = idempotency_key("refund", order_id, current_session_id.get())
+        transaction_id, status, duplicate = EnterpriseServices.outbox.enqueue(
+            "refund", key, f"txn_{random.randint(10000,99999)}", {"order_id": order_id, "reason": reason}
+        )
+        telemetry.current_span().set_attributes({"order.id": str(order_id), "outbox.duplicate": duplicate})
+        if duplicate:
+            logger.warning(f"IDEMPOTENCY: Refund for {order_id} already requested ({transaction_id}, {status}), not issuing another.")
+            if status == "dead":
+                # The outbox gave up on the first request: the customer has not been refunded
+                return {
+                    "error": f"The refund already requested for this order ({transaction_id}) could not be delivered "
+                             "to the payment gateway. It can't be retried here; escalate to a human agent.",
+                    "transaction_id": transaction_id,
+                    "duplicate": True,
+                }
+            return {
+                "status": "success",
+                "transaction_id": transaction_id,
+                "duplicate": True,
+                "message": ("This refund was already issued; no second refund was made." if status == "sent" else
+                            "This refund was already requested and is queued to the original payment method "
+                            "(not issued yet); no second refund was made."),
+            }
         return {
             "status": "success", 
-            "transaction_id": f"txn_{random.randint(10000,99999)}", 
-            "message": "Refund processed to original payment method."
+            "transaction_id": transaction_id, 
+            "message": "Refund approved and queued to the original payment method."
         }
 
     @staticmethod
+    @telemetry.traced("service.escalate_to_human")
     def escalate_to_human(order_id, reason):
         logger.critical(f"API CALL: ESCALATION TRIGGERED | Order: {order_id} | Reason: {reason}")
-        return {"status": "escalated", "ticket_id": f"TKT-{random.randint(100,999)}", "message": "Agent requested human intervention."}
-    
+        telemetry.keep_trace("escalation")
+
+        key = idempotency_key("escalation", order_id, current_session_id.get())
+        ticket_id, status, duplicate = EnterpriseServices.outbox.enqueue(
+            "escalation", key, f"TKT-{random.randint(100,999)}", {"order_id": order_id, "reason": reason}
+        )
+        telemetry.current_span().set_attributes({"order.id": str(order_id), "outbox.duplicate": duplicate})
+        if duplicate:
+            logger.warning(f"IDEMPOTENCY: Escalation for {order_id} already requested ({ticket_id}, {status}), not opening another.")
+            if status == "dead":
+                # The ticketing system never received the first request: nobody is looking at it
+                return {
+                    "error": f"The escalation already requested for this order ({ticket_id}) could not be delivered "
+                             "to the ticketing system. Ask the customer to contact support directly.",
+                    "ticket_id": ticket_id,
+                    "duplicate": True,
+                }
+            message = ("A human agent was already requested for this order." if status == "sent" else
+                       "A human agent was already requested for this order; the ticket is queued and not open yet.")
+            return {"status": "escalated", "ticket_id": ticket_id, "duplicate": True, "message": message}
+        return {"status": "escalated", "ticket_id": ticket_id, "message": "Agent requested human intervention."}
+
+    # ---------------------------------------------------------
+    # Outbox delivery (background worker, in batches)
+    # ---------------------------------------------------------
+    @staticmethod
+    def _send_refunds(batch):
+        # Simulated payment gateway: one bulk call per batch, raises on failure
+        logger.info(f"API CALL: Payment gateway | Submitting {len(batch)} refund(s): {[r['reference'] for r in batch]}")
+
+    @staticmethod
+    def _send_escalations(batch):
+        # Simulated ticketing system
+        logger.info(f"API CALL: Ticketing | Opening {len(batch)} ticket(s): {[t['reference'] for t in batch]}")
 
     @staticmethod
-    def get_policy_info(policy_type):
+    @telemetry.traced("service.get_policy_info")
+    def get_policy_info(policy_type, items=None):
         """
-        Reads a markdown policy file from the /policies directory.
+        Returns a policy document from the in-memory policy cache.
+        With `items`, returns only the compiled clauses and exclusions that
+        apply to those items instead of the whole document.
         """
         logger.info(f"POLICY CHECK: Retrieving '{policy_type}' policy document.")
-        
-        # Map simple names to filenames
-        policy_map = {
-            "returns": "policies/return_policy.md",
-            "shipping": "policies/shipping_policy.md",
-            "privacy": "policies/privacy_policy.md"
-        }
-        
-        filename = policy_map.get(policy_type)
-        
-        if not filename or not os.path.exists(filename):
-            return {"error": "Policy document not found."}
-        
+        span = telemetry.current_span()
+        span.set_attributes({"policy.type": str(policy_type), "policy.compiled": False})
+
+        if items:
+            relevant = EnterpriseServices.relevant_policy(policy_type, items)
+            if relevant is not None:
+                span.set_attribute("policy.compiled", True)
+                logger.info(f"POLICY CHECK: Serving compiled '{policy_type}' clauses for items: {items}")
+                return relevant
+
         try:
-            with open(filename, 'r') as f:
-                content = f.read()
-            return {"policy_text": content}
+            content = EnterpriseServices.policy_cache.get(policy_type)
         except Exception as e:
             return {"error": f"Failed to read policy: {str(e)}"}
 
+        if content is None:
+            return {"error": "Policy document not found."}
+        return {"policy_text": content}
+
+    @staticmethod
+    def relevant_policy(policy_type, items):
+        """The compiled clauses and exclusions of a policy that apply to `items`, or None if it has none compiled."""
+        compiled = EnterpriseServices.policy_index.get(policy_type)
+        if compiled and compiled.clauses:
+            return compiled.relevant(items)
+        return None
+
+    @staticmethod
+    def _graph():
+        """Opens the graph on first use (not at import). Returns True if it is available."""
+        graph = EnterpriseServices.graph
+        if graph.is_open:
+            return True
+        if not os.path.exists(graph.db_path):
+            print(f"⚠️  WARNING: Graph DB not found at {graph.db_path}. Run scripts/init_graph.py")
+            return False
+        try:
+            graph.open()
+            print(f"✅ Connected to Kùzu Graph at: {graph.db_path}")
+            return True
+        except Exception as e:
+            print(f"❌ Connection Failed: {e}")
+            return False
+
     @staticmethod
+    @telemetry.traced("service.check_precedents")
     def check_precedents(query_tags_str):
         logger.info(f"PRECEDENT CHECK: Starting precedent lookup with query_tags_str: '{query_tags_str}'")
 
-        if not EnterpriseServices.conn:
+        if not EnterpriseServices._graph():
             logger.error("PRECEDENT CHECK: Graph DB connection not initialized.")
             return {"error": "Graph DB not initialized."}
 
         input_tags = [t.strip().lower() for t in query_tags_str.split()]
         logger.info(f"PRECEDENT CHECK: Parsed input tags: {input_tags}")
+        span = telemetry.current_span()
+        span.set_attributes({"precedent.tags": input_tags, "precedent.source": "index" if Config.PRECEDENT_INDEX else "graph"})
 
-        # --- FIX: Updated Query to use SupportCase ---
-        query = f"""
-        MATCH (c:SupportCase)-[:HAS_TAG]->(t:Tag)
-        WHERE t.name IN {input_tags}
-        RETURN c.id, c.decision, c.rationale, COUNT(t) AS score
-        ORDER BY score DESC
-        LIMIT 1
-        """
-        logger.debug(f"PRECEDENT CHECK: Executing query: {query}")
+        if Config.PRECEDENT_INDEX:
+            return EnterpriseServices._search_precedent_index(input_tags)
+
+        logger.debug(f"PRECEDENT CHECK: Executing query: {PRECEDENT_QUERY} with tags {input_tags}")
 
         try:
-            result = EnterpriseServices.conn.execute(query)
+            rows = EnterpriseServices.graph.execute(PRECEDENT_QUERY, {"tags": input_tags}, name="precedent_match")
             logger.debug("PRECEDENT CHECK: Query executed successfully, checking for results...")
 
-            if result.has_next():
-                case_id, decision, rationale, score = result.get_next()
+            if rows:
+                case_id, decision, rationale, score = rows[0]
                 logger.info(f"PRECEDENT CHECK: Found matching precedent - ID: {case_id}, Decision: {decision}, Score: {score}")
+                span.set_attributes({"precedent.found": True, "precedent.match_score": score})
                 return {
                     "found": True,
                     "precedent_id": case_id,
@@ -147,4 +272,38 @@ class EnterpriseServices:
                 return {"found": False, "message": "No matching precedents found."}
         except Exception as e:
             logger.error(f"PRECEDENT CHECK: Graph query failed with error: {str(e)}", exc_info=True)
-            return {"error": f"Graph Query Failed: {str(e)}"}
\ No newline at end of file
+            return {"error": f"Graph Query Failed: {str(e)}"}
+
+    @staticmethod
+    def _search_precedent_index(input_tags):
+        """Top-k precedent lookup served from the in-memory index (no per-call Cypher)."""
+        try:
+            precedents = EnterpriseServices.precedent_index.search(
+                EnterpriseServices.graph, input_tags, k=Config.PRECEDENT_TOP_K
+            )
+        except Exception as e:
+            logger.error(f"PRECEDENT CHECK: Index lookup failed with error: {str(e)}", exc_info=True)
+            return {"error": f"Graph Query Failed: {str(e)}"}
+
+        if not precedents:
+            logger.warning(f"PRECEDENT CHECK: No matching precedents found for tags: {input_tags}")
+            return {"found": False, "message": "No matching precedents found."}
+
+        best = precedents[0]
+        telemetry.current_span().set_attributes({
+            "precedent.found": True, "precedent.count": len(precedents), "precedent.match_score": len(best["matched_tags"])
+        })
+        logger.info(f"PRECEDENT CHECK: Found {len(precedents)} precedent(s) - best ID: {best['precedent_id']}, "
+                    f"Decision: {best['decision']}, Score: {best['score']}")
+        return {
+            "found": True,
+            "precedent_id": best["precedent_id"],
+            "decision": best["decision"],
+            "rationale": best["rationale"],
+            "match_score": len(best["matched_tags"]),
+            "precedents": precedents
+        }
+
+
+EnterpriseServices.outbox.register("refund", EnterpriseServices._send_refunds)
+EnterpriseServices.outbox.register("escalation", EnterpriseServices._send_escalations)
@@ -0,0 +1,13 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Before config is imported: no real API key, no tracing, and runtime files
+# (outbox, session store) in a scratch directory instead of data/
+SCRATCH_DIR = tempfile.mkdtemp(prefix="cx-agent-tests-")
+os.environ.setdefault("ANTHROPIC_API_KEY", "sk-ant-fake-test-key")
+os.environ.setdefault("TRACING", "false")
+os.environ.setdefault("OUTBOX_DB_PATH", os.path.join(SCRATCH_DIR, "outbox.sqlite3"))
+os.environ.setdefault("SESSION_STORE", f"sqlite:///{os.path.join(SCRATCH_DIR, 'sessions.sqlite3')}")
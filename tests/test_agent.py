@@ -0,0 +1,40 @@
+import pytest
+
+from agent import agent as agent_module
+from agent.agent import SupportAgent
+from agent.response_cache import ResponseCache
+from config import Config
+
+QUESTION = "How do returns work for these?"
+GENERIC_ANSWER = "Most items can be returned within 30 days of delivery."
+
+
+@pytest.fixture
+def faq_cache(monkeypatch):
+    cache = ResponseCache()
+    cache.put(QUESTION, GENERIC_ANSWER, {"returns"})
+    monkeypatch.setattr(agent_module, "faq_cache", cache)
+    monkeypatch.setattr(Config, "FAQ_CACHE", True)
+    return cache
+
+
+def new_agent():
+    # The shortcuts never call the API: any client will do
+    return SupportAgent(client=object(), async_client=object())
+
+
+def test_first_turn_is_served_from_the_cache(faq_cache):
+    support = new_agent()
+    assert support._try_shortcuts(QUESTION) == (GENERIC_ANSWER, "cache")
+    assert [m["content"] for m in support.messages] == [QUESTION, GENERIC_ANSWER]
+
+
+def test_follow_up_is_not_served_from_the_cache(faq_cache):
+    # "these" refers back to the conversation: the generic cached text would be wrong
+    support = new_agent()
+    support.messages = [
+        {"role": "user", "content": "I ordered socks in ORD-777."},
+        {"role": "assistant", "content": "I see order ORD-777 (Premium Wool Socks). How can I help?"},
+    ]
+    assert support._try_shortcuts(QUESTION) == (None, None)
+    assert len(support.messages) == 2
@@ -0,0 +1,65 @@
+import anthropic
+import pytest
+
+from agent.batch import BatchRunner
+from benchmarks.fake_api import start_server
+from config import Config
+
+TICKETS = [
+    {"id": "EMAIL-1", "message": "I want to return my order ORD-123 (Headphones)."},
+    {"id": "EMAIL-2", "message": "I want to return order ORD-456."},
+    {"id": "EMAIL-3", "message": "I am absolutely furious about order ORD-999! This is a scam!"},
+    {"id": "EMAIL-4", "message": "What is your return window?"},
+]
+
+
+class CountingBatches:
+    """Counts Message Batches calls made through the client; messages.create must never be used."""
+
+    def __init__(self, client):
+        self.client = client
+        self.created = self.polled = 0
+        batches = client.messages.batches
+        create, retrieve = batches.create, batches.retrieve
+
+        def counted_create(*args, **kwargs):
+            self.created += 1
+            return create(*args, **kwargs)
+
+        def counted_retrieve(*args, **kwargs):
+            self.polled += 1
+            return retrieve(*args, **kwargs)
+
+        def no_direct_calls(*args, **kwargs):
+            raise AssertionError("batch mode made a direct Messages API call")
+
+        batches.create, batches.retrieve = counted_create, counted_retrieve
+        client.messages.create = no_direct_calls
+
+
+@pytest.fixture
+def fake_api(monkeypatch):
+    server, base_url = start_server(batch_latency_ms=150)
+    monkeypatch.setattr(Config, "FAST_PATH", False)  # every ticket goes through the Batches API
+    monkeypatch.setattr(Config, "FAQ_CACHE", False)
+    yield base_url
+    server.shutdown()
+
+
+def test_tickets_resolve_through_batches_and_tool_rounds(fake_api):
+    calls = CountingBatches(anthropic.Anthropic(api_key="sk-ant-fake-test-key", base_url=fake_api, max_retries=0))
+    runner = BatchRunner(calls.client, tool_workers=4, poll_interval=0.05, max_rounds=6)
+
+    results = []
+    counts = runner.run(TICKETS, on_result=results.append)
+
+    assert counts == {"resolved": len(TICKETS), "failed": 0}
+    by_id = {r["id"]: r for r in results}
+    assert set(by_id) == {t["id"] for t in TICKETS}
+    assert all(r["path"] == "model" and r["answer"] for r in results)
+    # Order tickets need tool rounds (look-up, policy, ...) before the final answer
+    assert by_id["EMAIL-1"]["model_calls"] > 1
+    assert "ORD-123" in by_id["EMAIL-1"]["answer"]
+    # One batch per round, each polled until it ended
+    assert calls.created == max(r["model_calls"] for r in results)
+    assert calls.polled > calls.created
@@ -0,0 +1,62 @@
+import pytest
+
+from agent import fast_path
+from tools.tools import registry
+
+
+@pytest.fixture
+def refunds(monkeypatch):
+    """Records refunds instead of issuing them; every other tool runs for real."""
+    issued = []
+    call = registry.call
+
+    def spy(name, tool_input):
+        if name == "execute_order_return":
+            issued.append(tool_input["order_id"])
+            return {"status": "success", "transaction_id": "TXN-TEST", "message": "Refund issued."}
+        return call(name, tool_input)
+
+    monkeypatch.setattr(registry, "call", spy)
+    return issued
+
+
+@pytest.mark.parametrize("message, order_id", [
+    ("I want to return ORD-123", "ORD-123"),
+    ("I want to return my order ORD-123 (Headphones).", "ORD-123"),
+    ("Please refund ORD-555", "ORD-555"),
+])
+def test_bare_request_is_approved(refunds, message, order_id):
+    answer = fast_path.resolve(message)
+    assert answer.startswith("Good news!") and order_id in answer
+    assert refunds == [order_id]
+
+
+@pytest.mark.parametrize("message", [
+    "I want to return ORD-123. I unboxed it and the left ear is dead.",
+    "I want to return ORD-123, it stopped working after a day.",
+    "Please refund ORD-555, it gave me a rash.",
+])
+def test_described_condition_goes_to_claude(refunds, message):
+    # The category has conditional exclusions or clauses the message may trigger
+    assert fast_path.resolve(message) is None
+    assert refunds == []
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("I want to return ORD-456", "isn't eligible for return (window expired)"),
+    ("I want to return ORD-777", "Apparel (Intimates) items are Final Sale"),
+    ("I want to return ORD-888", "Digital Goods items are Final Sale"),
+])
+def test_denials(refunds, message, expected):
+    assert expected in fast_path.resolve(message)
+    assert refunds == []
+
+
+@pytest.mark.parametrize("message", [
+    "I want to return ORD-999",  # angry customer
+    "What is the return policy for ORD-123?",
+    "I want to return ORD-123 and ORD-555",
+])
+def test_not_routine(refunds, message):
+    assert fast_path.resolve(message) is None
+    assert refunds == []
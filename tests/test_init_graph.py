@@ -0,0 +1,53 @@
+import pytest
+
+from scripts import init_graph
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    monkeypatch.setattr(init_graph, "DB_PATH", str(tmp_path / "context_graph_db"))
+    db, conn = init_graph.open_db()
+    init_graph.ingest(conn, init_graph.SEED_CASES)
+    yield conn
+    conn.close()
+    db.close()
+
+
+def cases(conn):
+    result = conn.execute(
+        "MATCH (c:SupportCase) OPTIONAL MATCH (c)-[:HAS_TAG]->(t:Tag) "
+        "RETURN c.id, c.decision, c.rationale, COLLECT(t.name)")
+    rows = {}
+    while result.has_next():
+        case_id, decision, rationale, tags = result.get_next()
+        rows[case_id] = (decision, rationale, sorted(tags))
+    return rows
+
+
+def test_upsert_replaces_fields_and_tags(conn):
+    rationale = "Reviewed again by the returns team.\nVIP courtesy no longer applies to socks."
+    init_graph.ingest(conn, [
+        {"id": "PREC-VIP-001", "decision": "DENY", "rationale": rationale, "tags": "socks|vip"},
+        {"id": "PREC-NEW-004", "decision": "APPROVE", "rationale": "Line one\r\nline two", "tags": ["new"]},
+    ])
+
+    rows = cases(conn)
+    assert rows["PREC-VIP-001"] == ("DENY", rationale, ["socks", "vip"])
+    assert rows["PREC-NEW-004"][1] == "Line one\r\nline two"
+    assert rows["PREC-HOL-002"][0] == "APPROVE"
+    assert len(rows) == 4
+
+
+def test_failed_batch_keeps_existing_cases(conn, monkeypatch):
+    before = cases(conn)
+    write_csv = init_graph._write_csv
+
+    def corrupt_edges(path, rows):
+        # An edge to a case that does not exist makes the last COPY of the batch fail
+        write_csv(path, rows + [["PREC-MISSING", "vip"]] if path.endswith("HAS_TAG.csv") else rows)
+
+    monkeypatch.setattr(init_graph, "_write_csv", corrupt_edges)
+    with pytest.raises(RuntimeError):
+        init_graph.ingest(conn, [{"id": "PREC-VIP-001", "decision": "DENY", "rationale": "x", "tags": "vip"}])
+
+    assert cases(conn) == before
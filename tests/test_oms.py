@@ -0,0 +1,87 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+
+import httpx
+import pytest
+
+from benchmarks.fake_oms import start_server
+from services.oms import MOCK_ORDERS, HttpOMS, OMSAdapter, OrderLookup
+
+
+@pytest.fixture
+def oms():
+    servers = []
+
+    def start(latency_ms=0.0):
+        server, base_url = start_server(latency_ms=latency_ms)
+        servers.append(server)
+        return server, base_url
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def test_concurrent_lookups_go_out_as_one_batch(oms):
+    server, base_url = oms(latency_ms=20)
+    lookup = OrderLookup(HttpOMS(base_url), batch_window=0.05)
+    order_ids = list(MOCK_ORDERS) + ["ORD-404"]
+
+    with ThreadPoolExecutor(len(order_ids)) as pool:
+        orders = dict(zip(order_ids, pool.map(lookup.get, order_ids)))
+
+    assert orders == {**MOCK_ORDERS, "ORD-404": None}
+    assert server.stats.requests == 1
+    assert server.stats.ids_requested == len(order_ids)
+
+
+def test_concurrent_lookups_of_one_order_share_a_request(oms):
+    server, base_url = oms(latency_ms=50)
+    lookup = OrderLookup(HttpOMS(base_url), batch_window=0.0)
+
+    with ThreadPoolExecutor(8) as pool:
+        orders = list(pool.map(lookup.get, ["ORD-123"] * 8))
+
+    assert orders == [MOCK_ORDERS["ORD-123"]] * 8
+    assert server.stats.requests == 1
+
+
+def test_results_are_cached_for_the_ttl(oms):
+    server, base_url = oms()
+    lookup = OrderLookup(HttpOMS(base_url), cache_ttl=0.2, batch_window=0.0)
+
+    lookup.get("ORD-123")
+    assert lookup.get("ORD-404") is None
+    lookup.get("ORD-123")
+    lookup.get("ORD-404")  # "not found" is cached too
+    assert server.stats.requests == 2
+
+    lookup.invalidate("ORD-123")
+    lookup.get("ORD-123")
+    assert server.stats.requests == 3
+
+    time.sleep(0.25)
+    lookup.get("ORD-123")
+    assert server.stats.requests == 4
+
+
+def test_slow_oms_times_out(oms):
+    _, base_url = oms(latency_ms=300)
+
+    # HTTP timeout: the adapter's error reaches every waiting caller
+    lookup = OrderLookup(HttpOMS(base_url, timeout=0.05), batch_window=0.0)
+    with pytest.raises(httpx.TimeoutException):
+        lookup.get("ORD-123")
+
+    # Lookup timeout: callers stop waiting even if the request hangs on
+    lookup = OrderLookup(HttpOMS(base_url, timeout=5.0), batch_window=0.0, timeout=0.05)
+    with pytest.raises(FuturesTimeoutError):
+        lookup.get("ORD-456")
+
+
+def test_adapter_must_implement_get_orders():
+    class NoLookups(OMSAdapter):
+        pass
+
+    with pytest.raises(TypeError):
+        NoLookups()
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from services.oms import MOCK_ORDERS
+from services.policy_index import CompiledPolicy
+
+POLICY_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "policies")
+
+
+@pytest.fixture(scope="module")
+def returns():
+    with open(os.path.join(POLICY_DIR, "return_policy.md")) as f:
+        return CompiledPolicy("returns", f.read())
+
+
+@pytest.mark.parametrize("item, category", [
+    ("Gift Card", "Digital Goods"),
+    ("$50 Amazon Gift Cards", "Digital Goods"),
+    ("Software Keys", "Digital Goods"),
+    ("Steam Wallet Card", "Digital Goods"),
+    ("Lace Lingerie Set", "Apparel (Intimates)"),
+    ("Wool Socks", "Apparel (Intimates)"),
+])
+def test_excluded_items(returns, item, category):
+    exclusion = returns.is_excluded(item)
+    assert exclusion is not None and exclusion.category == category
+    assert returns.relevant([item])["items"][item]["excluded"]
+
+
+# Final Sale category of every demo order's item (None: returnable)
+DEMO_EXCLUSIONS = {
+    "ORD-123": None,
+    "ORD-456": None,
+    "ORD-999": None,
+    "ORD-777": "Apparel (Intimates)",
+    "ORD-888": "Digital Goods",  # a store card is a gift card: the whole category is Final Sale
+    "ORD-555": None,
+}
+
+
+@pytest.mark.parametrize("order_id", sorted(MOCK_ORDERS))
+def test_demo_orders(returns, order_id):
+    assert set(DEMO_EXCLUSIONS) == set(MOCK_ORDERS)
+    for item in MOCK_ORDERS[order_id]["items"]:
+        exclusion = returns.is_excluded(item)
+        assert (exclusion and exclusion.category) == DEMO_EXCLUSIONS[order_id]
+        assert returns.relevant([item])["items"][item]["excluded"] == (DEMO_EXCLUSIONS[order_id] is not None)
+
+
+@pytest.mark.parametrize("item", [
+    "NVIDIA Graphics Card",
+    "Business Card Holder",
+    "Car Keys Holder",
+    "Product Manual",
+    "Cotton T-Shirt",
+])
+def test_look_alike_items_are_not_excluded(returns, item):
+    # They share a noun or a category with an exclusion ("Gift Cards", "Socks"), not the item
+    assert returns.is_excluded(item) is None
+    assert all(e.condition for e in returns.exclusions_for(item))
+    assert not returns.relevant([item])["items"][item]["excluded"]
+
+
+def test_conditional_exclusions_need_the_condition(returns):
+    assert returns.is_excluded("Headphones") is None
+    assert returns.is_excluded("Headphones", conditions=("used",)).item == "Used Headphones"
+    assert returns.is_excluded("Night Cream", conditions=("open",)).item == "Open Beauty Products"
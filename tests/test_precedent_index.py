@@ -0,0 +1,38 @@
+import kuzu
+import pytest
+
+from scripts import init_graph
+from services.graph_pool import GraphConnectionPool
+from services.precedent_index import PrecedentIndex
+
+
+@pytest.fixture
+def graph(tmp_path, monkeypatch):
+    monkeypatch.setattr(init_graph, "DB_PATH", str(tmp_path / "context_graph_db"))
+    db, conn = init_graph.open_db()
+    init_graph.ingest(conn, init_graph.SEED_CASES)
+    conn.close()
+    db.close()
+
+    pool = GraphConnectionPool(init_graph.DB_PATH, size=2)
+    pool.open()
+    return pool
+
+
+def test_search_ranks_by_tag_overlap(graph):
+    index = PrecedentIndex()
+    top = index.search(graph, ["socks", "vip", "exception"], k=1)[0]
+    assert top["precedent_id"] == "PREC-VIP-001"
+    assert top["decision"] == "APPROVE"
+
+
+def test_in_place_update_is_picked_up(graph):
+    index = PrecedentIndex(refresh_interval=0)
+    assert index.search(graph, ["socks", "vip"], k=1)[0]["decision"] == "APPROVE"
+
+    # Same case, same tags: the case and edge counts do not change
+    vip = dict(init_graph.SEED_CASES[0], decision="DENY", rationale="Courtesy withdrawn.")
+    init_graph.ingest(kuzu.Connection(graph.db), [vip])
+
+    top = index.search(graph, ["socks", "vip"], k=1)[0]
+    assert (top["decision"], top["rationale"]) == ("DENY", "Courtesy withdrawn.")
@@ -0,0 +1,57 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from agent.agent import SupportAgent
+from config import Config
+from services.services import EnterpriseServices
+from tools.tools import registry
+
+
+@pytest.fixture
+def tool_calls(monkeypatch):
+    """Records every tool call that actually runs (prefetched or not)."""
+    calls = []
+    call = registry.call
+
+    def spy(name, tool_input):
+        calls.append((name, tool_input))
+        return call(name, tool_input)
+
+    monkeypatch.setattr(registry, "call", spy)
+    monkeypatch.setattr(Config, "PREFETCH", True)
+    return calls
+
+
+def tool_use(name, tool_input):
+    return SimpleNamespace(id=f"toolu_{name}", name=name, input=tool_input)
+
+
+def run_tools(support, *blocks):
+    return [json.loads(result["content"]) for result in support._run_tools(list(blocks))]
+
+
+def test_policy_call_with_items_is_served_from_the_prefetched_document(tool_calls):
+    support = SupportAgent(client=object(), async_client=object())
+    support._start_turn("I want to return ORD-123")
+
+    order, = run_tools(support, tool_use("look_up_order", {"order_id": "ORD-123"}))
+    items = ", ".join(order["items"])
+    policy, = run_tools(support, tool_use("get_policy_info", {"policy_type": "returns", "items": items}))
+
+    assert policy == EnterpriseServices.get_policy_info("returns", order["items"])
+    assert "items" in policy  # the compiled rules for the item, not the whole document
+    assert [name for name, _ in tool_calls] == ["look_up_order", "get_policy_info"]  # just the prefetch
+    assert support._prefetch.served == 2
+
+    # The whole document is still there for a plain call
+    document, = run_tools(support, tool_use("get_policy_info", {"policy_type": "returns"}))
+    assert "policy_text" in document and len(tool_calls) == 2
+
+
+def test_other_policy_with_items_runs_the_tool(tool_calls):
+    support = SupportAgent(client=object(), async_client=object())
+    support._start_turn("I want to return ORD-123")
+    run_tools(support, tool_use("get_policy_info", {"policy_type": "shipping", "items": "Wireless Headphones"}))
+    assert ("get_policy_info", {"policy_type": "shipping", "items": "Wireless Headphones"}) in tool_calls
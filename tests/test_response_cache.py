@@ -0,0 +1,16 @@
+from agent.response_cache import POLICY_TOOLS, ResponseCache
+from tools.tools import registry
+
+
+def test_policy_tools_are_the_cacheable_tools_but_precedents():
+    assert POLICY_TOOLS == {"get_policy_info"}
+    assert registry.get("check_precedents").cacheable
+    assert not any(registry.get(name).cacheable for name in ("look_up_order", "execute_order_return", "escalate_to_human"))
+
+
+def test_repeated_question_is_served():
+    cache = ResponseCache()
+    cache.put("What's your return window?", "30 days.", {"returns"})
+    assert cache.get("what is your return window") == "30 days."
+    cache.invalidate("returns")
+    assert cache.get("What's your return window?") is None
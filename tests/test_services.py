@@ -0,0 +1,56 @@
+import pytest
+
+from services.outbox import Outbox, current_session_id
+from services.services import EnterpriseServices
+
+
+@pytest.fixture
+def outbox(tmp_path, monkeypatch):
+    """An outbox with no drain worker: the tests move rows between statuses themselves."""
+    box = Outbox(str(tmp_path / "outbox.sqlite3"))
+    monkeypatch.setattr(box, "start_worker", lambda: None)
+    monkeypatch.setattr(EnterpriseServices, "outbox", box)
+    token = current_session_id.set("test-session")
+    yield box
+    current_session_id.reset(token)
+
+
+def set_status(box, status):
+    with box._lock:
+        box._connection().execute("UPDATE outbox SET status = ?", (status,))
+
+
+@pytest.mark.parametrize("status", ["pending", "sending"])
+def test_queued_refund_is_not_reported_as_issued(outbox, status):
+    first = EnterpriseServices.execute_refund("ORD-123", "Routine return")
+    set_status(outbox, status)
+    again = EnterpriseServices.execute_refund("ORD-123", "Routine return")
+    assert again["duplicate"] and again["transaction_id"] == first["transaction_id"]
+    assert "queued" in again["message"] and "already issued" not in again["message"]
+
+
+def test_sent_refund_is_reported_as_issued(outbox):
+    EnterpriseServices.execute_refund("ORD-123", "Routine return")
+    set_status(outbox, "sent")
+    again = EnterpriseServices.execute_refund("ORD-123", "Routine return")
+    assert again["status"] == "success" and "already issued" in again["message"]
+
+
+def test_dead_refund_is_an_error(outbox):
+    EnterpriseServices.execute_refund("ORD-123", "Routine return")
+    set_status(outbox, "dead")
+    again = EnterpriseServices.execute_refund("ORD-123", "Routine return")
+    assert "status" not in again and "escalate" in again["error"]
+
+
+def test_dead_escalation_is_an_error(outbox):
+    EnterpriseServices.escalate_to_human("ORD-999", "Angry customer")
+    set_status(outbox, "dead")
+    again = EnterpriseServices.escalate_to_human("ORD-999", "Angry customer")
+    assert "status" not in again and "error" in again
+
+
+def test_queued_escalation_is_not_reported_as_open(outbox):
+    EnterpriseServices.escalate_to_human("ORD-999", "Angry customer")
+    again = EnterpriseServices.escalate_to_human("ORD-999", "Angry customer")
+    assert again["status"] == "escalated" and "queued" in again["message"]
@@ -0,0 +1,55 @@
+import time
+
+import pytest
+
+from agent.session_store import InMemorySessionStore, SessionConflict, SessionStore, SQLiteSessionStore
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def make(ttl_seconds=None):
+        if request.param == "memory":
+            return InMemorySessionStore(ttl_seconds)
+        return SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), ttl_seconds)
+    return make
+
+
+def test_round_trip_bumps_the_version(make_store):
+    store = make_store()
+    assert store.load("s1") == ({}, 0)
+
+    state = {"messages": [{"role": "user", "content": "hi"}], "urgent": True}
+    assert store.save("s1", state, 0) == 1
+    assert store.load("s1") == (state, 1)
+
+
+def test_overlapping_turns_conflict(make_store):
+    store = make_store()
+    store.save("s1", {"messages": []}, 0)
+
+    _, version = store.load("s1")
+    store.save("s1", {"messages": [{"role": "user", "content": "first"}]}, version)
+    with pytest.raises(SessionConflict):
+        store.save("s1", {"messages": [{"role": "user", "content": "second"}]}, version)
+    with pytest.raises(SessionConflict):
+        store.save("new", {"messages": []}, 3)
+
+
+def test_expired_sessions_are_dropped(make_store):
+    store = make_store(ttl_seconds=0.05)
+    store.save("s1", {"messages": [{"role": "user", "content": "hi"}]}, 0)
+    time.sleep(0.1)
+
+    state, version = store.load("s1")
+    assert state == {}
+    assert store.purge_expired() == 1
+    assert store.load("s1") == ({}, 0)
+
+
+def test_store_must_implement_every_operation():
+    class LoadOnly(SessionStore):
+        def load(self, session_id):
+            return {}, 0
+
+    with pytest.raises(TypeError):
+        LoadOnly()
@@ -0,0 +1,168 @@
+import asyncio
+import inspect
+import logging
+import time
+import typing
+from dataclasses import dataclass
+
+from observability import telemetry
+
+logger = logging.getLogger("Tool Registry")
+
+# Python annotation -> JSON schema type
+JSON_TYPES = {str: "string", int: "integer", float: "number", bool: "boolean"}
+
+
+@dataclass(frozen=True)
+class Tool:
+    """A registered tool: implementation, generated schema and dispatch metadata."""
+    name: str
+    func: typing.Callable
+    schema: dict
+    timeout: float = 10.0        # seconds before the agent gives up waiting
+    idempotent: bool = True      # safe to call twice with the same input
+    cacheable: bool = False      # result depends only on the input (no live state)
+    parallel_safe: bool = True   # may run alongside other tools in the same turn
+    signature: inspect.Signature = None  # cached at registration, used to check arguments
+
+
+class ToolRegistry:
+    """
+    Decorator-based tool registry.
+
+    The JSON schema sent to Claude is generated from each function's
+    signature (type hints, `Literal[...]` enums, `Annotated[..., "description"]`)
+    and its docstring, so schema and implementation cannot drift apart;
+    anything the schema cannot express is rejected at registration.
+    Dispatch is a dict lookup by tool name.
+    """
+
+    def __init__(self):
+        self.tools = {}
+
+    def tool(self, timeout=10.0, idempotent=True, cacheable=False, parallel_safe=True):
+        def decorator(func):
+            name = func.__name__
+            if name in self.tools:
+                raise ValueError(f"Tool '{name}' is already registered.")
+            if timeout is not None and timeout <= 0:
+                raise ValueError(f"Tool '{name}': timeout must be positive.")
+            self.tools[name] = Tool(
+                name=name,
+                func=func,
+                schema=self._build_schema(func),
+                timeout=timeout,
+                idempotent=idempotent,
+                cacheable=cacheable,
+                parallel_safe=parallel_safe,
+                signature=inspect.signature(func),
+            )
+            return func
+        return decorator
+
+    def get(self, name):
+        return self.tools.get(name)
+
+    def schemas(self):
+        """Tool definitions in the format expected by `messages.create(tools=...)`."""
+        return [t.schema for t in self.tools.values()]
+
+    # ---------------------------------------------------------
+    # Dispatch
+    # ---------------------------------------------------------
+    def call(self, name, tool_input):
+        """Runs a tool by name. Errors come back as {"error": ...} for Claude to read."""
+        start = time.perf_counter()
+        with telemetry.span(f"execute_tool {name}", {"gen_ai.tool.name": name}) as span:
+            result = self._dispatch(name, tool_input)
+            status = "error" if isinstance(result, dict) and "error" in result else "ok"
+            span.set_attribute("tool.status", status)
+            if status == "error":
+                span.set_attribute("tool.error", result["error"])
+                telemetry.mark_error(span, result["error"])
+        telemetry.record_tool(name, time.perf_counter() - start, status)
+        return result
+
+    def _dispatch(self, name, tool_input):
+        tool = self.tools.get(name)
+        if tool is None:
+            logger.error(f"Unknown tool called: {name}")
+            return {"error": f"Tool '{name}' not found."}
+        try:
+            tool.signature.bind(**tool_input)
+        except TypeError as e:
+            logger.error(f"Bad arguments for tool '{name}': {e}")
+            return {"error": f"Invalid arguments for tool '{name}': {e}"}
+        try:
+            return tool.func(**tool_input)
+        except Exception as e:
+            logger.error(f"Tool '{name}' failed: {e}", exc_info=True)
+            return {"error": f"Tool '{name}' failed: {e}"}
+
+    async def acall(self, name, tool_input):
+        """Async `call`: runs the tool on a worker thread, bounded by its timeout."""
+        tool = self.tools.get(name)
+        timeout = tool.timeout if tool else None
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(self.call, name, tool_input), timeout)
+        except asyncio.TimeoutError:
+            return self.timeout_error(name)
+
+    def timeout_error(self, name):
+        tool = self.tools[name]
+        logger.error(f"Tool '{name}' timed out after {tool.timeout}s")
+        telemetry.record_tool(name, tool.timeout, "timeout")
+        error = {"error": f"Tool '{name}' timed out after {tool.timeout}s."}
+        if not tool.idempotent:
+            # The call may still complete in the background: retrying could duplicate it
+            error["warning"] = "Outcome unknown. Do NOT retry; escalate to a human instead."
+        return error
+
+    # ---------------------------------------------------------
+    # Schema generation
+    # ---------------------------------------------------------
+    @staticmethod
+    def _build_schema(func):
+        description = inspect.getdoc(func)
+        if not description:
+            raise ValueError(f"Tool '{func.__name__}' needs a docstring (used as its description).")
+
+        hints = typing.get_type_hints(func, include_extras=True)
+        properties = {}
+        required = []
+        for param in inspect.signature(func).parameters.values():
+            if param.kind not in (param.POSITIONAL_OR_KEYWORD, param.KEYWORD_ONLY):
+                raise ValueError(f"Tool '{func.__name__}': *args/**kwargs are not supported.")
+            if param.name not in hints:
+                raise ValueError(f"Tool '{func.__name__}': parameter '{param.name}' needs a type hint.")
+
+            properties[param.name] = ToolRegistry._property_schema(func.__name__, param.name, hints[param.name])
+            if param.default is param.empty:
+                required.append(param.name)
+
+        return {
+            "name": func.__name__,
+            "description": description,
+            "input_schema": {"type": "object", "properties": properties, "required": required},
+        }
+
+    @staticmethod
+    def _property_schema(tool_name, param_name, hint):
+        prop = {}
+        if typing.get_origin(hint) is typing.Annotated:
+            hint, *extras = typing.get_args(hint)
+            descriptions = [e for e in extras if isinstance(e, str)]
+            if descriptions:
+                prop["description"] = descriptions[0]
+
+        if typing.get_origin(hint) is typing.Literal:
+            values = list(typing.get_args(hint))
+            prop["type"] = JSON_TYPES[type(values[0])]
+            prop["enum"] = values
+        elif hint in JSON_TYPES:
+            prop["type"] = JSON_TYPES[hint]
+        else:
+            raise ValueError(f"Tool '{tool_name}': unsupported type {hint!r} for parameter '{param_name}'.")
+
+        # Keep the familiar key order: type, enum, description
+        return {k: prop[k] for k in ("type", "enum", "description") if k in prop}
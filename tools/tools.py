@@ -1,75 +1,59 @@
-tools_schema = [
-    {
-        "name": "look_up_order",
-        "description": "Fetch order details. This is the MANDATORY first step for any order query. You can NOT skip this",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "order_id": {"type": "string"}
-            },
-            "required": ["order_id"]
-        } 
-    },
-
-    {
-        "name": "get_policy_info",
-        "description": "Retrieve the official policy text for a specific topic. MANDATORY step before processing any refund.",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "policy_type": {
-                    "type": "string", 
-                    "enum": ["returns", "shipping", "privacy"],
-                    "description": "The specific policy document to read."
-                }
-            },
-            "required": ["policy_type"]
-        }
-    },    
-
-    {
-        "name": "execute_order_return",
-        "description": "process the refund. RESTRICTED: only use if eligible_for_return is true AND if Policy allows it.",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "order_id": {"type": "string"},
-                "reason": {"type": "string"}
-            },
-            "required": ["order_id", "reason"]
-        }
-    },
-    
-    {
-        "name": "escalate_to_human",
-        "description": "Escalate to human. Use this if a customer is angry or request if out of policy",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "order_id": {"type": "string", "description": "OPTIONAL order_id"} ,
-                "reason": {"type": "string"},
-                "policy_check_confirmation": {
-                    "type": "string",
-                    "description": "You must explicitly state: 'I have checked the policy and this item is NOT in the exclusion list.'",
-                    "enum": ["verified_compliant"]
-                }
-            },
-            "required": ["order_id", "reason", "policy_check_confirmation"]
-        }
-    },
-
-    {
-        "name": "check_precedents",
-        "description": "Query the Kùzu Context Graph for past human decisions. Use this when a user asks for an exception (e.g., VIP).",
-        "input_schema": {
-            "type": "object",
-            "properties": {
-                "query_tags_str": {
-                    "type": "string",
-                    "description": "Space-separated keywords describing the context (e.g., 'socks vip return')"
-                }
-            },
-            "required": ["query_tags_str"]
-        }
-    }
-]
\ No newline at end of file
+from typing import Annotated, Literal
+
+from services.services import EnterpriseServices
+from tools.registry import ToolRegistry
+
+# Every tool Claude can call. The JSON schema is generated from each
+# function's signature + docstring, and the agent dispatches by name.
+registry = ToolRegistry()
+
+
+@registry.tool(timeout=10.0, cacheable=False)
+def look_up_order(order_id: str):
+    """Fetch order details. This is the MANDATORY first step for any order query. You can NOT skip this"""
+    return EnterpriseServices.look_up_order(order_id)
+
+
+@registry.tool(timeout=5.0, cacheable=True)
+def get_policy_info(
+    policy_type: Annotated[Literal["returns", "shipping", "privacy"], "The specific policy document to read."],
+    items: Annotated[str, "OPTIONAL comma-separated item names. If given, only the rules that apply to these items are returned."] = "",
+):
+    """Retrieve the official policy text for a specific topic. MANDATORY step before processing any refund."""
+    return EnterpriseServices.get_policy_info(policy_type, item_names(items))
+
+
+def item_names(items):
+    """The names in get_policy_info's comma-separated `items` argument."""
+    return [item.strip() for item in items.split(",") if item.strip()]
+
+
+# Safe to retry: deduplicated per (session, order_id) and delivered via the outbox
+@registry.tool(timeout=10.0, parallel_safe=False)
+def execute_order_return(order_id: str, reason: str):
+    """process the refund. RESTRICTED: only use if eligible_for_return is true AND if Policy allows it."""
+    return EnterpriseServices.execute_refund(order_id, reason)
+
+
+@registry.tool(timeout=10.0, parallel_safe=False)
+def escalate_to_human(
+    order_id: Annotated[str, "OPTIONAL order_id"],
+    reason: str,
+    policy_check_confirmation: Annotated[
+        Literal["verified_compliant"],
+        "You must explicitly state: 'I have checked the policy and this item is NOT in the exclusion list.'",
+    ],
+):
+    """Escalate to human. Use this if a customer is angry or request if out of policy"""
+    return EnterpriseServices.escalate_to_human(order_id, reason)
+
+
+@registry.tool(timeout=10.0, cacheable=True)
+def check_precedents(
+    query_tags_str: Annotated[str, "Space-separated keywords describing the context (e.g., 'socks vip return')"],
+):
+    """Query the Kùzu Context Graph for past human decisions. Use this when a user asks for an exception (e.g., VIP)."""
+    return EnterpriseServices.check_precedents(query_tags_str)
+
+
+tools_schema = registry.schemas()